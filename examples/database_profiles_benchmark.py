@@ -0,0 +1,55 @@
+"""
+Benchmarks the CxDatabase performance profiles on the default tables.
+
+Every simulated step writes what an environment with a database writes for each agent: an agent upsert, an
+action and a log line, followed by the metadata upserts of CxSocket.sync_environment.
+
+usage: python examples/database_profiles_benchmark.py [n_agents] [n_steps]
+"""
+import datetime
+import sys
+import tempfile
+import time
+
+from cxsim.environment.database.cx_database import CxDatabase, DATABASE_PROFILES
+
+METADATA_KEYS = ["name", "max_steps", "max_episodes", "n_artifacts", "n_agents", "x_size", "y_size",
+                 "current_episode", "current_step", "current_status", "next_agent"]
+
+
+def run(n_agents: int, n_steps: int, **database_kwargs) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        db = CxDatabase(directory=directory, **database_kwargs)
+        db.connect()
+        db.reset()
+
+        start = time.perf_counter()
+        for step in range(n_steps):
+            for agent in range(n_agents):
+                db["cxagents"].upsert(
+                    name=f"agent_{agent}", x_pos=agent, y_pos=step, parameters={}, inventory={"capital": step},
+                    messages=[], past_actions=[]
+                )
+                db["cxactions"].add(step=step, agent_name=f"agent_{agent}", action_name="BuyOrder",
+                                    action_parameters={"good": "socks", "price": 10, "quantity": 1})
+                db["cxlogs"].add(timestamp=datetime.datetime.utcnow(), level="INFO", msg=f"agent_{agent} acted")
+            for key in METADATA_KEYS:
+                db["cxmetadata"].upsert(key=key, value=step)
+            db.flush()
+        if db.threaded:
+            db.wait_until_durable()
+        elapsed = time.perf_counter() - start
+        db.close()
+    return elapsed
+
+
+if __name__ == "__main__":
+    n_agents = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    n_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print(f"{n_agents} agents, {n_steps} steps")
+    print(f"{'profile':<10}{'write_behind':>14}{'threaded':>10}{'seconds':>10}")
+    for profile in DATABASE_PROFILES:
+        for write_behind, threaded in [(False, False), (True, False), (True, True)]:
+            elapsed = run(n_agents, n_steps, profile=profile, write_behind=write_behind, threaded=threaded)
+            print(f"{profile:<10}{str(write_behind):>14}{str(threaded):>10}{elapsed:>10.3f}")
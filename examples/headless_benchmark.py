@@ -0,0 +1,61 @@
+"""
+Measures the raw step throughput of a headless environment, which runs without GUI, database and logging.
+
+Every agent is scripted: on each turn it moves in a random direction and places a random buy or sell order
+for socks, so the benchmark exercises the gridworld, the marketplace and the action dispatch.
+
+usage: python examples/headless_benchmark.py [n_steps] [n_agents ...]
+"""
+import random
+import sys
+import time
+
+from cxsim import Environment, Agent
+from cxsim.artifacts import Marketplace
+from cxsim.artifacts.standard.gridworld import Gridworld, Move
+from cxsim.artifacts.standard.marketplace import BuyOrder, SellOrder
+
+DIRECTIONS = ("up", "down", "left", "right")
+
+
+class ScriptedAgent(Agent):
+    def __init__(self):
+        super(ScriptedAgent, self).__init__()
+        self.inventory.set_starting_inventory({"capital": 10000, "socks": 100})
+
+    def step(self):
+        self.environment.execute(self, Move(direction=random.choice(DIRECTIONS)))
+        order = BuyOrder if random.random() < 0.5 else SellOrder
+        self.environment.execute(self, order(good="socks", price=random.randint(5, 15), quantity=1))
+
+    def reset(self):
+        pass
+
+
+def run(n_agents: int, n_steps: int) -> float:
+    random.seed(0)
+    env = Environment(max_steps=n_steps, max_episodes=1, headless=True)
+
+    # room for every agent to be placed with empty neighbouring cells
+    size = int((16 * n_agents) ** 0.5) + 10
+    env.add(Gridworld(x_size=size, y_size=size))
+    env.add(Marketplace())
+    for _ in range(n_agents):
+        env.add(ScriptedAgent())
+    env.reset()
+
+    start = time.perf_counter()
+    for _ in env.iter_steps():
+        env.step()
+    elapsed = time.perf_counter() - start
+    return n_steps / elapsed
+
+
+if __name__ == "__main__":
+    n_steps = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    agent_counts = [int(n) for n in sys.argv[2:]] or [10, 100, 1000]
+
+    print(f"{'agents':>8}{'steps/s':>12}{'turns/s':>12}")
+    for n_agents in agent_counts:
+        steps_per_second = run(n_agents, n_steps)
+        print(f"{n_agents:>8}{steps_per_second:>12.1f}{steps_per_second * n_agents:>12.0f}")
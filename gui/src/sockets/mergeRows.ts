@@ -0,0 +1,25 @@
+// Applies the rows of a 'data_delta' event to the rows a table already holds.
+// Rows of tables with primary keys replace the row with the same keys, other rows are appended.
+const mergeRows = <T,>(current: T | null | undefined, rows: any[], primaryKeys: string[] = []): T => {
+  const merged: any[] = Array.isArray(current) ? [...current] : [];
+  if (primaryKeys.length === 0) {
+    return [...merged, ...rows] as unknown as T;
+  }
+
+  const keyOf = (row: any) => primaryKeys.map(key => String(row[key])).join('\u0000');
+  const positions = new Map<string, number>();
+  merged.forEach((row, index) => positions.set(keyOf(row), index));
+
+  rows.forEach(row => {
+    const position = positions.get(keyOf(row));
+    if (position === undefined) {
+      positions.set(keyOf(row), merged.length);
+      merged.push(row);
+    } else {
+      merged[position] = row;
+    }
+  });
+  return merged as unknown as T;
+};
+
+export default mergeRows;
@@ -1,9 +1,11 @@
 import { useState, useEffect } from 'react';
 import socket from "./socketConnection";
+import mergeRows from "./mergeRows";
 
 type Response<T> = {
   table_name: string;
   content: T;
+  primary_keys?: string[];
 };
 
 const useFullWebSocketListener = <T,>(): { data: Record<string, T | null>; error: Error | null } => {
@@ -19,12 +21,22 @@ const useFullWebSocketListener = <T,>(): { data: Record<string, T | null>; error
       }));
     };
 
-    // Subscribe to the data_update event
+    // Function to apply rows that changed since the last update
+    const handleDataDelta = (receivedData: Response<any[]>) => {
+      setData(prevData => ({
+        ...prevData,
+        [receivedData.table_name]: mergeRows<T>(prevData[receivedData.table_name], receivedData.content, receivedData.primary_keys),
+      }));
+    };
+
+    // Subscribe to the data_update and data_delta events
     socket.on('data_update', handleDataUpdate);
+    socket.on('data_delta', handleDataDelta);
 
     return () => {
-      // Unsubscribe from the data_update event
+      // Unsubscribe from the data_update and data_delta events
       socket.off('data_update', handleDataUpdate);
+      socket.off('data_delta', handleDataDelta);
 
       // Emit a leave event for each room that has been joined
       // This assumes you have a way to track which rooms have been joined
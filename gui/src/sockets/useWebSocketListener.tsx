@@ -1,9 +1,11 @@
 import { useState, useEffect } from 'react';
 import socket from './socketConnection';
+import mergeRows from './mergeRows';
 
 type Response<T> = {
   table_name: string;
   content: T;
+  primary_keys?: string[];
 };
 
 const useSocketListener = <T,>(
@@ -21,6 +23,13 @@ const useSocketListener = <T,>(
       }
     };
 
+    // Apply only the rows that changed since the last update
+    const handleDataDelta = (receivedData: Response<any[]>) => {
+      if (receivedData?.table_name === room) {
+        setData(prevData => mergeRows<T>(prevData, receivedData.content, receivedData.primary_keys));
+      }
+    };
+
     const handleConnect = () => {
       setConnectionStatus('connected');
     };
@@ -32,11 +41,13 @@ const useSocketListener = <T,>(
     socket.on('connect', handleConnect);
     socket.on('disconnect', handleDisconnect);
     socket.on('data_update', handleDataUpdate);
+    socket.on('data_delta', handleDataDelta);
 
     return () => {
       socket.off('connect', handleConnect);
       socket.off('disconnect', handleDisconnect);
       socket.off('data_update', handleDataUpdate); // Remove the specific event listener
+      socket.off('data_delta', handleDataDelta);
       if (room) {
         // If a room was joined, leave the room before disconnecting
         socket.emit('leave_room', { room });
@@ -1,3 +1,4 @@
 from .environment.environment import Environment
 from .agents.agent import Agent
 from .agents.population import Population
+from .environment.sweep import SweepRunner
@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Tuple
 import inspect
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, is_dataclass
 
 
 def do_action(action: str, parameters: List[str]):
@@ -25,11 +25,16 @@ class Action:
         # Safely access the stored parameters
         return self.__params
 
+    @classmethod
+    def field_names(cls) -> Tuple[str, ...]:
+        # Parameters are the public, non-callable class attributes, computed once per class
+        if "_field_names" not in cls.__dict__:
+            cls._field_names = tuple(attr_name for attr_name in dir(cls)
+                                     if not attr_name.startswith("_") and not callable(getattr(cls, attr_name)))
+        return cls._field_names
+
     def to_dict(self):
-        # Exclude '__params' and other built-in or callable attributes from the output
-        parameters = {attr_name: getattr(self, attr_name) for attr_name in dir(self)
-                      if not attr_name.startswith("__") and not callable(getattr(self, attr_name))
-                      and attr_name not in ['__dict__', '__weakref__', '_Action__params']}
+        parameters = {attr_name: getattr(self, attr_name) for attr_name in self.field_names()}
         return {'name': self.__class__.__name__, 'parameters': parameters}
 
     def __repr__(self):
@@ -40,6 +45,16 @@ class Action:
         params_str = ', '.join(f"{key}={value}" for key, value in self._get_params().items())
         return f"{self.__class__.__name__}({params_str})"
 
+
+def action_fields(action_class) -> Tuple[str, ...]:
+    """Returns the parameter names of an action class, either a dataclass or a subclass of Action."""
+    if is_dataclass(action_class):
+        return tuple(field.name for field in fields(action_class))
+    if isinstance(action_class, type) and issubclass(action_class, Action):
+        return action_class.field_names()
+    raise TypeError(f"{action_class} is neither a dataclass nor a subclass of Action")
+
+
 class ActionRestriction:
     def __init__(
             self,
@@ -38,6 +38,7 @@ class Agent:
         action_space (dict): Available actions and queries for the agent.
         inventory (Inventory): Inventory of items held by the agent.
         tools (dict): Tools or utilities available to the agent.
+        dirty (bool): Whether the agent changed since it was last synced to the GUI, see mark_dirty.
     """
 
     def __init__(self, name: str = "default"):
@@ -58,6 +59,8 @@ class Agent:
 
         # holds the observations for each artifact
         self.observations = []
+        # the observations of the actions applied in the agent's last turn, see decide
+        self.turn_observations = []
 
         # holds agent parameters
         self.params = {}
@@ -84,6 +87,9 @@ class Agent:
         # agent tools
         self.tools = {}
 
+        # new agents have never been synced
+        self.dirty = True
+
         self.before_turn_methods = [
             getattr(self, method_name) for method_name in dir(self)
             if callable(getattr(self, method_name))
@@ -108,8 +114,24 @@ class Agent:
         else:
             self.tools[tool.name] = tool
 
+    def mark_dirty(self):
+        """
+        Flag the agent to be written on the next GUI sync. Observations, messages, actions, moves and inventory
+        changes flag the agent automatically, call this after changing anything else that is synced, such as params.
+        """
+        self.dirty = True
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.dirty or self.inventory.changed
+
+    def mark_clean(self):
+        self.dirty = False
+        self.inventory.changed = False
+
     def add_observation(self, observation: str):
         self.observations.append(observation)
+        self.mark_dirty()
 
     def get_latest_observations(self, k: int = 1):
         return self.observations[-k:] if self.observations else None
@@ -121,6 +143,22 @@ class Agent:
     def step(self):
         raise NotImplementedError("This method should be implemented by subclasses")
 
+    def decide(self, observations: list):
+        """
+        Choose the actions of a turn without changing the world, the environment applies them once every agent
+        has decided. Implementing decide instead of step lets the environment gather decisions in parallel or
+        in batches.
+
+        :param observations: The observations of every action applied in the agent's previous turn, in the order
+            they were applied, empty before its first action.
+        :return: An action, a list of actions, or None to pass.
+        """
+        raise NotImplementedError("Implement decide or step in subclasses")
+
+    @property
+    def implements_decide(self) -> bool:
+        return type(self).decide is not Agent.decide
+
     @abstractmethod
     def reset(self):
         raise NotImplementedError("This method should be implemented by subclasses")
@@ -246,7 +284,7 @@ class Agent:
             "y_pos": self.y_pos,
             "color": self.color,
             "messages": self.io.text.full_messages,
-            "inventory": self.inventory.inventory,
+            "inventory": dict(self.inventory.inventory),
             "parameters": self.params,
             "actionHistory": self.action_history
         }
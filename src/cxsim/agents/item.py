@@ -24,53 +24,32 @@ class ItemHandler:
     def generate_new_item(self, name, amount: int):
         pass
 
-    @staticmethod
-    def trade(agent1, agent1_item: tuple, agent2, agent2_item: tuple):
+    def transfer(self, from_agent, to_agent, item_name: str, quantity: int) -> bool:
+        """
+        Moves quantity units of an item from one agent to another as a single ledger posting.
+        Returns False, without moving anything, if from_agent does not hold enough units.
+        """
+        return self.environment.ledger.post(
+            [(from_agent, to_agent, item_name, quantity)], step=self.environment.current_step
+        ) is not None
 
+    def trade(self, agent1, agent1_item: tuple, agent2, agent2_item: tuple) -> bool:
         """
         Executes a trade between two agents.
         agent1_item and agent2_item are tuples in the format (item_name, quantity).
         If item_name is "capital", the quantity represents the price per item.
+        Both legs are posted to the ledger as one entry, so the trade either happens in full or not at all.
         """
-
-        # Handle the case where agent1 is buying items from agent2 using capital
-        if agent1_item[0] == "capital":
-            total_cost = agent1_item[1] * agent2_item[1]  # price per item * number of items
-            if agent1.inventory.get_quantity("capital") >= total_cost:
-                for _ in range(agent2_item[1]):
-                    item_to_trade = agent2.inventory.remove_item(agent2_item[0])
-                    if item_to_trade:  # Ensure the item was successfully removed
-                        agent1.inventory.add_item(item_to_trade)
-                # Deduct capital from agent1 and add to agent2
-                for _ in range(total_cost):
-                    capital_to_trade = agent1.inventory.remove_item("capital")
-                    if capital_to_trade:
-                        agent2.inventory.add_item(capital_to_trade)
-
-        # Handle the case where agent2 is buying items from agent1 using capital
-        elif agent2_item[0] == "capital":
-            total_cost = agent2_item[1] * agent1_item[1]  # price per item * number of items
-            if agent2.inventory.get_quantity("capital") >= total_cost:
-                for _ in range(agent1_item[1]):
-                    item_to_trade = agent1.inventory.remove_item(agent1_item[0])
-                    if item_to_trade:  # Ensure the item was successfully removed
-                        agent2.inventory.add_item(item_to_trade)
-                # Deduct capital from agent2 and add to agent1
-                for _ in range(total_cost):
-                    capital_to_trade = agent2.inventory.remove_item("capital")
-                    if capital_to_trade:
-                        agent1.inventory.add_item(capital_to_trade)
-
-        # Handle the general case where agents are trading items
-        else:
-            # Transfer items from agent1 to agent2
-            for _ in range(agent1_item[1]):
-                item_to_trade = agent1.inventory.remove_item(agent1_item[0])
-                if item_to_trade:  # Ensure the item was successfully removed
-                    agent2.inventory.add_item(item_to_trade)
-
-            # Transfer items from agent2 to agent1
-            for _ in range(agent2_item[1]):
-                item_to_trade = agent2.inventory.remove_item(agent2_item[0])
-                if item_to_trade:  # Ensure the item was successfully removed
-                    agent1.inventory.add_item(item_to_trade)
+        item1, quantity1 = agent1_item
+        item2, quantity2 = agent2_item
+
+        # capital is quoted per item, so the amount paid is the price times the quantity of the other leg
+        if item1 == "capital":
+            quantity1 = quantity1 * quantity2
+        elif item2 == "capital":
+            quantity2 = quantity2 * quantity1
+
+        return self.environment.ledger.post(
+            [(agent1, agent2, item1, quantity1), (agent2, agent1, item2, quantity2)],
+            step=self.environment.current_step
+        ) is not None
@@ -3,38 +3,88 @@ from cxsim.agents.item import Item
 
 
 class Inventory:
-    def __init__(self):
-        self.internal_inventory = {}  # Holds deques of Items
+    """
+    Holds the goods of an agent.
+
+    By default every unit of a good is an Item in a deque, so each unit keeps its identity. With fungible=True
+    goods are stored as integer quantities instead, and only the goods listed in non_fungible keep Item objects.
+    An inventory attached to a Holdings matrix stores its quantities in its row of that matrix.
+
+    Every change sets changed, which tells the GUI sync that the inventory has to be written again.
+    """
+    def __init__(self, fungible: bool = False, non_fungible=None):
+        self.fungible = fungible
+        self.non_fungible = set(non_fungible) if non_fungible else set()
+        self.internal_inventory = {}  # Holds deques of Items for goods that are not fungible
         self.inventory = {}  # Holds integer representations of lengths
         self.starting_inventory = {}
         self.deltas = []
+        self.holdings = None
+        self.row = None
+        self.changed = True
+
+    def attach(self, holdings, row):
+        """Store the quantities of this inventory in a row of a Holdings matrix."""
+        if self.non_fungible:
+            raise ValueError(f"a Holdings matrix only stores counts, the non-fungible goods {sorted(self.non_fungible)} can't be attached")
+        self.fungible = True
+        self.internal_inventory = {}
+        self.holdings = holdings
+        self.row = row
+        self.inventory = holdings.row_view(row)
+        self.changed = True
+
+    def is_fungible(self, item_name):
+        return self.fungible and item_name not in self.non_fungible
 
     def add_item(self, item):
-        if item.name not in self.internal_inventory:
-            self.internal_inventory[item.name] = deque()
-        self.internal_inventory[item.name].append(item)
-        self.inventory[item.name] = len(self.internal_inventory[item.name])
+        self.changed = True
+        if self.is_fungible(item.name):
+            self.inventory[item.name] = self.inventory.get(item.name, 0) + 1
+        else:
+            if item.name not in self.internal_inventory:
+                self.internal_inventory[item.name] = deque()
+            self.internal_inventory[item.name].append(item)
+            self.inventory[item.name] = len(self.internal_inventory[item.name])
 
         # Record the addition in deltas
         self.deltas.append(("add", item.name, item.id))
 
     def reset(self):
         """Reset the current inventory to the starting inventory."""
+        self.changed = True
+        self.deltas.clear()
+        if self.holdings is not None:
+            self.holdings.reset_row(self.row)
+            return
         self.internal_inventory = {}
         self.inventory = {}
-        for item_name, quantity in self.starting_inventory.items():
-            self.internal_inventory[item_name] = deque([Item(item_name) for _ in range(quantity)])
-            self.inventory[item_name] = quantity
+        self._fill(self.starting_inventory)
         self.deltas.clear()  # Clear the deltas
 
     def set_starting_inventory(self, starting_inventory):
         """Set the starting inventory for the agent."""
         self.starting_inventory = starting_inventory.copy()  # Store a copy of the starting inventory
-        for item_name, quantity in starting_inventory.items():
-            self.internal_inventory[item_name] = deque([Item(item_name) for _ in range(quantity)])
+        if self.holdings is not None:
+            self.holdings.set_starting_row(self.row, starting_inventory)
+        self._fill(starting_inventory)
+
+    def _fill(self, quantities):
+        self.changed = True
+        for item_name, quantity in quantities.items():
+            if not self.is_fungible(item_name):
+                self.internal_inventory[item_name] = deque([Item(item_name) for _ in range(quantity)])
             self.inventory[item_name] = quantity
 
     def remove_item(self, item_name):
+        self.changed = True
+        if self.is_fungible(item_name):
+            if self.inventory.get(item_name, 0) > 0:
+                self.inventory[item_name] -= 1
+                removed_item = Item(item_name)
+                self.deltas.append(("remove", item_name, removed_item.id))
+                return removed_item
+            return None
         if item_name in self.internal_inventory and self.internal_inventory[item_name]:
             removed_item = self.internal_inventory[item_name].popleft()
             self.inventory[item_name] = len(self.internal_inventory[item_name])
@@ -44,6 +94,52 @@ class Inventory:
             return removed_item
         return None
 
+    def transfer(self, to_inventory, item_name, quantity):
+        """
+        Move quantity units of a good to another inventory in one operation.
+        Nothing is moved if this inventory holds fewer than quantity units. Each side records one aggregated
+        delta, ("transfer_out", item_name, quantity) and ("transfer_in", item_name, quantity).
+        """
+        if quantity <= 0 or self.get_quantity(item_name) < quantity:
+            return False
+
+        self.move(to_inventory, item_name, quantity)
+        self.deltas.append(("transfer_out", item_name, quantity))
+        to_inventory.deltas.append(("transfer_in", item_name, quantity))
+        return True
+
+    def move(self, to_inventory, item_name, quantity, reverse=False):
+        """
+        Move quantity units of a good to another inventory without checking holdings or recording deltas.
+        Used by transfer and by the ledger, which journals the postings itself. With reverse=True the units
+        are taken from the back of this inventory and put at the front of the other one, which undoes an
+        earlier move in the opposite direction.
+        """
+        self.changed = True
+        to_inventory.changed = True
+        if self.is_fungible(item_name):
+            self.inventory[item_name] -= quantity
+            items = None
+        else:
+            source = self.internal_inventory[item_name]
+            take = source.pop if reverse else source.popleft
+            items = [take() for _ in range(quantity)]
+            self.inventory[item_name] = len(source)
+
+        if to_inventory.is_fungible(item_name):
+            to_inventory.inventory[item_name] = to_inventory.inventory.get(item_name, 0) + quantity
+        else:
+            if item_name not in to_inventory.internal_inventory:
+                to_inventory.internal_inventory[item_name] = deque()
+            destination = to_inventory.internal_inventory[item_name]
+            if items is None:
+                items = [Item(item_name) for _ in range(quantity)]
+            if reverse:
+                destination.extendleft(items)
+            else:
+                destination.extend(items)
+            to_inventory.inventory[item_name] = len(destination)
+
     def get_recent_deltas(self, num_deltas=1):
         """Retrieve the most recent changes (deltas) to the inventory."""
         return self.deltas[-num_deltas:]
@@ -52,11 +148,15 @@ class Inventory:
         """Reconstruct a past inventory state using deltas."""
         past_state = dict(self.inventory)
         for step in reversed(self.deltas[-steps_back:]):
-            action, item_name, item_id = step
+            action, item_name, value = step
             if action == "add":
                 past_state[item_name] -= 1
             elif action == "remove":
                 past_state[item_name] += 1
+            elif action == "transfer_in":
+                past_state[item_name] -= value
+            elif action == "transfer_out":
+                past_state[item_name] += value
         return past_state
 
     def get_quantity(self, item_name):
@@ -68,6 +168,10 @@ class Inventory:
 
     def __setitem__(self, item_name, item):
         """Mimics dictionary set behavior. Assumes item is an instance of the Item class."""
+        self.changed = True
+        if self.is_fungible(item_name):
+            self.inventory[item_name] = self.inventory.get(item_name, 0) + 1
+            return
         if item_name not in self.internal_inventory:
             self.internal_inventory[item_name] = deque()
         self.internal_inventory[item_name].append(item)
@@ -75,7 +179,11 @@ class Inventory:
 
     def __delitem__(self, item_name):
         """Mimics dictionary delete behavior."""
-        if item_name in self.internal_inventory:
+        self.changed = True
+        if self.is_fungible(item_name):
+            if self.inventory.get(item_name, 0) > 0:
+                self.inventory[item_name] -= 1
+        elif item_name in self.internal_inventory:
             self.internal_inventory[item_name].popleft()
             self.inventory[item_name] = len(self.internal_inventory[item_name])
 
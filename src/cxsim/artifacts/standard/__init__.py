@@ -1,3 +1,5 @@
 from .dialogue import Dialogue
 from .gridworld import Gridworld
 from .marketplace import Marketplace
+from .pathfinding import PathFinder
+from .trade_tape import TradeTape
@@ -1,8 +1,12 @@
 from cxsim.artifacts.artifact import Artifact
+from cxsim.artifacts.standard.pathfinding import PathFinder
 from cxsim.agents.actions.action import Action
 from cxsim.environment.database.cx_data_types import CxDataType
-from typing import Dict, List
-import random
+from typing import Dict, List, Tuple
+import heapq
+import math
+
+import numpy as np
 
 
 class Move(Action):
@@ -18,7 +22,42 @@ class Move(Action):
     direction: str = None
 
 
+class CellAttribute:
+    """
+    Attribute of a Block that appears in to_item. A block that belongs to a Gridworld cell reads and writes it
+    in the arrays of the gridworld, which marks the cell dirty, a free block keeps it in itself.
+    """
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, block, owner=None):
+        if block is None:
+            return self
+        gridworld = block.__dict__.get("_gridworld")
+        if gridworld is not None:
+            x, y = block.__dict__["_cell"]
+            return gridworld.get_cell(x, y, self.name)
+        try:
+            return block.__dict__["_values"][self.name]
+        except KeyError:
+            raise AttributeError(f"'{type(block).__name__}' object has no attribute '{self.name}'") from None
+
+    def __set__(self, block, value):
+        gridworld = block.__dict__.get("_gridworld")
+        if gridworld is not None:
+            x, y = block.__dict__["_cell"]
+            gridworld.set_cell(x, y, self.name, value)
+        else:
+            block.__dict__.setdefault("_values", {})[self.name] = value
+
+
 class Block:
+    name = CellAttribute("name")
+    color = CellAttribute("color")
+    can_occupy = CellAttribute("can_occupy")
+    is_goal = CellAttribute("is_goal")
+    content = CellAttribute("content")
+
     def __init__(self, name: str, color: tuple = (0, 0, 0), can_occupy: bool = True, is_goal: bool = False, x_pos: int = 0, y_pos: int = 0):
         self.name = name
         self.color = color
@@ -75,16 +114,195 @@ class Block:
         )
 
 
+class GridColumn:
+    """Column x of a Gridworld, column[y] materializes the Block of a cell."""
+    __slots__ = ("gridworld", "x")
+
+    def __init__(self, gridworld, x: int):
+        self.gridworld = gridworld
+        self.x = x
+
+    def __getitem__(self, y):
+        return self.gridworld.block_at(self.x, range(self.gridworld.y_size)[y])
+
+    def __setitem__(self, y, block):
+        self.gridworld.replace_block(self.x, range(self.gridworld.y_size)[y], block)
+
+    def __len__(self):
+        return self.gridworld.y_size
+
+    def __iter__(self):
+        return (self.gridworld.block_at(self.x, y) for y in range(self.gridworld.y_size))
+
+
+class GridView:
+    """List of columns view of a Gridworld, so grid[x][y] keeps working without a Block object per cell."""
+    __slots__ = ("gridworld",)
+
+    def __init__(self, gridworld):
+        self.gridworld = gridworld
+
+    def __getitem__(self, x):
+        return GridColumn(self.gridworld, range(self.gridworld.x_size)[x])
+
+    def __len__(self):
+        return self.gridworld.x_size
+
+    def __iter__(self):
+        return (GridColumn(self.gridworld, x) for x in range(self.gridworld.x_size))
+
+
+class SpatialIndex:
+    """
+    Uniform bucket grid over agent positions. Every agent id is kept in the bucket of bucket_size x bucket_size
+    cells its position falls in, so a query only looks at the agents in the buckets it overlaps.
+    """
+
+    def __init__(self, bucket_size: int = 8):
+        self.bucket_size = bucket_size
+        self.buckets: Dict[tuple, set] = {}
+        self.positions: Dict[int, tuple] = {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _bucket(self, x: int, y: int) -> tuple:
+        return x // self.bucket_size, y // self.bucket_size
+
+    def add(self, agent_id: int, x: int, y: int):
+        self.remove(agent_id)
+        self.positions[agent_id] = (x, y)
+        self.buckets.setdefault(self._bucket(x, y), set()).add(agent_id)
+
+    def remove(self, agent_id: int):
+        position = self.positions.pop(agent_id, None)
+        if position is None:
+            return
+        bucket = self._bucket(*position)
+        self.buckets[bucket].discard(agent_id)
+        if not self.buckets[bucket]:
+            del self.buckets[bucket]
+
+    def move_many(self, agent_ids: List[int], xs: List[int], ys: List[int]):
+        """Moves agents that are in the index, only those that change bucket are moved between buckets."""
+        size = self.bucket_size
+        for agent_id, x, y in zip(agent_ids, xs, ys):
+            old_x, old_y = self.positions[agent_id]
+            self.positions[agent_id] = (x, y)
+            old_bucket = (old_x // size, old_y // size)
+            new_bucket = (x // size, y // size)
+            if old_bucket != new_bucket:
+                self.buckets[old_bucket].discard(agent_id)
+                if not self.buckets[old_bucket]:
+                    del self.buckets[old_bucket]
+                self.buckets.setdefault(new_bucket, set()).add(agent_id)
+
+    def in_rect(self, x_min: int, y_min: int, x_max: int, y_max: int) -> List[int]:
+        """Ids of the agents with x_min <= x <= x_max and y_min <= y <= y_max."""
+        bx_min, by_min = self._bucket(x_min, y_min)
+        bx_max, by_max = self._bucket(x_max, y_max)
+        ids = []
+        if (bx_max - bx_min + 1) * (by_max - by_min + 1) > len(self.buckets):
+            # the rectangle spans more buckets than are in use, look at the used ones only
+            buckets = (ids for (bx, by), ids in self.buckets.items() if bx_min <= bx <= bx_max and by_min <= by <= by_max)
+        else:
+            buckets = (self.buckets.get((bx, by), ()) for bx in range(bx_min, bx_max + 1) for by in range(by_min, by_max + 1))
+        for bucket in buckets:
+            for agent_id in bucket:
+                x, y = self.positions[agent_id]
+                if x_min <= x <= x_max and y_min <= y <= y_max:
+                    ids.append(agent_id)
+        return ids
+
+    @staticmethod
+    def _ring(center_x: int, center_y: int, ring: int):
+        """The buckets at Chebyshev distance ring from the center bucket."""
+        if ring == 0:
+            yield center_x, center_y
+            return
+        for bx in range(center_x - ring, center_x + ring + 1):
+            yield bx, center_y - ring
+            yield bx, center_y + ring
+        for by in range(center_y - ring + 1, center_y + ring):
+            yield center_x - ring, by
+            yield center_x + ring, by
+
+    def nearest(self, x: int, y: int, k: int, exclude: int = None) -> List[Tuple[float, int]]:
+        """
+        The k closest agent ids as (distance, id) pairs, closest first. Rings of buckets around the bucket of
+        (x, y) are searched outwards until the ring is further away than the k-th closest agent found so far.
+        """
+        if k <= 0 or not self.positions:
+            return []
+        center_x, center_y = self._bucket(x, y)
+        found = []
+        seen = 0
+        ring = 0
+        while seen < len(self.positions):
+            # every agent in this ring or further out is further away than this
+            if len(found) >= k and found[k - 1][0] <= (ring - 1) * self.bucket_size:
+                break
+            for bucket_key in self._ring(center_x, center_y, ring):
+                bucket = self.buckets.get(bucket_key, ())
+                seen += len(bucket)
+                for agent_id in bucket:
+                    if agent_id == exclude:
+                        continue
+                    other_x, other_y = self.positions[agent_id]
+                    found.append((math.hypot(other_x - x, other_y - y), agent_id))
+            found = heapq.nsmallest(k, found)
+            ring += 1
+        return found
+
+
+MOVE_MODES = ("sequential", "simultaneous")
+
+# cell offsets (dx, dy) of the Move directions, indexed by direction code
+DIRECTIONS = {"up": 0, "down": 1, "right": 2, "left": 3}
+DIRECTION_OFFSETS = np.array([(0, 1), (0, -1), (1, 0), (-1, 0)], dtype=np.int64)
+
+# random free cells place_agent tries before it searches the whole grid for a cell with enough space
+PLACEMENT_ATTEMPTS = 64
+
+# when more than one in this many cells change at once, the free cell index is rebuilt instead of updated
+FREE_INDEX_REBUILD_RATIO = 64
+
+# two digit hex strings of every byte, for formatting colors of many cells at once
+HEX_BYTES = np.array([f"{i:02x}" for i in range(256)])
+
+
+def is_agent(content) -> bool:
+    return isinstance(getattr(content, "id", None), int) and hasattr(content, "inventory")
+
+
 class Gridworld(Artifact):
     """The Gridworld artifact represents a two-dimensional, square grid environment, often used in reinforcement learning and AI simulations. The grid is a spatio-temporal world where each cell or block is identified using a coordinate system. The origin, (0, 0), is located at the bottom-left corner of the grid. Additionally, you cannot move into the same position as another agent."""
 
     def __init__(
             self,
             x_size: int = 0,
-            y_size: int = 0
+            y_size: int = 0,
+            moves: str = "sequential",
+            seed: int = None
     ):
+        """
+        moves: "sequential" applies every Move as it arrives, "simultaneous" queues the Moves of a step and
+        resolves them all at once in step().
+        seed: Seed of agent placement and of the tie-break between agents moving into the same cell. If None,
+        the gridworld draws from the environment's generators.
+        """
         super(Gridworld, self).__init__("Gridworld")
 
+        if moves not in MOVE_MODES:
+            raise ValueError(f"moves must be one of {list(MOVE_MODES)}, got '{moves}'")
+        self.moves = moves
+        self.seed = seed
+        self.move_rng = np.random.default_rng(seed)
+        # draws the cells agents are placed on
+        self.rng = np.random.default_rng(seed)
+        # agent id -> direction code of the Move queued for the next step() in simultaneous mode
+        self.pending_moves: Dict[int, int] = {}
+
         self.size_factor = 5
 
         self.x_size: int = x_size
@@ -97,90 +315,335 @@ class Gridworld(Artifact):
         if self.y_size == 0:
             self.y_size = 15
 
-        self.grid: List[List[Block]] = self.create_grid()
+        self.grid: GridView = self.create_grid()
 
         self.action_space.append(Move)
 
         self.agent_position_map: Dict[str, tuple] = {}
 
     def step(self):
-        pass
+        if self.moves == "simultaneous":
+            self.resolve_moves()
 
     def compile(self, environment):
-        for agent in environment.agents:
-            self.place_agent(agent)
+        if self.seed is None:
+            self.rng = environment.np_rng
+            if environment.seed is not None:
+                self.move_rng = np.random.default_rng(environment.seed)
+        self.place_agents(environment.agents)
+
+    def create_grid(self) -> GridView:
+        """
+        Sets up an empty grid. Cells are stored as one NumPy array per attribute, indexed [x, y]:
+        passable (can_occupy), goals (is_goal), colors (RGB), occupied (content is not None) and agent_ids, the id
+        of the agent in a cell or -1.
+        Cells with a name other than 'Empty', a non RGB color or content other than an agent are kept in
+        dicts by cell, and Block subclasses put in the grid in custom_blocks.
+        """
+        shape = (self.x_size, self.y_size)
+        self.passable = np.ones(shape, dtype=bool)
+        self.goals = np.zeros(shape, dtype=bool)
+        self.colors = np.full(shape + (3,), 255, dtype=np.uint8)
+        self.occupied = np.zeros(shape, dtype=bool)
+        self.agent_ids = np.full(shape, -1, dtype=np.int32)
+        self.agent_lookup = {}
+        self.names = {}
+        self.contents = {}
+        self.custom_colors = {}
+        self.custom_blocks = {}
+
+        # passable, unoccupied cells as flat indices x * y_size + y, built on the first placement
+        self.free_cells: np.ndarray = None
+        self.free_slots: np.ndarray = None
+        self.n_free = 0
+
+        # agent ids by position for the spatial queries, kept up to date by set_cell
+        self.spatial_index = SpatialIndex()
+
+        # counts changes to passability, goals and non-agent content, the pathfinder drops its caches when it changes
+        self.terrain_version = 0
+        self.pathfinder = PathFinder(self)
+
+        # cells that changed since the last sync, see pop_dirty_blocks
+        self.dirty_cells = set()
+        self._all_dirty = True
+        return GridView(self)
+
+    def get_cell(self, x: int, y: int, attribute: str):
+        if attribute == "content":
+            agent_id = self.agent_ids[x, y]
+            if agent_id >= 0:
+                return self.agent_lookup[int(agent_id)]
+            return self.contents.get((x, y))
+        if attribute == "can_occupy":
+            return bool(self.passable[x, y])
+        if attribute == "is_goal":
+            return bool(self.goals[x, y])
+        if attribute == "color":
+            if (x, y) in self.custom_colors:
+                return self.custom_colors[(x, y)]
+            return tuple(int(channel) for channel in self.colors[x, y])
+        if attribute == "name":
+            return self.names.get((x, y), "Empty")
+        raise KeyError(f"Unknown cell attribute {attribute}")
+
+    def set_cell(self, x: int, y: int, attribute: str, value):
+        cell = (x, y)
+        if attribute == "content":
+            if cell in self.contents or (value is not None and not is_agent(value)):
+                self.terrain_version += 1
+            self.contents.pop(cell, None)
+            previous_id = int(self.agent_ids[x, y])
+            if previous_id >= 0 and self.spatial_index.positions.get(previous_id) == cell:
+                self.spatial_index.remove(previous_id)
+            self.agent_ids[x, y] = -1
+            if is_agent(value):
+                self.agent_ids[x, y] = value.id
+                self.agent_lookup[value.id] = value
+                self.spatial_index.add(value.id, x, y)
+            elif value is not None:
+                self.contents[cell] = value
+            self.occupied[x, y] = value is not None
+            self._update_free_cell(x, y)
+        elif attribute == "can_occupy":
+            if self.passable[x, y] != value:
+                self.terrain_version += 1
+            self.passable[x, y] = value
+            self._update_free_cell(x, y)
+        elif attribute == "is_goal":
+            if self.goals[x, y] != value:
+                self.terrain_version += 1
+            self.goals[x, y] = value
+        elif attribute == "color":
+            if isinstance(value, tuple) and len(value) == 3:
+                self.colors[x, y] = value
+                self.custom_colors.pop(cell, None)
+            else:
+                self.custom_colors[cell] = value
+        elif attribute == "name":
+            if value == "Empty":
+                self.names.pop(cell, None)
+            else:
+                self.names[cell] = value
+        else:
+            raise KeyError(f"Unknown cell attribute {attribute}")
+        self.dirty_cells.add(cell)
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        return bool(self.occupied[x, y])
+
+    def _build_free_index(self):
+        free = np.flatnonzero(self.passable & ~self.occupied).astype(np.int32)
+        self.free_cells = np.empty(self.x_size * self.y_size, dtype=np.int32)
+        self.free_cells[:len(free)] = free
+        self.free_slots = np.full(self.x_size * self.y_size, -1, dtype=np.int32)
+        self.free_slots[free] = np.arange(len(free), dtype=np.int32)
+        self.n_free = len(free)
+
+    def _update_free_cell(self, x: int, y: int):
+        if self.free_cells is None:
+            return
+        flat = x * self.y_size + y
+        slot = self.free_slots[flat]
+        is_free = self.passable[x, y] and not self.occupied[x, y]
+        if is_free and slot < 0:
+            self.free_cells[self.n_free] = flat
+            self.free_slots[flat] = self.n_free
+            self.n_free += 1
+        elif not is_free and slot >= 0:
+            # swap the last free cell into the slot of this one
+            self.n_free -= 1
+            last = self.free_cells[self.n_free]
+            self.free_cells[slot] = last
+            self.free_slots[last] = slot
+            self.free_slots[flat] = -1
+
+    def random_free_cell(self):
+        """Returns a random passable, unoccupied cell in constant time, or None if there is none."""
+        if self.free_cells is None:
+            self._build_free_index()
+        if self.n_free == 0:
+            return None
+        return divmod(int(self.free_cells[self.rng.integers(self.n_free)]), self.y_size)
+
+    def is_clear(self, x: int, y: int, spacing: int = 1) -> bool:
+        """Whether a cell and every cell within spacing of it is passable and unoccupied."""
+        window = (slice(max(0, x - spacing), x + spacing + 1), slice(max(0, y - spacing), y + spacing + 1))
+        return bool(self.passable[window].all() and not self.occupied[window].any())
+
+    def clear_cells(self, spacing: int = 1) -> np.ndarray:
+        """
+        Returns the flat indices x * y_size + y of every cell for which is_clear holds, by counting the blocked
+        cells in the window around every cell with a summed-area table.
+        """
+        blocked = np.pad(~self.passable | self.occupied, spacing).astype(np.int32)
+        sums = np.zeros((blocked.shape[0] + 1, blocked.shape[1] + 1), dtype=np.int32)
+        sums[1:, 1:] = blocked.cumsum(axis=0).cumsum(axis=1)
+        width = 2 * spacing + 1
+        window_sums = sums[width:, width:] - sums[:-width, width:] - sums[width:, :-width] + sums[:-width, :-width]
+        return np.flatnonzero(window_sums == 0)
+
+    def _put_agent(self, agent, x: int, y: int):
+        # Directly set the agent in the grid using __setitem__
+        self[x, y] = agent
+
+        # Update the agent_position_map with the new position
+        self.agent_position_map[agent.name] = (x, y)
+        agent.mark_dirty()
+
+    def block_at(self, x: int, y: int) -> Block:
+        """Returns the Block of a cell, reads and writes of its attributes go to the grid."""
+        if (x, y) in self.custom_blocks:
+            return self.custom_blocks[(x, y)]
+        block = Block.__new__(Block)
+        self._bind(block, x, y)
+        return block
+
+    def _bind(self, block: Block, x: int, y: int):
+        block.__dict__["_gridworld"] = self
+        block.__dict__["_cell"] = (x, y)
+        block.x_pos = x
+        block.y_pos = y
+
+    def mark_all_dirty(self):
+        self.dirty_cells = set()
+        self._all_dirty = True
+
+    def pop_dirty_blocks(self) -> list:
+        """Returns the to_item representation of every cell that changed since the last call."""
+        if self._all_dirty:
+            items = self.get_blocks()
+        else:
+            cells = list(self.dirty_cells)
+            items = self._cell_items(np.array([x for x, _ in cells], dtype=np.int64), np.array([y for _, y in cells], dtype=np.int64))
+        self.dirty_cells = set()
+        self._all_dirty = False
+        return items
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """Copies of the cell arrays."""
+        return {
+            "passable": self.passable.copy(),
+            "goals": self.goals.copy(),
+            "colors": self.colors.copy(),
+            "agent_ids": self.agent_ids.copy()
+        }
 
-    def create_grid(self):
-        return [[Block(name='Empty', x_pos=x, y_pos=y, color=(255, 255, 255)) for y in range(self.y_size)] for x in range(self.x_size)]
+    def _cell_items(self, xs: np.ndarray, ys: np.ndarray) -> list:
+        """The to_item representations of the cells (xs[i], ys[i]), formatted for all cells at once."""
+        if len(xs) == 0:
+            return []
+        rgb = self.colors[xs, ys]
+        colors = np.char.add(np.char.add(np.char.add("#", HEX_BYTES[rgb[:, 0]]), HEX_BYTES[rgb[:, 1]]), HEX_BYTES[rgb[:, 2]]).astype(object)
+        contents = np.full(len(xs), "Empty", dtype=object)
+
+        agent_ids = self.agent_ids[xs, ys]
+        for i in np.flatnonzero(agent_ids >= 0):
+            contents[i] = str(self.agent_lookup[int(agent_ids[i])])
+        if self.contents or self.custom_colors:
+            for i, cell in enumerate(zip(xs.tolist(), ys.tolist())):
+                if cell in self.contents and self.contents[cell]:
+                    contents[i] = str(self.contents[cell])
+                if cell in self.custom_colors:
+                    colors[i] = self.custom_colors[cell]
+
+        return [
+            {"position": f"({x}, {y})", "color": color, "content": content, "can_occupy": can_occupy, "is_goal": is_goal}
+            for x, y, color, content, can_occupy, is_goal in zip(
+                xs.tolist(), ys.tolist(), colors.tolist(), contents.tolist(),
+                self.passable[xs, ys].tolist(), self.goals[xs, ys].tolist()
+            )
+        ]
 
     def place_agent(self, agent, spacing: int = 1, verbose: bool = False):
-        # Generate all possible positions
-        all_positions = [(x, y) for x in range(self.x_size) for y in range(self.y_size)]
-        if verbose:
-            print(f"Generated all possible positions: {all_positions}")
+        """
+        Places an agent on a random cell with no agent or impassable cell within spacing of it. Random free cells
+        are tried first, on a crowded grid every cell with enough space is searched, so placement only fails if
+        there is no such cell.
+        """
+        for _ in range(PLACEMENT_ATTEMPTS):
+            cell = self.random_free_cell()
+            if cell is None:
+                break
+            if self.is_clear(*cell, spacing):
+                break
+        else:
+            cell = None
 
-        # Shuffle the list of positions to ensure randomness
-        random.shuffle(all_positions)
-        if verbose:
-            print(f"Shuffled positions: {all_positions}")
+        if cell is None:
+            candidates = self.clear_cells(spacing)
+            if len(candidates) > 0:
+                cell = divmod(int(candidates[self.rng.integers(len(candidates))]), self.y_size)
 
-        while all_positions:
-            # Pop a random position from the list
-            x_pos, y_pos = all_positions.pop()
+        if cell is None:
             if verbose:
-                print(f"Trying position: {(x_pos, y_pos)}")
+                print("Unable to assign a valid position for the agent with the specified spacing.")
+            raise ValueError("Unable to assign a valid position for the agent with the specified spacing.")
 
-            # Check if the current position can be occupied
-            if not self.grid[x_pos][y_pos].can_occupy:
-                if verbose:
-                    print(f"Position {(x_pos, y_pos)} cannot be occupied. Skipping.")
+        self._put_agent(agent, *cell)
+        if verbose:
+            print(f"Placed agent at: {cell}")
+
+    def place_agents(self, agents, spacing: int = 1):
+        """
+        Places many agents, such as a whole Population, at once. Cells with enough space are found in one pass
+        over the grid and visited in random order, each placed agent blocks the cells within spacing of it.
+        Random order packs a crowded grid loosely, so if it runs out of room the agents are spread over the
+        densest lattice of cells spacing + 1 apart instead. Either every agent is placed or, if even the lattice
+        has no room for them, none is.
+        """
+        agents = list(agents)
+        if not agents:
+            return
+
+        candidates = self.clear_cells(spacing)
+        taken = np.zeros((self.x_size, self.y_size), dtype=bool)
+        cells = []
+        for flat in self.rng.permutation(candidates).tolist():
+            x, y = divmod(flat, self.y_size)
+            if taken[x, y]:
                 continue
+            taken[max(0, x - spacing):x + spacing + 1, max(0, y - spacing):y + spacing + 1] = True
+            cells.append((x, y))
+            if len(cells) == len(agents):
+                break
+        else:
+            cells = self._lattice_cells(candidates, spacing, len(agents))
 
-            # Generate a list of neighboring positions within 'spacing'
-            neighbors = [
-                (x, y)
-                for x in range(max(0, x_pos - spacing), min(self.x_size, x_pos + spacing + 1))
-                for y in range(max(0, y_pos - spacing), min(self.y_size, y_pos + spacing + 1))
-                if (x, y) != (x_pos, y_pos)  # Exclude the position itself
-            ]
-            if verbose:
-                print(f"Generated neighboring positions for spacing {spacing}: {neighbors}")
-
-            # Check if any neighbor positions are already occupied by other agents or cannot be occupied
-            if not any(not self.grid[x][y].can_occupy or self.grid[x][y].content for x, y in neighbors):
-                # Directly set the agent in the grid using __setitem__
-                self[x_pos, y_pos] = agent
+        for agent, (x, y) in zip(agents, cells):
+            self._put_agent(agent, x, y)
 
-                # Update the agent_position_map with the new position
-                self.agent_position_map[agent.name] = (x_pos, y_pos)
+    def _lattice_cells(self, candidates: np.ndarray, spacing: int, n: int) -> list:
+        clear = np.zeros(self.x_size * self.y_size, dtype=bool)
+        clear[candidates] = True
+        clear = clear.reshape(self.x_size, self.y_size)
 
-                if verbose:
-                    print(f"Placed agent at: {(x_pos, y_pos)}")
-                return
+        # cells spacing + 1 apart never block each other, pick the offset with the most clear cells
+        step = spacing + 1
+        offsets = [(x_offset, y_offset) for x_offset in range(step) for y_offset in range(step)]
+        x_offset, y_offset = max(offsets, key=lambda offset: int(clear[offset[0]::step, offset[1]::step].sum()))
+        xs, ys = np.nonzero(clear[x_offset::step, y_offset::step])
+        if len(xs) < n:
+            raise ValueError(f"Unable to place {n} agents with spacing {spacing}, there is only room for {len(xs)}.")
 
-        # If we reach here, no suitable position was found
-        if verbose:
-            print("Unable to assign a valid position for the agent with the specified spacing.")
-        raise ValueError("Unable to assign a valid position for the agent with the specified spacing.")
+        chosen = self.rng.choice(len(xs), size=n, replace=False)
+        return list(zip((xs[chosen] * step + x_offset).tolist(), (ys[chosen] * step + y_offset).tolist()))
 
     def display(self):
         # Determine the width of each cell based on the content length plus padding
         cell_width = 7  # Adjust this based on the maximum expected content length
 
-        # Top border of the grid
-        display_str = ""
+        labels = np.full((self.x_size, self.y_size), "_____", dtype="<U5")
+        for x, y in zip(*np.nonzero(self.agent_ids >= 0)):
+            labels[x, y] = str(self.agent_lookup[int(self.agent_ids[x, y])])[:5]
+        for (x, y), content in self.contents.items():
+            if content:
+                labels[x, y] = str(content)[:5]
+        # Pad each label so every cell has the same width
+        labels = np.char.center(labels, cell_width - 2)
 
-        for y in range(self.y_size):  # Iterate from top to bottom
-            row_str = "|"
-            for x in range(self.x_size):  # Iterate from left to right
-                block = self.grid[x][y]
-                block_str = str(block)
-                # Pad the block string to ensure it fits the cell width uniformly
-                block_str_padded = block_str.center(cell_width - 2)  # Adjust padding based on the cell width
-                row_str += f"{block_str_padded}|"  # Append each block's representation within cell borders
-            display_str += row_str + "\n"
-
-        return display_str
+        # One line per y, from top to bottom, with the cells from left to right within borders
+        return "".join("|" + "|".join(labels[:, y].tolist()) + "|\n" for y in range(self.y_size))
 
     def process_action(self, agent, action):
         verbose = False
@@ -193,34 +656,38 @@ class Gridworld(Artifact):
                 print("Invalid action type.")
             return "Invalid action type."
 
+        if self.moves == "simultaneous":
+            return self.queue_move(agent, action)
+
         # Calculate the potential new position based on the action
-        new_x_pos, new_y_pos = agent.x_pos, agent.y_pos
-        if action.direction == "up" and agent.y_pos < self.y_size - 1:
+        x_pos, y_pos = self.agent_position_map[agent.name]
+        new_x_pos, new_y_pos = x_pos, y_pos
+        if action.direction == "up" and y_pos < self.y_size - 1:
             new_y_pos += 1
-        elif action.direction == "down" and agent.y_pos > 0:
+        elif action.direction == "down" and y_pos > 0:
             new_y_pos -= 1
-        elif action.direction == "right" and agent.x_pos < self.x_size - 1:
+        elif action.direction == "right" and x_pos < self.x_size - 1:
             new_x_pos += 1
-        elif action.direction == "left" and agent.x_pos > 0:
+        elif action.direction == "left" and x_pos > 0:
             new_x_pos -= 1
 
         if verbose:
             print(f"New position attempt: ({new_x_pos}, {new_y_pos})")
 
         # Check if the new position is within grid bounds
-        if not (0 < new_x_pos <= self.x_size and 0 < new_y_pos <= self.y_size):
+        if not (0 <= new_x_pos < self.x_size and 0 <= new_y_pos < self.y_size):
             if verbose:
                 print("Move out of grid bounds.")
             return "Move out of grid bounds."
 
         # Check for collisions with other agents using the Block's content
-        if self.grid[new_x_pos][new_y_pos].content is not None:
+        if self.is_occupied(new_x_pos, new_y_pos):
             if verbose:
                 print("Move interferes with another agent!")
             return "Move interferes with another agent!"
 
         # Check for collisions with other agents using the Block's content
-        if not self.grid[new_x_pos][new_y_pos].can_occupy:
+        if not self.passable[new_x_pos, new_y_pos]:
             if verbose:
                 print("Block is not passable!")
             return "Move interferes with another agent!"
@@ -229,14 +696,112 @@ class Gridworld(Artifact):
             print(f"Move successful. {agent.name} moved to ({new_x_pos}, {new_y_pos})")
 
         # Update the agent's position in the grid and the agent_position_map
-        self.grid[agent.x_pos][agent.y_pos].content = None
-        self.grid[new_x_pos][new_y_pos].content = agent
+        self.set_cell(x_pos, y_pos, "content", None)
+        self.set_cell(new_x_pos, new_y_pos, "content", agent)
         self.agent_position_map[agent.name] = (new_x_pos, new_y_pos)
 
-        return f"Your current position is now: {(agent.x_pos, agent.y_pos)}"
+        return f"Your current position is now: {(new_x_pos, new_y_pos)}"
+
+    def queue_move(self, agent, action: Move):
+        """Queues a Move for the next step(), a later Move of the same agent replaces it."""
+        if action.direction not in DIRECTIONS:
+            return f"Invalid direction: {action.direction}"
+        if agent.id not in self.spatial_index.positions:
+            return "Agent is not on the grid."
+        self.pending_moves[agent.id] = DIRECTIONS[action.direction]
+        return "Move queued, it is applied at the end of the step."
+
+    def resolve_moves(self) -> Dict[int, tuple]:
+        """
+        Applies every queued Move at once and returns the new position of each agent that moved, by agent id.
+
+        A Move fails if it leaves the grid or its target is impassable or holds something other than an agent.
+        Of the agents moving into the same cell one wins, drawn with move_rng. Two agents swapping cells both
+        fail, since they would pass through each other. An agent whose Move fails stays where it is, so the
+        agents moving into its cell fail too. Agents moving around a cycle of three or more cells all move.
+        """
+        if not self.pending_moves:
+            return {}
+        ids = np.fromiter(self.pending_moves.keys(), dtype=np.int64, count=len(self.pending_moves))
+        directions = np.fromiter(self.pending_moves.values(), dtype=np.int64, count=len(self.pending_moves))
+        self.pending_moves = {}
+        positions = self.spatial_index.positions
+        xs = np.fromiter((positions[agent_id][0] for agent_id in ids.tolist()), dtype=np.int64, count=len(ids))
+        ys = np.fromiter((positions[agent_id][1] for agent_id in ids.tolist()), dtype=np.int64, count=len(ids))
+
+        target_xs = xs + DIRECTION_OFFSETS[directions, 0]
+        target_ys = ys + DIRECTION_OFFSETS[directions, 1]
+        inside = (target_xs >= 0) & (target_xs < self.x_size) & (target_ys >= 0) & (target_ys < self.y_size)
+        target_xs = np.where(inside, target_xs, xs)
+        target_ys = np.where(inside, target_ys, ys)
+        sources = xs * self.y_size + ys
+        targets = target_xs * self.y_size + target_ys
+
+        # cells with something other than an agent, or impassable ones, cannot be entered
+        occupants = self.agent_ids[target_xs, target_ys]
+        moves = inside & self.passable[target_xs, target_ys] & ((occupants >= 0) | ~self.occupied[target_xs, target_ys])
+
+        # one random winner per target cell, the first of its cell in a shuffled order
+        priority = self.move_rng.permutation(len(ids))
+        order = np.lexsort((priority, targets))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = targets[order[1:]] != targets[order[:-1]]
+        winner = np.zeros(len(ids), dtype=bool)
+        winner[order[first]] = True
+        moves &= winner
+
+        # the mover index of the agent in the target cell, -1 if it is empty or its agent does not move
+        mover_of = np.full(int(max(ids.max(), self.agent_ids.max())) + 1, -1, dtype=np.int64)
+        mover_of[ids] = np.arange(len(ids))
+        occupant_movers = np.where(occupants >= 0, mover_of[np.maximum(occupants, 0)], -1)
+        moves &= (occupants < 0) | (occupant_movers >= 0)
+        swaps = (occupant_movers >= 0) & (targets[np.maximum(occupant_movers, 0)] == sources)
+        moves &= ~swaps
+
+        # agents that stay block the movers into their cells, which then stay as well
+        mover_into = np.full(self.x_size * self.y_size, -1, dtype=np.int64)
+        mover_into[targets[moves]] = np.flatnonzero(moves)
+        frontier = np.flatnonzero(~moves)
+        while len(frontier) > 0:
+            blocked = mover_into[sources[frontier]]
+            blocked = blocked[blocked >= 0]
+            blocked = blocked[moves[blocked]]
+            moves[blocked] = False
+            frontier = blocked
+
+        return self._apply_moves(ids[moves], xs[moves], ys[moves], target_xs[moves], target_ys[moves])
+
+    def _apply_moves(self, ids, xs, ys, target_xs, target_ys) -> Dict[int, tuple]:
+        """Moves agents to their target cells in one pass, every source cell is cleared before any is filled."""
+        self.agent_ids[xs, ys] = -1
+        self.occupied[xs, ys] = False
+        self.agent_ids[target_xs, target_ys] = ids
+        self.occupied[target_xs, target_ys] = True
+
+        id_list, target_x_list, target_y_list = ids.tolist(), target_xs.tolist(), target_ys.tolist()
+        self.spatial_index.move_many(id_list, target_x_list, target_y_list)
+        targets = list(zip(target_x_list, target_y_list))
+        for agent_id, target in zip(id_list, targets):
+            agent = self.agent_lookup[agent_id]
+            self.agent_position_map[agent.name] = target
+            agent.mark_dirty()
+        self.dirty_cells.update(zip(xs.tolist(), ys.tolist()))
+        self.dirty_cells.update(targets)
+
+        if self.free_cells is not None:
+            # only the ends of chains of agents change between free and occupied
+            sources = xs * self.y_size + ys
+            targets_flat = target_xs * self.y_size + target_ys
+            changed = np.concatenate((np.setdiff1d(sources, targets_flat), np.setdiff1d(targets_flat, sources)))
+            if len(changed) * FREE_INDEX_REBUILD_RATIO > self.x_size * self.y_size:
+                self._build_free_index()
+            else:
+                for x, y in zip(*divmod(changed, self.y_size)):
+                    self._update_free_cell(int(x), int(y))
+        return dict(zip(id_list, targets))
 
     def reset(self, environment):
-        pass
+        self.pending_moves = {}
 
     def get_agent_position(self, agent_name):
         """Retrieve the position of an agent by their name."""
@@ -245,12 +810,72 @@ class Gridworld(Artifact):
         else:
             return None
 
+    def agents_in_radius(self, position: tuple, radius: float, exclude=None) -> list:
+        """Returns the agents within euclidean distance radius of position, closest first. exclude is an agent to leave out, usually the one asking."""
+        x, y = position
+        reach = int(radius)
+        exclude_id = getattr(exclude, "id", None)
+        found = []
+        for agent_id in self.spatial_index.in_rect(x - reach, y - reach, x + reach, y + reach):
+            if agent_id == exclude_id:
+                continue
+            other_x, other_y = self.spatial_index.positions[agent_id]
+            distance = math.hypot(other_x - x, other_y - y)
+            if distance <= radius:
+                found.append((distance, agent_id))
+        found.sort()
+        return [self.agent_lookup[agent_id] for _, agent_id in found]
+
+    def nearest_agents(self, position: tuple, k: int = 1, exclude=None) -> list:
+        """Returns the k agents closest to position, closest first, ties broken by agent id."""
+        found = self.spatial_index.nearest(*position, k, exclude=getattr(exclude, "id", None))
+        return [self.agent_lookup[agent_id] for _, agent_id in found]
+
+    def agents_in_rect(self, position_from: tuple, position_to: tuple) -> list:
+        """Returns the agents inside the rectangle with corners position_from and position_to, both included, ordered by position."""
+        (x_from, y_from), (x_to, y_to) = position_from, position_to
+        ids = self.spatial_index.in_rect(min(x_from, x_to), min(y_from, y_to), max(x_from, x_to), max(y_from, y_to))
+        ids.sort(key=self.spatial_index.positions.__getitem__)
+        return [self.agent_lookup[agent_id] for agent_id in ids]
+
+    def line_of_sight(self, position_from: tuple, position_to: tuple) -> bool:
+        """
+        Whether every cell on the straight line between two positions, not counting the end points, is passable.
+        Agents do not block the line, walls and other impassable blocks do.
+        """
+        (x_from, y_from), (x_to, y_to) = position_from, position_to
+        steps = max(abs(x_to - x_from), abs(y_to - y_from))
+        if steps <= 1:
+            return True
+        t = np.arange(1, steps) / steps
+        xs = np.rint(x_from + (x_to - x_from) * t).astype(np.int64)
+        ys = np.rint(y_from + (y_to - y_from) * t).astype(np.int64)
+        return bool(self.passable[xs, ys].all())
+
+    def find_path(self, position_from: tuple, position_to: tuple) -> list:
+        """Returns the cells of a shortest path between two positions around walls and blocks, or None if there is none."""
+        return self.pathfinder.find_path(position_from, position_to)
+
+    def distance_field(self, goals: list = None) -> np.ndarray:
+        """Returns the number of moves from every cell to the closest goal cell, or the closest of goals, -1 where there is no path."""
+        return self.pathfinder.distance_field(goals)
+
+    def next_move(self, agent, goals: list = None):
+        """
+        Returns the Move that takes an agent one step closer to the closest goal cell, or the closest of goals,
+        or None if it is at a goal or cannot reach one. Agents heading to the same goals share one distance field.
+        """
+        position = self.agent_position_map[agent.name]
+        cell = self.pathfinder.next_step(position, goals)
+        if cell is None:
+            return None
+        offset = (cell[0] - position[0], cell[1] - position[1])
+        direction = next(name for name, code in DIRECTIONS.items() if tuple(DIRECTION_OFFSETS[code].tolist()) == offset)
+        return Move(direction=direction)
+
     def get_blocks(self):
-        blocks_list = []
-        for row in self.grid:  # Iterate through each row in the grid
-            for block in row:  # Iterate through each block in the row
-                blocks_list.append(block.to_item)  # Use the to_item property from Block class
-        return blocks_list
+        xs, ys = np.meshgrid(np.arange(self.x_size), np.arange(self.y_size), indexing="ij")
+        return self._cell_items(xs.ravel(), ys.ravel())
 
     def add_wall(self, position_from, position_to, block: Block = None):
         if block is None:
@@ -268,32 +893,43 @@ class Gridworld(Artifact):
         # Determine the direction of the wall
         if x_from == x_to:
             # Vertical wall
-            for y in range(min(y_from, y_to), max(y_from, y_to) + 1):
-                self.grid[x_from][y].name = "Wall"
-                self.grid[x_from][y].content = "Wall"
-                self.grid[x_from][y].can_occupy = False
-                self.grid[x_from][y].color = (128, 128, 128)
+            cells = [(x_from, y) for y in range(min(y_from, y_to), max(y_from, y_to) + 1)]
         elif y_from == y_to:
             # Horizontal wall
-            for x in range(min(x_from, x_to), max(x_from, x_to) + 1):
-                self.grid[x][y_from].content = "Wall"
-                self.grid[x][y_from].name = "Wall"
-                self.grid[x][y_from].can_occupy = False
-                self.grid[x][y_from].color = (128, 128, 128)
+            cells = [(x, y_from) for x in range(min(x_from, x_to), max(x_from, x_to) + 1)]
         else:
             raise ValueError("Invalid wall positions. The wall must be either vertical or horizontal.")
 
+        for x, y in cells:
+            self.set_cell(x, y, "name", block.name)
+            self.set_cell(x, y, "content", block.name)
+            self.set_cell(x, y, "can_occupy", block.can_occupy)
+            self.set_cell(x, y, "color", block.color)
+
     def replace_block(self, x, y, new_block: Block):
+        # a Block subclass put here before is detached from the grid with the values of its cell
+        replaced_block = self.custom_blocks.pop((x, y), None)
+        if replaced_block is not None:
+            values = {name: self.get_cell(x, y, name) for name in ("name", "color", "can_occupy", "is_goal", "content")}
+            del replaced_block.__dict__["_gridworld"]
+            replaced_block.__dict__["_values"] = values
+
         new_block.x_pos = x
         new_block.y_pos = y
-        self.grid[x][y] = new_block
+        for name in ("name", "color", "can_occupy", "is_goal", "content"):
+            self.set_cell(x, y, name, getattr(new_block, name))
+
+        # plain blocks only hold cell attributes, subclasses are kept for their behavior
+        if type(new_block) is not Block:
+            self.custom_blocks[(x, y)] = new_block
+            self._bind(new_block, x, y)
 
     def __getitem__(self, key):
         """Get the block at the specified grid position."""
         x, y = key  # Extract x, y coordinates from the key
-        return self.grid[x][y].content
+        return self.get_cell(x, y, "content")
 
     def __setitem__(self, key, value):
         """Set the item at grid position specified by key."""
         x, y = key
-        self.grid[x][y].content = value
+        self.set_cell(x, y, "content", value)
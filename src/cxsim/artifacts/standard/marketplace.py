@@ -1,9 +1,14 @@
 from typing import Dict
 from typing import Union
+from collections import deque
 from dataclasses import dataclass, field, fields
+import heapq
+
+import numpy as np
 
 from cxsim.agents.agent import Agent
 from cxsim.artifacts.artifact import Artifact
+from cxsim.artifacts.standard.trade_tape import TradeTape
 from cxsim.environment.event import Event
 
 
@@ -61,6 +66,9 @@ class InternalOrder:
         return False
 
 
+CLEARING_MODES = ("continuous", "call")
+
+
 # The OrderBook class represents the order book in a market
 class OrderBook:
     """
@@ -74,21 +82,32 @@ class OrderBook:
     lowest_offer_order: Order with the lowest offer.
     order_count: Counts the total number of orders.
     num_transactions: Counts the total number of transactions.
-    history: A DataFrame to store history of transactions.
+    history: TradeTape holding the columnar history of transactions.
+    agent_orders: Resting orders indexed by the agent that placed them.
+    committed_capital: Capital each agent has committed to resting buy orders.
+    committed_quantity: Quantity of the good each agent has committed to resting sell orders.
+    clearing: "continuous" matches orders as they arrive, "call" queues them and clears once per step.
+    pending_orders: Orders queued for the next call auction, one per agent.
+    clearing_price_history: Uniform price of every call auction that traded.
     """
-    def __init__(self, product_name: str, environment, market_depth: int = 2):
+    def __init__(self, product_name: str, environment, market_depth: int = 2, clearing: str = "continuous"):
+        if clearing not in CLEARING_MODES:
+            raise ValueError(f"clearing must be one of {list(CLEARING_MODES)}, got '{clearing}'")
         self.product_name = product_name
         self.environment = environment
         self.market_depth = market_depth
-        # Initialize lists to hold buy and sell orders
-        self.sell_orders = []
-        self.buy_orders = []
+        self.clearing = clearing
+        self.pending_orders: Dict[Agent, InternalOrder] = {}
+        self.clearing_price_history = []
+        # Initialize the containers that hold buy and sell orders
+        self._clear_orders()
+        self._clear_agent_index()
         self.highest_bid_order = None
         self.lowest_offer_order = None
         self.order_count = 0
         self.num_transactions = 0
-        # store transaction history in a pandas DataFrame for easy data manipulation and analysis
-        self.history = []
+        # store transaction history in columnar arrays, export with history.to_pandas() for analysis
+        self.history = TradeTape()
 
         self.best_bid_history = []
         self.best_ask_history = []
@@ -99,30 +118,126 @@ class OrderBook:
 
     def reset(self):
         # Clear orders
-        self.sell_orders = []
-        self.buy_orders = []
+        self._clear_orders()
+        self._clear_agent_index()
         # Reset bid/offer orders
         self.highest_bid_order = None
         self.lowest_offer_order = None
         # Reset counters
         self.order_count = 0
         self.num_transactions = 0
-        # Reset history DataFrame
+        # Reset transaction history
         self.history.clear()
+        self.pending_orders.clear()
+        self.clearing_price_history.clear()
+
+    def _clear_orders(self):
+        self.sell_orders = []
+        self.buy_orders = []
+
+    def _store_order(self, order: InternalOrder, is_buy_order: bool):
+        if is_buy_order:
+            self.buy_orders.append(order)
+        else:
+            self.sell_orders.append(order)
+
+    def _unstore_order(self, order: InternalOrder, is_buy_order: bool):
+        if is_buy_order:
+            self.buy_orders.remove(order)
+        else:
+            self.sell_orders.remove(order)
+
+    def _clear_agent_index(self):
+        self.agent_orders: Dict[Agent, list] = {}
+        self.committed_capital: Dict[Agent, int] = {}
+        self.committed_quantity: Dict[Agent, int] = {}
+
+    def _commit(self, order: InternalOrder, quantity: int):
+        """Add (or, with a negative quantity, release) the resources an agent has tied up in a resting order."""
+        if order.quantity > 0:
+            self.committed_capital[order.agent] = self.committed_capital.get(order.agent, 0) + order.price * quantity
+        else:
+            self.committed_quantity[order.agent] = self.committed_quantity.get(order.agent, 0) + quantity
+
+    def _rest_order(self, order: InternalOrder, is_buy_order: bool):
+        """Place an order in the book without matching it."""
+        self._store_order(order, is_buy_order)
+        self.agent_orders.setdefault(order.agent, []).append(order)
+        self._commit(order, abs(order.quantity))
+
+    def _remove_order(self, order: InternalOrder, is_buy_order: bool):
+        """Remove a resting order from the book."""
+        self._unstore_order(order, is_buy_order)
+        orders = self.agent_orders[order.agent]
+        orders.remove(order)
+        if not orders:
+            del self.agent_orders[order.agent]
+        self._commit(order, -abs(order.quantity))
+
+    def _reduce_order(self, order: InternalOrder, quantity: int):
+        """Partially fill a resting order by `quantity` units."""
+        self._commit(order, -quantity)
+        order.quantity -= quantity if order.quantity > 0 else -quantity
+
+    def _agent_side_orders(self, agent, is_buy_order: bool) -> list:
+        return [o for o in self.agent_orders.get(agent, ()) if (o.quantity > 0) == is_buy_order]
+
+    def _has_order(self, order: InternalOrder, is_buy_order: bool) -> bool:
+        return order in (self.buy_orders if is_buy_order else self.sell_orders)
+
+    def _remove_agent_orders(self, agent):
+        for order in self.agent_orders.get(agent, ())[:]:
+            self._remove_order(order, order.quantity > 0)
+
+    def _check_best_orders(self):
+        if self.buy_orders and self.highest_bid_order:
+            assert self.highest_bid_order == self.buy_orders[0], "highest_bid_order is not consistent with sorted buy_orders."
+        if self.sell_orders and self.lowest_offer_order:
+            assert self.lowest_offer_order == self.sell_orders[0], "lowest_offer_order is not consistent with sorted sell_orders."
+
+    def _best_order(self, is_buy_order: bool):
+        """The order at the front of one side of the book, or None if that side is empty."""
+        orders = self.buy_orders if is_buy_order else self.sell_orders
+        return orders[0] if orders else None
 
     def _can_order_be_executed(self, order: InternalOrder, is_buy_order: bool) -> bool:
+        """
+        Match an incoming order against the opposite side of the book, walking it level by level until the
+        order is filled or no longer crosses. Returns True if at least one fill happened.
+        """
         if not isinstance(order, InternalOrder):
             raise TypeError("order should be of type <InternalOrder>")
-        # no matching order exists in the order book
-        if (is_buy_order and len(self.sell_orders) == 0) or (not is_buy_order and len(self.buy_orders) == 0):
-            return False
-        # orders exist in order book
-        else:
-            if is_buy_order and (order.price >= self.lowest_offer_order.price):
-                return self.execute(order, self.lowest_offer_order)
-            if not is_buy_order and (order.price <= self.highest_bid_order.price):
-                return self.execute(order, self.highest_bid_order)
-        return False
+
+        was_executed = False
+        while order.quantity != 0:
+            book_order = self._best_order(not is_buy_order)
+            # no matching order exists in the order book
+            if book_order is None:
+                break
+            if is_buy_order and order.price < book_order.price:
+                break
+            if not is_buy_order and order.price > book_order.price:
+                break
+
+            # holdings can change after an order rests, e.g. by trading in another market
+            quantity = min(abs(order.quantity), abs(book_order.quantity))
+            if not self._is_covered(book_order, quantity, book_order.price):
+                self._remove_order(book_order, not is_buy_order)
+                continue
+            if not self._is_covered(order, quantity, book_order.price):
+                break
+            if not self.execute(order, book_order):
+                break
+            was_executed = True
+        return was_executed
+
+    def _is_covered(self, order: InternalOrder, quantity: int, price: int) -> bool:
+        """
+        Whether the agent behind an order still holds what a fill of quantity units at price would take.
+        """
+        if order.quantity > 0:
+            return order.agent.get_inventory("capital") >= price * quantity
+        return order.agent.get_inventory(self.product_name) >= quantity
 
     def is_order_legitimate(self, order: InternalOrder, is_buy_order: bool):
         # If the order quantity is zero, it's invalid
@@ -132,47 +247,14 @@ class OrderBook:
         if order.price <= 0:
             return False
 
-        # Check for an existing order from the same agent in the opposite direction
-        if is_buy_order:
-            existing_order_cost = sum([o.price for o in self.buy_orders if o.agent == order.agent])
-            total_order_cost = order.price + existing_order_cost
-
-            if order.agent.get_inventory("capital") < total_order_cost:
-                return False
-
-            for existing_order in self.sell_orders:
-                if existing_order.agent == order.agent:
-                    # Remove the existing sell order
-                    self.sell_orders.remove(existing_order)
-                    return True
-
-        else:
-            existing_goods_quantity = sum([abs(o.quantity) for o in self.sell_orders if o.agent == order.agent])
-            total_goods_quantity = abs(order.quantity) + existing_goods_quantity
-
-            if order.agent.get_inventory(self.product_name) < total_goods_quantity:
-                return False
-
-            for existing_order in self.buy_orders:
-                if existing_order.agent == order.agent:
-                    # Remove the existing buy order
-                    self.buy_orders.remove(existing_order)
-                    return True
-
+        # The order and the agent's resting orders on the same side must be covered together. add removes the
+        # agent's resting orders first, so there are none unless this is called on its own.
         if is_buy_order:
-            total_buy_value = sum([o.price * o.quantity for o in self.buy_orders if o.agent == order.agent])
-            assert order.agent.get_inventory(
-                "capital") >= total_buy_value, "Agent doesn't have enough capital for all buy orders."
+            total_order_cost = order.price * order.quantity + self.committed_capital.get(order.agent, 0)
+            return order.agent.get_inventory("capital") >= total_order_cost
         else:
-            total_sell_qty = sum([abs(o.quantity) for o in self.sell_orders if o.agent == order.agent])
-            assert order.agent.get_inventory(
-                self.product_name) >= total_sell_qty, "Agent doesn't have enough inventory for all sell orders."
-
-        # Usual legitimacy checks
-        if is_buy_order:
-            return order.agent.get_inventory("capital") >= order.price
-        else:
-            return order.agent.get_inventory(self.product_name) >= abs(order.quantity)
+            total_goods_quantity = abs(order.quantity) + self.committed_quantity.get(order.agent, 0)
+            return order.agent.get_inventory(self.product_name) >= total_goods_quantity
 
     def update_best_orders(self):
         if len(self.buy_orders) != 0:
@@ -188,8 +270,7 @@ class OrderBook:
             self.lowest_offer_order = None
 
     def should_remove_existing_order(self, order: InternalOrder):
-        self.sell_orders = [o for o in self.sell_orders if o.agent != order.agent]
-        self.buy_orders = [o for o in self.buy_orders if o.agent != order.agent]
+        self._remove_agent_orders(order.agent)
 
         self.update_best_orders()
 
@@ -198,11 +279,15 @@ class OrderBook:
         order.id = self.order_count
         self.order_count += 1
 
+        if self.clearing == "call":
+            self._queue_order(order)
+            return
+
         # check if agent has enough capital or quantity of good to make the order
         is_buy_order = True if order.quantity >= 0 else False
 
-        existing_buy_orders = [o for o in self.buy_orders if o.agent == order.agent]
-        existing_sell_orders = [o for o in self.sell_orders if o.agent == order.agent]
+        existing_buy_orders = self._agent_side_orders(order.agent, is_buy_order=True)
+        existing_sell_orders = self._agent_side_orders(order.agent, is_buy_order=False)
         assert not (existing_buy_orders and existing_sell_orders), "Agent has orders on both sides of the market."
         self.should_remove_existing_order(order)
 
@@ -210,23 +295,20 @@ class OrderBook:
 
         if order_is_legitimate:
             # if order can be executed immediately, do it
-            order_was_executed = self._can_order_be_executed(order, is_buy_order)
+            self._can_order_be_executed(order, is_buy_order)
 
-            if not order_was_executed:
+            # park whatever part of the order was not filled
+            if order.quantity != 0:
                 if is_buy_order:
                     assert order.quantity > 0, "Buy order with non-positive quantity detected."
-                    self.buy_orders.append(order)
                 else:
                     assert order.quantity < 0, "Sell order with non-negative quantity detected."
-                    self.sell_orders.append(order)
+                self._rest_order(order, is_buy_order)
 
             self.update_best_orders()
 
             # At the end of the 'add' method, after updating 'highest_bid_order' and 'lowest_offer_order'
-            if self.buy_orders and self.highest_bid_order:
-                assert self.highest_bid_order == self.buy_orders[0], "highest_bid_order is not consistent with sorted buy_orders."
-            if self.sell_orders and self.lowest_offer_order:
-                assert self.lowest_offer_order == self.sell_orders[0], "lowest_offer_order is not consistent with sorted sell_orders."
+            self._check_best_orders()
 
         if self.highest_bid_order:
             self.best_bid_history.append(self.highest_bid_order.price)
@@ -248,37 +330,23 @@ class OrderBook:
         transaction_quantity = min(abs(incoming_order.quantity), abs(book_order.quantity))
 
         if is_incoming_buy_order:
-            self.environment.item_handler.trade(
-                incoming_order.agent,
+            buyer, seller = incoming_order.agent, book_order.agent
+            traded = self.environment.item_handler.trade(
+                buyer,
                 ("capital", transaction_price),
-                book_order.agent,
+                seller,
                 (self.product_name, transaction_quantity)
             )
-            self.event_history.append(
-                MarketPlaceTransaction(
-                    buyer_agent=incoming_order.agent,
-                    seller_agent=book_order.agent,
-                    good=self.product_name,
-                    quantity=transaction_quantity,
-                    price=transaction_price,
-                )
-            )
         else:
-            self.environment.item_handler.trade(
-                incoming_order.agent,
+            buyer, seller = book_order.agent, incoming_order.agent
+            traded = self.environment.item_handler.trade(
+                seller,
                 (self.product_name, transaction_quantity),
-                book_order.agent,
+                buyer,
                 ("capital", transaction_price),
             )
-            self.event_history.append(
-                MarketPlaceTransaction(
-                    buyer_agent=book_order.agent,
-                    seller_agent=incoming_order.agent,
-                    good=self.product_name,
-                    quantity=transaction_quantity,
-                    price=transaction_price,
-                )
-            )
+        if not traded:
+            return False
 
         # Adjust unmatched parts of the orders for the incoming order
         if abs(incoming_order.quantity) > transaction_quantity:
@@ -286,42 +354,121 @@ class OrderBook:
             incoming_order.quantity -= transaction_quantity if is_incoming_buy_order else -transaction_quantity
         else:
             # If the incoming order was fully matched or exceeded
-            if is_incoming_buy_order:
-                if incoming_order in self.buy_orders:
-                    self.buy_orders.remove(incoming_order)
-            else:
-                if incoming_order in self.sell_orders:
-                    self.sell_orders.remove(incoming_order)
+            incoming_order.quantity = 0
+            if self._has_order(incoming_order, is_incoming_buy_order):
+                self._remove_order(incoming_order, is_incoming_buy_order)
 
         # Adjust unmatched parts of the orders for the book order
         if abs(book_order.quantity) > transaction_quantity:
             # If the book order was not fully matched
-            book_order.quantity -= transaction_quantity if book_order.quantity > 0 else -transaction_quantity
+            self._reduce_order(book_order, transaction_quantity)
         else:
             # If the book order was fully matched
-            if book_order.quantity > 0:
-                self.buy_orders.remove(book_order)
-            else:
-                self.sell_orders.remove(book_order)
+            self._remove_order(book_order, book_order.quantity > 0)
+
+        self._record_transaction(buyer, seller, transaction_price, transaction_quantity)
 
-        # Update history and transaction counter
-        self.history.append({
-                "transaction_id": [self.num_transactions],
-                "price": [transaction_price],
-                "quantity": [transaction_quantity],
-                "buyer": [incoming_order.agent.name if is_incoming_buy_order else book_order.agent.name],
-                "seller": [incoming_order.agent.name if not is_incoming_buy_order else book_order.agent.name]
-            })
+        assert not self._has_order(incoming_order, True), "Executed buy order still present in buy_orders."
+        assert not self._has_order(incoming_order, False), "Executed sell order still present in sell_orders."
+        return True
 
+    def _record_transaction(self, buyer, seller, price: int, quantity: int):
+        self.event_history.append(
+            MarketPlaceTransaction(
+                buyer_agent=buyer,
+                seller_agent=seller,
+                good=self.product_name,
+                quantity=quantity,
+                price=price,
+            )
+        )
+        self.history.append(
+            transaction_id=self.num_transactions,
+            step=self.environment.current_step,
+            price=price,
+            quantity=quantity,
+            buyer_id=buyer.id,
+            seller_id=seller.id
+        )
         self.num_transactions += 1
 
-        assert incoming_order not in self.buy_orders, "Executed buy order still present in buy_orders."
-        assert incoming_order not in self.sell_orders, "Executed sell order still present in sell_orders."
-        self.update_best_orders()
+    def _queue_order(self, order: InternalOrder):
+        """
+        Queue an order for the next call auction. A new order replaces the agent's queued order, and the
+        replacement loses its time priority.
+        """
+        self.pending_orders.pop(order.agent, None)
+        if order.quantity == 0 or order.price <= 0:
+            return False
+        if order.quantity > 0 and order.agent.get_inventory("capital") < order.price * order.quantity:
+            return False
+        if order.quantity < 0 and order.agent.get_inventory(self.product_name) < -order.quantity:
+            return False
+        self.pending_orders[order.agent] = order
         return True
 
+    def clear_call_auction(self):
+        """
+        Clears all queued orders at a single uniform price and returns that price, or None if nothing traded.
+
+        The clearing price maximizes the traded volume. Ties are broken by the smallest imbalance between
+        demand and supply, then by the middle of the remaining price range. Fills are allocated in price-time
+        priority and orders left unfilled expire.
+        """
+        orders = list(self.pending_orders.values())
+        self.pending_orders.clear()
+
+        prices = np.fromiter((order.price for order in orders), dtype=np.int64, count=len(orders))
+        quantities = np.fromiter((order.quantity for order in orders), dtype=np.int64, count=len(orders))
+        bids = np.flatnonzero(quantities > 0)
+        asks = np.flatnonzero(quantities < 0)
+        if len(bids) == 0 or len(asks) == 0:
+            return None
+
+        # stable sorts keep time priority within a price
+        bids = bids[np.argsort(-prices[bids], kind="stable")]
+        asks = asks[np.argsort(prices[asks], kind="stable")]
+        bid_prices, bid_quantities = prices[bids], quantities[bids]
+        ask_prices, ask_quantities = prices[asks], -quantities[asks]
+        cumulative_bids = np.concatenate(([0], np.cumsum(bid_quantities)))
+        cumulative_asks = np.concatenate(([0], np.cumsum(ask_quantities)))
+
+        # demand at a price is every bid at or above it, supply is every ask at or below it
+        candidates = np.unique(prices)
+        demand = cumulative_bids[np.searchsorted(-bid_prices, -candidates, side="right")]
+        supply = cumulative_asks[np.searchsorted(ask_prices, candidates, side="right")]
+        volume = np.minimum(demand, supply)
+        max_volume = volume.max()
+        if max_volume == 0:
+            return None
+
+        imbalance = np.abs(demand - supply)
+        best = volume == max_volume
+        best &= imbalance == imbalance[best].min()
+        best_prices = candidates[best]
+        price = int((best_prices[0] + best_prices[-1]) // 2)
+
+        # fill each side in priority order, then pair buyers and sellers at every fill boundary
+        bid_fills = np.cumsum(np.clip(max_volume - cumulative_bids[:-1], 0, bid_quantities))
+        ask_fills = np.cumsum(np.clip(max_volume - cumulative_asks[:-1], 0, ask_quantities))
+        ends = np.union1d(bid_fills, ask_fills)
+        ends = ends[ends > 0]
+        starts = np.concatenate(([0], ends[:-1]))
+        buyers = bids[np.searchsorted(bid_fills, starts, side="right")]
+        sellers = asks[np.searchsorted(ask_fills, starts, side="right")]
+
+        for buyer_index, seller_index, quantity in zip(buyers, sellers, ends - starts):
+            buyer, seller = orders[buyer_index].agent, orders[seller_index].agent
+            # an agent may have spent its holdings in another market since queueing the order
+            if self.environment.item_handler.trade(buyer, ("capital", price), seller, (self.product_name, int(quantity))):
+                self._record_transaction(buyer, seller, price, int(quantity))
+
+        self.clearing_price_history.append(price)
+        return price
+
     def step(self):
-        pass
+        if self.clearing == "call":
+            self.clear_call_auction()
 
     def get_full_orderbook(self):
         return [(order.price, order.quantity) for order in self.buy_orders] + [(order.price, order.quantity) for order in self.sell_orders]
@@ -347,10 +494,87 @@ Buy orders
 {new_line.join(map(str, buy_order_list))}
 ===================================
 Last 5 transactions:
-{self.history[::-5]}
+(price, quantity)
+{new_line.join(map(str, zip(self.history.prices[-5:].tolist(), self.history.quantities[-5:].tolist())))}
 """
 
 
+class PriceLevelOrderBook(OrderBook):
+    """
+    Order book that keeps resting orders in FIFO queues keyed by price level.
+
+    The best price of each side is tracked with a heap, so resting an order costs O(log n) and the best bid/offer
+    is available without re-sorting the book. Orders are matched in the same price-time priority as
+    :class:`OrderBook`, so both books produce identical fills.
+
+    Attributes:
+    buy_orders: List of all current buy orders, best price first (built on access).
+    sell_orders: List of all current sell orders, best price first (built on access).
+    """
+    def _clear_orders(self):
+        # price -> deque of orders; every price in a levels dict is in the matching heap exactly once
+        self._bid_levels: Dict[int, deque] = {}
+        self._ask_levels: Dict[int, deque] = {}
+        # bids are stored negated so both heaps are min-heaps
+        self._bid_prices = []
+        self._ask_prices = []
+
+    @property
+    def buy_orders(self):
+        return [order for price in sorted(self._bid_levels, reverse=True) for order in self._bid_levels[price]]
+
+    @property
+    def sell_orders(self):
+        return [order for price in sorted(self._ask_levels) for order in self._ask_levels[price]]
+
+    def _side(self, is_buy_order: bool):
+        if is_buy_order:
+            return self._bid_levels, self._bid_prices, -1
+        return self._ask_levels, self._ask_prices, 1
+
+    def _store_order(self, order: InternalOrder, is_buy_order: bool):
+        levels, prices, sign = self._side(is_buy_order)
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = deque()
+            heapq.heappush(prices, sign * order.price)
+        level.append(order)
+
+    def _unstore_order(self, order: InternalOrder, is_buy_order: bool):
+        levels, _, _ = self._side(is_buy_order)
+        # empty levels are left in place and discarded lazily when they reach the top of the heap
+        levels[order.price].remove(order)
+
+    def _has_order(self, order: InternalOrder, is_buy_order: bool) -> bool:
+        levels, _, _ = self._side(is_buy_order)
+        return order in levels.get(order.price, ())
+
+    def _best_order(self, is_buy_order: bool):
+        levels, prices, sign = self._side(is_buy_order)
+        while prices:
+            level = levels[sign * prices[0]]
+            if level:
+                return level[0]
+            del levels[sign * heapq.heappop(prices)]
+        return None
+
+    def _check_best_orders(self):
+        if self.highest_bid_order:
+            assert self.highest_bid_order.price == -self._bid_prices[0], "highest_bid_order is not at the best bid level."
+        if self.lowest_offer_order:
+            assert self.lowest_offer_order.price == self._ask_prices[0], "lowest_offer_order is not at the best offer level."
+
+    def update_best_orders(self):
+        self.highest_bid_order = self._best_order(is_buy_order=True)
+        self.lowest_offer_order = self._best_order(is_buy_order=False)
+
+
+ORDER_BOOK_TYPES = {
+    "list": OrderBook,
+    "price_level": PriceLevelOrderBook
+}
+
+
 class Marketplace(Artifact):
     """
     The marketplace facilitates transactions between agents in the simulation.
@@ -360,13 +584,23 @@ class Marketplace(Artifact):
             allow_multiple_orders: bool = False,
             product_names = None,
             infer_goods_from_agents:  bool = True,
-            market_depth: int = 5
+            market_depth: int = 5,
+            order_book_type: str = "list",
+            clearing: str = "continuous"
     ):
         super(Marketplace, self).__init__("Marketplace")
         self.infer_goods_from_agents = infer_goods_from_agents
         self.markets: Dict[str, OrderBook] = {}
         self.market_depth = market_depth
 
+        if order_book_type not in ORDER_BOOK_TYPES:
+            raise ValueError(f"order_book_type must be one of {list(ORDER_BOOK_TYPES.keys())}, got '{order_book_type}'")
+        self.order_book_type = order_book_type
+
+        if clearing not in CLEARING_MODES:
+            raise ValueError(f"clearing must be one of {list(CLEARING_MODES)}, got '{clearing}'")
+        self.clearing = clearing
+
         if product_names:
             self.market_names = product_names
         else:
@@ -414,7 +648,9 @@ class Marketplace(Artifact):
                         self.market_names.append(good)
 
         for market_name in self.market_names:
-            self.markets[market_name] = OrderBook(market_name, environment, self.market_depth)
+            self.markets[market_name] = ORDER_BOOK_TYPES[self.order_book_type](
+                market_name, environment, self.market_depth, clearing=self.clearing
+            )
 
     def reset(self, environment):
         for market in self.markets.values():
@@ -0,0 +1,175 @@
+from typing import Dict, List, Optional, Tuple
+import heapq
+
+import numpy as np
+
+
+# paths kept by find_path before the oldest are dropped
+MAX_CACHED_PATHS = 4096
+
+# distance fields kept by distance_field before the oldest are dropped
+MAX_CACHED_FIELDS = 64
+
+
+class PathFinder:
+    """
+    Path planning over the cells of a Gridworld that an agent can move into: passable cells without content
+    other than an agent. Agents do not block paths, they move.
+
+    find_path runs A* for a single start and goal. distance_field floods the grid once from a set of goals, by
+    default the goal cells, and next_step walks down that field, so any number of agents heading to the same
+    goals share one flood fill. Paths and fields are cached until the terrain_version of the gridworld changes,
+    which happens when walls, blocks or goals change, not when agents move.
+
+    Attributes:
+    gridworld: The Gridworld to plan on.
+    """
+
+    def __init__(self, gridworld):
+        self.gridworld = gridworld
+        self._version = None
+        self._walkable: Optional[np.ndarray] = None
+        self._paths: Dict[tuple, Optional[List[tuple]]] = {}
+        self._fields: Dict[tuple, np.ndarray] = {}
+
+    def _refresh(self):
+        if self._version == self.gridworld.terrain_version:
+            return
+        self._version = self.gridworld.terrain_version
+        self._walkable = None
+        self._paths = {}
+        self._fields = {}
+
+    def walkable(self) -> np.ndarray:
+        """Boolean (x_size, y_size) array of the cells paths can go through."""
+        self._refresh()
+        if self._walkable is None:
+            gridworld = self.gridworld
+            self._walkable = gridworld.passable & ~(gridworld.occupied & (gridworld.agent_ids < 0))
+            self._walkable.setflags(write=False)
+        return self._walkable
+
+    def _neighbors(self, x: int, y: int):
+        if y < self.gridworld.y_size - 1:
+            yield x, y + 1
+        if y > 0:
+            yield x, y - 1
+        if x < self.gridworld.x_size - 1:
+            yield x + 1, y
+        if x > 0:
+            yield x - 1, y
+
+    def find_path(self, start: tuple, goal: tuple) -> Optional[List[tuple]]:
+        """
+        Returns the cells of a shortest path from start to goal, both included, or None if goal cannot be
+        reached. If a distance field to goal is cached the path is read from it, otherwise A* is run.
+        """
+        start, goal = tuple(start), tuple(goal)
+        self._refresh()
+        key = (start, goal)
+        if key in self._paths:
+            return self._paths[key]
+
+        field = self._fields.get((goal,))
+        path = self._walk_field(field, start) if field is not None else self._a_star(start, goal)
+
+        if len(self._paths) >= MAX_CACHED_PATHS:
+            del self._paths[next(iter(self._paths))]
+        self._paths[key] = path
+        return path
+
+    def _a_star(self, start: tuple, goal: tuple) -> Optional[List[tuple]]:
+        walkable = self.walkable()
+        if not walkable[start] or not walkable[goal]:
+            return None
+        goal_x, goal_y = goal
+        came_from = {start: None}
+        costs = {start: 0}
+        # entries are (cost + manhattan distance to goal, insertion count, cell), the count keeps ties in order
+        count = 0
+        queue = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), count, start)]
+        while queue:
+            _, _, cell = heapq.heappop(queue)
+            if cell == goal:
+                path = []
+                while cell is not None:
+                    path.append(cell)
+                    cell = came_from[cell]
+                return path[::-1]
+            cost = costs[cell] + 1
+            for neighbor in self._neighbors(*cell):
+                if not walkable[neighbor] or costs.get(neighbor, cost + 1) <= cost:
+                    continue
+                costs[neighbor] = cost
+                came_from[neighbor] = cell
+                count += 1
+                heapq.heappush(queue, (cost + abs(neighbor[0] - goal_x) + abs(neighbor[1] - goal_y), count, neighbor))
+        return None
+
+    def distance_field(self, goals: List[tuple] = None) -> np.ndarray:
+        """
+        Returns a read-only int32 (x_size, y_size) array with the number of moves from every cell to the closest
+        of goals, -1 where no goal can be reached. goals defaults to the goal cells of the gridworld.
+        """
+        self._refresh()
+        key = tuple(sorted({tuple(goal) for goal in goals})) if goals is not None else ("goal cells",)
+        if key in self._fields:
+            return self._fields[key]
+
+        if goals is None:
+            sources = np.flatnonzero(self.gridworld.goals)
+        else:
+            sources = np.array([x * self.gridworld.y_size + y for x, y in key], dtype=np.int64)
+        field = self._flood(sources)
+
+        if len(self._fields) >= MAX_CACHED_FIELDS:
+            del self._fields[next(iter(self._fields))]
+        self._fields[key] = field
+        return field
+
+    def _flood(self, sources: np.ndarray) -> np.ndarray:
+        """Breadth-first search from the flat cell indices in sources, one wave of cells at a time."""
+        x_size, y_size = self.gridworld.x_size, self.gridworld.y_size
+        walkable = self.walkable().ravel()
+        distances = np.full(x_size * y_size, -1, dtype=np.int32)
+        distances[sources] = 0
+        frontier = np.unique(sources)
+        distance = 0
+        while len(frontier) > 0:
+            distance += 1
+            xs, ys = np.divmod(frontier, y_size)
+            neighbors = np.concatenate((
+                frontier[ys < y_size - 1] + 1,
+                frontier[ys > 0] - 1,
+                frontier[xs < x_size - 1] + y_size,
+                frontier[xs > 0] - y_size
+            ))
+            neighbors = neighbors[walkable[neighbors] & (distances[neighbors] < 0)]
+            frontier = np.unique(neighbors)
+            distances[frontier] = distance
+        field = distances.reshape(x_size, y_size)
+        field.setflags(write=False)
+        return field
+
+    def next_step(self, start: tuple, goals: List[tuple] = None) -> Optional[Tuple[int, int]]:
+        """
+        Returns the cell to move to from start to get one move closer to the closest of goals, or None if start
+        is a goal or no goal can be reached. goals defaults to the goal cells of the gridworld.
+        """
+        field = self.distance_field(goals)
+        distance = field[tuple(start)]
+        if distance <= 0:
+            return None
+        for neighbor in self._neighbors(*start):
+            if field[neighbor] == distance - 1:
+                return neighbor
+        return None
+
+    def _walk_field(self, field: np.ndarray, start: tuple) -> Optional[List[tuple]]:
+        if field[start] < 0:
+            return None
+        path = [start]
+        while field[path[-1]] > 0:
+            cell = path[-1]
+            path.append(next(neighbor for neighbor in self._neighbors(*cell) if field[neighbor] == field[cell] - 1))
+        return path
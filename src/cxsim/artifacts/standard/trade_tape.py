@@ -0,0 +1,99 @@
+from typing import Dict
+
+import numpy as np
+
+
+class TradeTape:
+    """
+    Columnar, append-only record of the transactions in a market.
+
+    Each column is a preallocated NumPy array that doubles in size when it fills up, so appending a trade
+    does not create any Python objects. Columns are returned as views of the filled part of the arrays.
+
+    Attributes:
+    COLUMNS: Names of the columns, in export order.
+    """
+    COLUMNS = ("transaction_id", "step", "price", "quantity", "buyer_id", "seller_id")
+
+    def __init__(self, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self._size = 0
+        self._columns: Dict[str, np.ndarray] = {name: np.empty(capacity, dtype=np.int64) for name in self.COLUMNS}
+
+    @property
+    def capacity(self) -> int:
+        return len(self._columns["price"])
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self["price"]
+
+    @property
+    def quantities(self) -> np.ndarray:
+        return self["quantity"]
+
+    def _reserve(self, n: int):
+        required = self._size + n
+        if required <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < required:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def append(self, transaction_id: int, step: int, price: int, quantity: int, buyer_id: int, seller_id: int):
+        self._reserve(1)
+        i = self._size
+        self._columns["transaction_id"][i] = transaction_id
+        self._columns["step"][i] = step
+        self._columns["price"][i] = price
+        self._columns["quantity"][i] = quantity
+        self._columns["buyer_id"][i] = buyer_id
+        self._columns["seller_id"][i] = seller_id
+        self._size += 1
+
+    def extend(self, **columns):
+        """
+        Appends many trades at once. Every column must be given as an array-like of the same length.
+        """
+        if set(columns) != set(self.COLUMNS):
+            raise ValueError(f"extend needs exactly the columns {list(self.COLUMNS)}, got {list(columns)}")
+        arrays = {name: np.asarray(values, dtype=np.int64) for name, values in columns.items()}
+        lengths = {len(array) for array in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"all columns must have the same length, got lengths {sorted(lengths)}")
+
+        n = lengths.pop()
+        self._reserve(n)
+        for name, array in arrays.items():
+            self._columns[name][self._size:self._size + n] = array
+        self._size += n
+
+    def clear(self):
+        self._size = 0
+
+    def to_pandas(self):
+        import pandas as pd
+        return pd.DataFrame({name: self[name].copy() for name in self.COLUMNS})
+
+    def to_arrow(self):
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("TradeTape.to_arrow requires pyarrow, install it with 'pip install pyarrow'") from e
+        return pa.table({name: self[name] for name in self.COLUMNS})
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if column not in self._columns:
+            raise KeyError(f"Column {column} is not in {list(self.COLUMNS)}")
+        return self._columns[column][:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"TradeTape(transactions={self._size})"
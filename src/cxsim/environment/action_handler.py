@@ -1,7 +1,17 @@
 from cxsim.artifacts.artifact import Artifact
-from typing import Union, Tuple, Any, Type, List
-from dataclasses import is_dataclass, asdict
-from cxsim.agents.actions.action import Action
+from typing import Union, Tuple, Any, Type, List, Dict, Optional
+from dataclasses import dataclass, is_dataclass, asdict
+from cxsim.agents.actions.action import Action, action_fields
+
+
+@dataclass(frozen=True)
+class ActionDispatch:
+    """
+    Compiled entry of a dispatch table: the action class, the artifact that processes it and its parameter names.
+    """
+    action: type
+    artifact: Optional[Artifact]
+    fields: Tuple[str, ...]
 
 
 class ActionHandler:
@@ -17,6 +27,10 @@ class ActionHandler:
 
         self.action_lookup = {}
 
+        # dispatch tables keyed by the actions of an action space, shared by agents with the same action space
+        self.dispatch_tables: Dict[tuple, Dict[str, ActionDispatch]] = {}
+        self.agent_dispatch_tables = {}
+
         self.agent_lookup = self.environment.agent_name_lookup
 
     def add_artifact(self, artifact: Artifact):
@@ -27,6 +41,26 @@ class ActionHandler:
             self.map_action_to_artifact[action] = artifact.name
             self.action_lookup[action.__name__] = action
 
+    def compile_dispatch_table(self, agent) -> Dict[str, ActionDispatch]:
+        """
+        Builds, or reuses, the table mapping lowercase action names to ActionDispatch entries for the agent's
+        current action space.
+        """
+        key = tuple((artifact_name, tuple(actions)) for artifact_name, actions in agent.action_space.items())
+        if key not in self.dispatch_tables:
+            self.dispatch_tables[key] = {
+                action.__name__.lower(): ActionDispatch(action, self.artifacts.get(artifact_name), action_fields(action))
+                for artifact_name, actions in agent.action_space.items() for action in actions
+            }
+        self.agent_dispatch_tables[agent] = self.dispatch_tables[key]
+        return self.dispatch_tables[key]
+
+    def dispatch_table(self, agent) -> Dict[str, ActionDispatch]:
+        table = self.agent_dispatch_tables.get(agent)
+        if table is None:
+            table = self.compile_dispatch_table(agent)
+        return table
+
     def set_up(self):
         for artifact_name, artifact in self.artifacts.items():
             artifact.set_up()
@@ -44,42 +78,44 @@ class ActionHandler:
                 return True, e
         return False, None
 
-    def process_action(self, agent, action: Action) -> str:
-        if not isinstance(action, Action):
-            return "Invalid input: Action must be a dataclass."
+    def process_action(self, agent, action: Action, dispatch: ActionDispatch = None) -> str:
+        if dispatch is None:
+            if not (isinstance(action, Action) or is_dataclass(action)):
+                return "Invalid input: Action must be a dataclass."
 
-        action_type = type(action)
-        action_log = [self.environment.current_step, None, action.to_dict()]
+            action_type = type(action)
+            if action_type not in self.map_action_to_artifact:
+                return f"Invalid action: {action_type.__name__} is not in the list of available actions."
 
-        if action_type not in self.map_action_to_artifact:
-            return f"Invalid action: {action_type.__name__} is not in the list of available actions."
-
-        artifact_name = self.map_action_to_artifact[action_type]
-        artifact = self.artifacts.get(artifact_name, None)
+            artifact = self.artifacts.get(self.map_action_to_artifact[action_type], None)
+            dispatch = ActionDispatch(action_type, artifact, action_fields(action_type))
 
+        action_type, artifact = dispatch.action, dispatch.artifact
         if artifact is None:
             return f"Invalid artifact: No artifact associated with action {action_type.__name__}."
 
+        action_dict = {"name": action_type.__name__, "parameters": {name: getattr(action, name) for name in dispatch.fields}}
+
         try:
             result = artifact.process_action(agent, action)
         except Exception as e:
             return f"Action processing failed: {e}"
 
-        action_log[1] = artifact_name
+        agent.mark_dirty()
         agent.action_history.append({
                 "step": self.environment.current_step,
-                "artifact_name": artifact_name,
-                "action": action.to_dict()
+                "artifact_name": artifact.name,
+                "action": action_dict
             }
         )
-        self.action_logs.append((agent.name, *action_log))
+        self.action_logs.append((agent.name, self.environment.current_step, artifact.name, action_dict))
 
         if self.environment.use_database:
             self.environment.database["cxactions"].add(
                 step=self.environment.current_step,
                 agent_name=agent.name,
                 action_name=action_type.__name__,
-                action_parameters=action.to_dict()
+                action_parameters=action_dict
             )
 
         return f"Action processed successfully: {result}" if result else "Action processed successfully."
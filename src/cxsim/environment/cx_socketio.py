@@ -1,9 +1,9 @@
 import threading
 import time
 
-from flask import Flask
+from flask import Flask, request
 from flask_socketio import SocketIO, emit
-from typing import Union
+from typing import Union, Dict, Tuple
 import json
 from datetime import datetime
 
@@ -18,6 +18,38 @@ class CustomJSONEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+class NullSocket:
+    """
+    Stand-in for CxSocket in environments without a GUI or database, every sync and emit does nothing.
+    """
+    def sync_agent(self, agent: Agent):
+        pass
+
+    def sync_agents(self, full: bool = False):
+        pass
+
+    def sync_metadata(self, full: bool = False):
+        pass
+
+    def sync_environment(self):
+        pass
+
+    def sync_gridworld(self, full: bool = False):
+        pass
+
+    def emit_table(self, table_name: str):
+        pass
+
+    def upload_all_tables(self):
+        pass
+
+    def send_message(self, message, room: str = None):
+        pass
+
+    def run(self):
+        pass
+
+
 class CxSocket:
     def __init__(
             self,
@@ -41,16 +73,31 @@ class CxSocket:
             self.database = CxDatabase()
             self.database.connect()
 
+        # (database reset count, table version) each connected client has seen, per table
+        self.client_versions: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._clients_lock = threading.Lock()
+
+        # what has been written to the database, so a sync only writes what changed since
+        self._synced_metadata = {}
+        self._synced_reset_count = None
+        # button events sync from the socket thread while the simulation syncs from its own
+        self._sync_lock = threading.RLock()
+
         # Event handlers
         @self.socketio.on('connect')
         def handle_connect():
             print('Socket connected')
+            # a new client has seen nothing yet, so it receives every table in full
+            with self._clients_lock:
+                self.client_versions[request.sid] = {}
             self.sync_environment()
-            self.database["sqlite_master"].emit(self.socketio)
+            self.emit_table("sqlite_master")
 
         @self.socketio.on('disconnect')
         def handle_disconnect():
             print('Socket disconnected')
+            with self._clients_lock:
+                self.client_versions.pop(request.sid, None)
 
         @self.socketio.on('message')
         def handle_message(message):
@@ -64,44 +111,77 @@ class CxSocket:
             # Process the received data here
             self.environment.handle_button_event(content["value"])
 
-    def sync_agent(self, agent: Agent):
-        self.database["cxagents"].upsert(
+    @staticmethod
+    def agent_entry(agent: Agent) -> dict:
+        return dict(
             name=agent.name,
             x_pos=agent.x_pos,
             y_pos=agent.y_pos,
             parameters=agent.params,
-            inventory=agent.inventory.inventory,
+            inventory=dict(agent.inventory.inventory),
             messages=agent.io.text.full_messages,
             past_actions=agent.action_history
         )
-        self.database["cxagents"].emit(self.socketio)
 
-    def sync_environment(self):
-        self.database["cxmetadata"].upsert(key="name", value=self.environment.name)
-        self.database["cxmetadata"].upsert(key="max_steps", value=self.environment.max_steps)
-        self.database["cxmetadata"].upsert(key="max_episodes", value=self.environment.max_episodes)
-        self.database["cxmetadata"].upsert(key="n_artifacts", value=self.environment.n_artifacts)
-        self.database["cxmetadata"].upsert(key="n_agents", value=self.environment.n_agents)
-        self.database["cxmetadata"].upsert(key="x_size", value=self.environment.gridworld.x_size)
-        self.database["cxmetadata"].upsert(key="y_size", value=self.environment.gridworld.y_size)
-        self.database["cxmetadata"].upsert(key="current_episode", value=self.environment.current_episode)
-        self.database["cxmetadata"].upsert(key="current_step", value=self.environment.current_step)
-        self.database["cxmetadata"].upsert(key="current_status", value=self.environment.get_status)
+    def _needs_full_sync(self) -> bool:
+        # resetting the database drops every synced row, so everything has to be written again
+        return self.database.reset_count != self._synced_reset_count
 
+    def sync_agent(self, agent: Agent):
+        with self._sync_lock:
+            if not agent.is_dirty and not self._needs_full_sync():
+                return
+            self.database["cxagents"].upsert(**self.agent_entry(agent))
+            agent.mark_clean()
+            self.emit_table("cxagents")
+
+    def sync_agents(self, full: bool = False):
+        """Writes every agent that changed since it was last synced in one batch."""
+        agents = [agent for agent in self.environment.agents if full or agent.is_dirty]
+        self.database["cxagents"].upsert_many([self.agent_entry(agent) for agent in agents])
+        for agent in agents:
+            agent.mark_clean()
+
+    def sync_metadata(self, full: bool = False):
+        """Writes the metadata keys whose value changed since the last sync in one batch."""
         # Check if agent_queue is not empty before accessing the first element
         next_agent_name = self.environment.agent_queue[0].name if self.environment.agent_queue else "None"
-        self.database["cxmetadata"].upsert(key="next_agent", value=next_agent_name)
-        self.database["cxmetadata"].emit(self.socketio)
-
-        for agent in self.environment.agents:
-            self.sync_agent(agent)
-
-        self.sync_gridworld()
+        metadata = {
+            "name": self.environment.name,
+            "max_steps": self.environment.max_steps,
+            "max_episodes": self.environment.max_episodes,
+            "n_artifacts": self.environment.n_artifacts,
+            "n_agents": self.environment.n_agents,
+            "x_size": self.environment.gridworld.x_size,
+            "y_size": self.environment.gridworld.y_size,
+            "current_episode": self.environment.current_episode,
+            "current_step": self.environment.current_step,
+            "current_status": self.environment.get_status,
+            "next_agent": next_agent_name
+        }
+        changed = {key: value for key, value in metadata.items() if full or key not in self._synced_metadata or self._synced_metadata[key] != value}
+        self.database["cxmetadata"].upsert_many([{"key": key, "value": value} for key, value in changed.items()])
+        self._synced_metadata.update(changed)
 
-        self.upload_all_tables()
-
-    def sync_gridworld(self):
-        block_representation = self.environment.gridworld.get_blocks()
+    def sync_environment(self):
+        """
+        Writes the metadata, agents and gridworld blocks that changed since the last sync, then emits the rows
+        each client has not seen yet.
+        """
+        with self._sync_lock:
+            full = self._needs_full_sync()
+            self.sync_metadata(full)
+            self.sync_agents(full)
+            self.sync_gridworld(full)
+            self._synced_reset_count = self.database.reset_count
+
+            self.upload_all_tables()
+
+    def sync_gridworld(self, full: bool = False):
+        gridworld = self.environment.gridworld
+        if full:
+            gridworld.mark_all_dirty()
+        block_representation = gridworld.pop_dirty_blocks()
 
         entries = [
             {
@@ -116,9 +196,36 @@ class CxSocket:
 
         self.database["cxgridworld"].upsert_many(entries)
 
+    def emit_table(self, table_name: str):
+        """
+        Emits the rows of a table that each connected client has not seen yet. Clients that have seen nothing,
+        or that saw the table before rows were deleted, receive the whole table.
+        """
+        table = self.database[table_name]
+        reset_count = self.database.reset_count
+        latest_version = self.database.table_versions.get(table_name, 0)
+
+        # clients that have seen the same version are sent the same rows
+        with self._clients_lock:
+            groups = {}
+            for sid, versions in self.client_versions.items():
+                seen = versions.get(table_name)
+                since = seen[1] if seen is not None and seen[0] == reset_count else None
+                groups.setdefault(since, []).append(sid)
+
+        for since, sids in groups.items():
+            if since is not None and since >= latest_version:
+                # nothing was written since these clients last received the table
+                continue
+            version = table.emit(self.socketio, since=since, to=sids)
+            with self._clients_lock:
+                for sid in sids:
+                    if sid in self.client_versions:
+                        self.client_versions[sid][table_name] = (reset_count, version)
+
     def upload_all_tables(self):
         for table_str in list(self.database.tables.keys()):
-            self.database[table_str].emit(self.socketio)
+            self.emit_table(table_str)
 
     def send_message(self, message, room: str = None):
         self.socketio.emit(f'data_update', message)
@@ -1,13 +1,65 @@
+import atexit
 import os
+import queue
 import sqlite3
-from typing import Dict, Type, Optional
+import threading
+import time
+from concurrent.futures import Future
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Type, Optional, List, Tuple, Any, Callable
 
 from cxsim.environment.database.cx_table import CxTable  # Ensure CxTable is correctly imported
 from cxsim.environment.database.default_tables import DEFAULT_TABLES
 
+# PRAGMA settings applied to every connection of a performance profile
+DATABASE_PROFILES = {
+    # SQLite defaults: rollback journal and a full sync on every commit
+    "durable": {},
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -65536
+    },
+    # the database lives in memory and is backed up to the file with the SQLite backup API
+    "memory": {
+        "synchronous": "OFF",
+        "cache_size": -65536
+    }
+}
+
 
 class CxDatabase:
-    def __init__(self, db_name: str = "CxDatabase", extension: str = ".db", directory: str = "") -> None:
+    def __init__(
+            self,
+            db_name: str = "CxDatabase",
+            extension: str = ".db",
+            directory: str = "",
+            write_behind: bool = True,
+            buffer_size: int = 1000,
+            threaded: bool = False,
+            max_pending_batches: int = 16,
+            profile: str = "durable",
+            backup_interval: float = 30.0
+    ) -> None:
+        """
+        :param write_behind: Whether inserts and upserts are buffered and written in batches. Buffered rows are
+            written when buffer_size rows are pending, when flush() is called, before a table is read, when the
+            database is closed and when the interpreter exits.
+        :param buffer_size: Number of buffered rows that triggers a flush.
+        :param threaded: Whether a dedicated writer thread owns the connection. Flushed batches are handed to it
+            through a queue, so writing does not block the caller; reads wait for their result.
+        :param max_pending_batches: Size of the writer thread's queue. A flush blocks while the queue is full,
+            other threads can keep adding rows to the buffer in the meantime.
+        :param profile: Performance profile, one of DATABASE_PROFILES. "durable" keeps SQLite's defaults, "fast"
+            uses WAL journaling with synchronous=NORMAL, memory mapping and a larger page cache, and "memory"
+            keeps the database in memory and backs it up to the file.
+        :param backup_interval: Minimum number of seconds between the backups a flush triggers in the "memory"
+            profile. The database is also backed up by backup() and on close.
+        """
+        if profile not in DATABASE_PROFILES:
+            raise ValueError(f"profile must be one of {list(DATABASE_PROFILES.keys())}, got '{profile}'")
         self.db_name: str = db_name + extension
         self.directory: str = directory  # Directory where the database file is stored
         self.file_path: str = os.path.abspath(os.path.join(self.directory, self.db_name))
@@ -15,13 +67,137 @@ class CxDatabase:
         self.cursor: Optional[sqlite3.Cursor] = None
         self.tables: Dict[str, CxTable] = {}  # Assuming CxTable has a 'table_name' attribute
 
+        self.write_behind = write_behind
+        self.buffer_size = buffer_size
+        # pending (query, values) rows per table, kept in the order they were queued
+        self._buffer: Dict[str, List[Tuple[str, Any]]] = {}
+        self._buffered_rows = 0
+        self._buffer_lock = threading.RLock()
+        # held while flushed batches are handed to the connection, so they arrive in the order they left the buffer
+        self._handoff_lock = threading.Lock()
+        # without a writer thread, threads share the connection one call at a time
+        self._connection_lock = threading.RLock()
+
+        # write counter stamped on every inserted or updated row, see CxTable.rows_since
+        self._version = 0
+        self._version_lock = threading.Lock()
+        # latest version written to each table, lets readers skip tables that did not change
+        self.table_versions: Dict[str, int] = {}
+        # bumped whenever rows are deleted, which incremental readers can't see
+        self.reset_count = 0
+
+        self.threaded = threaded
+        self.max_pending_batches = max_pending_batches
+        self._writer: Optional[threading.Thread] = None
+        self._tasks: Optional[queue.Queue] = None
+        self._writer_error: Optional[Exception] = None
+
+        self.profile = profile
+        self.backup_interval = backup_interval
+        self._last_backup = time.monotonic()
+
         self.connect()
         CxTable.db = self  # Assuming CxTable has a 'db' class attribute that needs to be set
         self.close()
 
     def connect(self) -> None:
-        self.conn = sqlite3.connect(self.file_path, check_same_thread=False)  # Changed to use file_path instead of db_name
+        if self.threaded:
+            self._start_writer()
+        else:
+            self.conn = self._open_connection()
+            self.cursor = self.conn.cursor()
+        # buffered rows are written if the interpreter exits before the database is closed
+        atexit.register(self.close)
+
+    def _open_connection(self) -> sqlite3.Connection:
+        if self.profile == "memory":
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+            # start from what was backed up to the file before
+            if os.path.exists(self.file_path):
+                disk = sqlite3.connect(self.file_path)
+                disk.backup(conn)
+                disk.close()
+        else:
+            conn = sqlite3.connect(self.file_path, check_same_thread=False)  # Changed to use file_path instead of db_name
+
+        for pragma, value in DATABASE_PROFILES[self.profile].items():
+            conn.execute(f"PRAGMA {pragma}={value}")
+        return conn
+
+    def backup(self) -> None:
+        """Copies an in-memory database to its file. Does nothing for the file-backed profiles."""
+        if self.profile == "memory":
+            self.run(self._backup_to_disk)
+
+    def _backup_to_disk(self, conn: sqlite3.Connection) -> None:
+        disk = sqlite3.connect(self.file_path)
+        conn.backup(disk)
+        disk.close()
+        self._last_backup = time.monotonic()
+
+    def _start_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        self._writer_error = None
+        self._tasks = queue.Queue(maxsize=self.max_pending_batches)
+        ready = Future()
+        self._writer = threading.Thread(target=self._writer_loop, args=(ready,), name="CxDatabaseWriter", daemon=True)
+        self._writer.start()
+        ready.result()
+
+    def _writer_loop(self, ready: Future) -> None:
+        self.conn = self._open_connection()
         self.cursor = self.conn.cursor()
+        ready.set_result(None)
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            func, future = task
+            try:
+                result = func(self.conn)
+            except Exception as e:
+                # writes nobody waits for report their error on the next call into the database
+                if future is None:
+                    self._writer_error = e
+                else:
+                    future.set_exception(e)
+            else:
+                if future is not None:
+                    future.set_result(result)
+        self.conn.close()
+
+    def _raise_writer_error(self) -> None:
+        if self._writer_error is not None:
+            error, self._writer_error = self._writer_error, None
+            raise error
+
+    def run(self, func: Callable[[sqlite3.Connection], Any], wait: bool = True) -> Any:
+        """
+        Runs func(connection) on the thread that owns the connection and returns its result.
+        With wait=False the call returns immediately and blocks only while the writer queue is full.
+        """
+        if not self.threaded:
+            with self._connection_lock:
+                return func(self.conn)
+        if threading.current_thread() is self._writer:
+            return func(self.conn)
+
+        self._raise_writer_error()
+        if self._writer is None or not self._writer.is_alive():
+            raise RuntimeError("Database must be connected before it is used.")
+        future = Future() if wait else None
+        self._tasks.put((func, future))
+        return future.result() if wait else None
+
+    def wait_until_durable(self) -> None:
+        """Blocks until every row written so far is committed to the database."""
+        self.flush()
+        # batches other threads took from the buffer are handed over before the lock is released
+        with self._handoff_lock:
+            pass
+        self.run(lambda conn: None)
+        self._raise_writer_error()
 
     def add(self, table: CxTable):
         """Adds a CxTable to the database and registers it.
@@ -52,23 +228,122 @@ class CxDatabase:
             raise KeyError(f"Table '{table_name}' not found in the database.")
         return table
 
+    def next_version(self, table_name: str = None) -> int:
+        with self._version_lock:
+            self._version += 1
+            if table_name is not None:
+                self.table_versions[table_name] = self._version
+            return self._version
+
+    @property
+    def write_lock(self) -> threading.RLock:
+        """
+        Held by tables while they stamp rows with versions and hand them to the buffer or the connection, so rows
+        are written in version order and a reader never sees a version before a lower one is written.
+        """
+        return self._buffer_lock
+
+    def queue(self, table_name: str, query: str, rows: List[Any], flush: bool = True) -> bool:
+        """
+        Buffers rows of values for a write query, flushing everything once the buffer is full. Returns whether
+        the buffer is full. Callers holding write_lock pass flush=False and flush after releasing it, as a flush
+        waits while the writer queue is full.
+        """
+        with self._buffer_lock:
+            self._buffer.setdefault(table_name, []).extend((query, values) for values in rows)
+            self._buffered_rows += len(rows)
+            is_full = self._buffered_rows >= self.buffer_size
+        if flush and is_full:
+            self.flush()
+        return is_full
+
+    def flush(self, table_name: str = None) -> None:
+        """Writes the buffered rows of one table, or of every table, in a single transaction."""
+        with self._buffer_lock:
+            if table_name is None:
+                batch, self._buffer = self._buffer, {}
+            elif table_name in self._buffer:
+                batch = {table_name: self._buffer.pop(table_name)}
+            else:
+                return
+            self._buffered_rows -= sum(len(rows) for rows in batch.values())
+            backup = self.profile == "memory" and time.monotonic() - self._last_backup >= self.backup_interval
+            if backup:
+                self._last_backup = time.monotonic()
+            # taken before the buffer lock is released, so batches are handed over in version order while
+            # writers only wait for the buffer lock
+            self._handoff_lock.acquire()
+        try:
+            if batch:
+                self.run(lambda conn: self._write_batch(conn, batch), wait=False)
+            if backup:
+                self.run(self._backup_to_disk, wait=False)
+        finally:
+            self._handoff_lock.release()
+
+    @staticmethod
+    def _write_batch(conn: sqlite3.Connection, batch: Dict[str, List[Tuple[str, Any]]]) -> None:
+        cursor = conn.cursor()
+        active_transaction = conn.in_transaction
+        try:
+            if not active_transaction:
+                cursor.execute("BEGIN")
+            for rows in batch.values():
+                # consecutive rows of the same query are written with one executemany
+                for query, group in groupby(rows, key=itemgetter(0)):
+                    cursor.executemany(query, [values for _, values in group])
+            if not active_transaction:
+                conn.commit()
+        except Exception as e:
+            if not active_transaction:
+                conn.rollback()
+            raise e
+        finally:
+            cursor.close()
+
+    def discard_buffer(self) -> None:
+        with self._buffer_lock:
+            self._buffer = {}
+            self._buffered_rows = 0
+
+    @property
+    def buffered_rows(self) -> int:
+        return self._buffered_rows
+
     def close(self) -> None:
-        if self.conn:
+        atexit.unregister(self.close)
+        if self.threaded:
+            if self._writer is not None and self._writer.is_alive():
+                self.flush()
+                self.backup()
+                self._tasks.put(None)
+                self._writer.join()
+            self._writer = None
+            self.conn = None
+        elif self.conn:
+            if self._buffered_rows:
+                self.flush()
+            self.backup()
             self.conn.close()
+            self.conn = None
 
     def reset(self) -> None:
         # Drop all existing tables
-        assert self.cursor is not None, "Database must be connected to reset."
-        self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = self.cursor.fetchall()
-        for (table_name,) in tables:
-            self.cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-
-        # Commit changes
-        assert self.conn is not None, "Database must be connected to commit."
-        self.conn.commit()
+        assert self.conn is not None, "Database must be connected to reset."
+        self.discard_buffer()
+        self.run(self._drop_all_tables)
+        self.reset_count += 1
 
         self._set_up_default_tables()
 
+    @staticmethod
+    def _drop_all_tables(conn: sqlite3.Connection) -> None:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+        tables = cursor.fetchall()
+        for (table_name,) in tables:
+            cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
 
-
+        # Commit changes
+        conn.commit()
+        cursor.close()
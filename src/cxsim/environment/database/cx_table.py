@@ -2,6 +2,9 @@ import json
 
 from cxsim.environment.database.cx_data_types import CxDataType
 
+# column holding the database-wide write counter of the last insert or update of a row
+VERSION_COLUMN = "cx_version"
+
 
 class CxTable:
     db = None  # This will be set to the CxDatabase instance
@@ -20,6 +23,10 @@ class CxTable:
                 if attr_def.primary_key:
                     self.primary_keys.append(attr)
 
+        # every write stamps its rows with a new version, so changes can be read incrementally
+        if not self.protected:
+            self.columns[VERSION_COLUMN] = "INTEGER"
+
         self.schema = self._generate_schema()
 
     def _generate_schema(self):
@@ -62,25 +69,31 @@ class CxTable:
     def display(cls):
         """Class method to display the contents of the table."""
         if cls.db and cls.db.conn:
-            cursor = cls.db.conn.cursor()
             table_name = cls.__name__.lower()
-            cursor.execute(f"SELECT * FROM {table_name}")
-            print(cursor.fetchall())
+            print(cls.db.run(lambda conn: conn.execute(f"SELECT * FROM {table_name}").fetchall()))
         else:
             print("Database connection is not available.")
 
+    def _write_columns(self, serialized_data) -> list:
+        """The columns a write sets, the version column last, its value is stamped in _write."""
+        columns = list(serialized_data.keys())
+        if not self.protected:
+            columns.append(VERSION_COLUMN)
+        return columns
+
     def add(self, **kwargs):
         """
         Add a new entry to the table, with serialization of data.
         :param kwargs: Column-value pairs to be inserted.
         """
         serialized_data = self.serialize(**kwargs)
-        columns = ', '.join(serialized_data.keys())
-        placeholders = ', '.join(['?' for _ in serialized_data])
+        write_columns = self._write_columns(serialized_data)
+        columns = ', '.join(write_columns)
+        placeholders = ', '.join(['?' for _ in write_columns])
         values = tuple(serialized_data.values())
 
         query = f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})"
-        self.execute(query, values)
+        self._write(query, [values])
 
     def upsert(self, **kwargs):
         """
@@ -89,9 +102,10 @@ class CxTable:
         :param kwargs: Column-value pairs to be inserted or updated.
         """
         serialized_data = self.serialize(**kwargs)
-        columns = ', '.join(serialized_data.keys())
-        placeholders = ', '.join(['?' for _ in serialized_data])
-        update_assignments = ', '.join([f"{col}=excluded.{col}" for col in serialized_data.keys()])
+        write_columns = self._write_columns(serialized_data)
+        columns = ', '.join(write_columns)
+        placeholders = ', '.join(['?' for _ in write_columns])
+        update_assignments = ', '.join([f"{col}=excluded.{col}" for col in write_columns])
         values = tuple(serialized_data.values())
 
         # Use self.primary_keys to automatically infer unique columns for conflict resolution
@@ -105,7 +119,7 @@ class CxTable:
         VALUES ({placeholders})
         ON CONFLICT({conflict_columns}) DO UPDATE SET {update_assignments}
         """
-        self.execute(query, values)
+        self._write(query, [values])
 
     def upsert_many(self, entries):
         """
@@ -117,9 +131,10 @@ class CxTable:
             return
 
         serialized_entries = [self.serialize(**entry) for entry in entries]
-        columns = ', '.join(serialized_entries[0].keys())
-        placeholders = ', '.join(['?' for _ in serialized_entries[0]])
-        update_assignments = ', '.join([f"{col}=excluded.{col}" for col in serialized_entries[0].keys()])
+        write_columns = self._write_columns(serialized_entries[0])
+        columns = ', '.join(write_columns)
+        placeholders = ', '.join(['?' for _ in write_columns])
+        update_assignments = ', '.join([f"{col}=excluded.{col}" for col in write_columns])
 
         if not self.primary_keys:
             raise ValueError("No primary keys defined for upsert_many operation.")
@@ -134,15 +149,36 @@ class CxTable:
 
         values = [tuple(entry.values()) for entry in serialized_entries]
 
-        self.execute(query, values, execute_many=True)
+        self._write(query, values)
+
+    def _write(self, query, rows):
+        """
+        Write rows of values with a query, either through the database's write-behind buffer or immediately.
+        Rows of versioned tables get their version here, under the database's write lock, so they reach the
+        database in version order and no reader can move past a version that is still on its way.
+        """
+        buffer_is_full = False
+        with self.db.write_lock:
+            if not self.protected:
+                rows = [values + (self.db.next_version(self.table_name),) for values in rows]
+            if self.db.write_behind:
+                buffer_is_full = self.db.queue(self.table_name, query, rows, flush=False)
+            elif len(rows) == 1:
+                self.execute(query, rows[0])
+            else:
+                self.execute(query, rows, execute_many=True)
+        if buffer_is_full:
+            self.db.flush()
 
     def reset(self):
         """
         Reset the table by deleting all entries.
         """
         if not self.protected:
+            self.db.flush(self.table_name)
             query = f"DELETE FROM {self.table_name}"
             self.execute(query)
+            self.db.reset_count += 1
 
     def create(self):
         """
@@ -151,14 +187,17 @@ class CxTable:
         if not self.protected:
             query = self.create_table_query()  # Use the class method to generate the SQL statement
             self.execute(query)
+            self.execute(f"CREATE INDEX IF NOT EXISTS {self.table_name}_{VERSION_COLUMN} ON {self.table_name} ({VERSION_COLUMN})")
 
     def drop(self):
         """
         Drop the table from the database.
         """
         if not self.protected:
+            self.db.flush(self.table_name)
             query = f"DROP TABLE IF EXISTS {self.table_name}"
             self.execute(query)
+            self.db.reset_count += 1
 
     def execute(self, query, values=None, commit=True, execute_many: bool = False, fetch_result=False):
         """
@@ -169,11 +208,14 @@ class CxTable:
         :param fetch_result: Optional; a boolean indicating whether to fetch the result of the query (default: False).
         :return: The result of the query if fetch_result is True, otherwise None.
         """
-        cursor = self.db.conn.cursor()
+        return self.db.run(lambda conn: self._execute(conn, query, values, commit, execute_many, fetch_result))
+
+    def _execute(self, conn, query, values, commit, execute_many, fetch_result):
+        cursor = conn.cursor()
         result = None
         try:
             # Check if there's an active transaction
-            active_transaction = self.db.conn.in_transaction
+            active_transaction = conn.in_transaction
 
             # Start a new transaction only if there's no active transaction
             if not active_transaction:
@@ -196,11 +238,11 @@ class CxTable:
 
             if commit and not active_transaction:
                 # Check if there's an active transaction before committing
-                if self.db.conn.in_transaction:
-                    self.db.conn.commit()
+                if conn.in_transaction:
+                    conn.commit()
         except Exception as e:
             if not active_transaction:
-                self.db.conn.rollback()
+                conn.rollback()
             raise e
         finally:
             cursor.close()
@@ -222,28 +264,66 @@ class CxTable:
             query = f"SELECT * FROM {self.table_name}"
             values = ()
 
-        # Execute the query
-
+        # Write any buffered rows first so reads see them, then execute the query
+        self.db.flush(self.table_name)
         result = self.execute(
             query,
             values,
             fetch_result=True
         )
 
+        for row in result:
+            row.pop(VERSION_COLUMN, None)
         return result
 
-    def emit(self, socket):
+    def rows_since(self, version: int = 0):
+        """
+        Retrieve the rows inserted or updated after a version, in the order they were written, together with the
+        latest version of the table. Protected tables are not versioned and always return every row.
+        :param version: The latest version the caller has already seen, 0 for every row in table order.
+        """
+        if self.protected:
+            return self.get(), version
+
+        self.db.flush(self.table_name)
+
+        order = VERSION_COLUMN if version else "rowid"
+        rows = self.execute(
+            f"SELECT * FROM {self.table_name} WHERE {VERSION_COLUMN} > ? ORDER BY {order}", (version,), fetch_result=True
+        )
+        # the latest version comes from the rows read, a row written after the query is read by the next call
+        latest = version
+        for row in rows:
+            latest = max(latest, row.pop(VERSION_COLUMN, None) or 0)
+        return rows, latest
+
+    def emit(self, socket, since: int = None, to=None):
         """
         Emit the contents of the table to the specified socket.
         :param socket: The socket to emit the data to.
+        :param since: Optional; emit only the rows written after this version as a 'data_delta' event, instead
+            of the whole table as a 'data_update' event. Nothing is emitted if no row changed.
+        :param to: Optional; the client session, or list of sessions, to emit to. Every client by default.
+        :return: The latest version the receiver has now seen.
         """
-        # Retrieve all entries from the table
-        data = self.get()
+        if since is None or self.protected:
+            # Retrieve all entries from the table
+            data, version = self.rows_since(0)
+            event = 'data_update'
+        else:
+            data, version = self.rows_since(since)
+            if not data:
+                return version
+            event = 'data_delta'
 
         # Emit the serialized data to the specified socket
-        socket.emit('data_update', {
+        payload = {
             'table_name': self.table_name,
-            'content': data
-        })
+            'content': data,
+            'primary_keys': self.primary_keys
+        }
+        for room in (to if isinstance(to, list) else [to]):
+            socket.emit(event, payload, to=room)
+        return version
 
 
@@ -1,7 +1,9 @@
 import datetime
+import threading
 import time
 import logging
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from dataclasses import is_dataclass, asdict
 from typing import Union, Any, Dict
@@ -9,6 +11,8 @@ import inspect
 from dataclasses import fields
 import random
 
+import numpy as np
+
 # core
 from cxsim.agents.agent import Agent
 from cxsim.agents.population import Population
@@ -20,6 +24,8 @@ from cxsim.artifacts.standard.gridworld import Gridworld
 
 # misc
 from cxsim.agents.item import ItemHandler
+from cxsim.environment.ledger import Ledger
+from cxsim.environment.holdings import Holdings
 from cxsim.environment.event import Event, EventHandler
 from cxsim.utilities.names import get_first_name
 
@@ -28,7 +34,7 @@ from cxsim.agents.actions.standard import STANDARD_ACTIONS
 from cxsim.agents.actions.action import Action
 
 # GUI
-from cxsim.environment.cx_socketio import CxSocket
+from cxsim.environment.cx_socketio import CxSocket, NullSocket
 
 # database
 from cxsim.environment.database.cx_database import CxDatabase
@@ -40,6 +46,9 @@ class UnsupportedItemType(Exception):
     """Exception raised when an unsupported item is added to the environment."""
 
 
+# random first names tried before an agent is named after its id
+MAX_NAME_ATTEMPTS = 100
+
 ENV_STATUS = {
     0: "Stopped",
     1: "Running",
@@ -67,6 +76,9 @@ class Environment:
             seed: int = None,
             use_gui: bool = True,
             use_database: Union[bool, CxDatabase] = True,
+            use_holdings: bool = False,
+            headless: bool = False,
+            turn_workers: int = 1,
     ):
         """
         Initialize the environment.
@@ -75,14 +87,34 @@ class Environment:
         :param gui: Whether to visualize the environment.
         :param verbose: Verbosity level.
         :param seed: Seed for random number generation.
+        :param use_database: Whether to record the simulation in a database, or the CxDatabase to record it in.
+        :param use_holdings: Whether to store every agent's inventory in a shared Holdings matrix.
+        :param headless: Run without GUI, database and logging, for batch experiments. Overrides use_gui and
+            use_database.
+        :param turn_workers: Number of threads that run agent turns concurrently, for agents that wait on I/O such
+            as language model calls. With more than one worker the actions of a step are collected first and then
+            applied in an order drawn from the seed.
         ... [other parameters]
         """
         self.name = name
         self.verbose = verbose
         self.seed = seed
-
-        self.use_gui = use_gui
-        self.use_database = use_database
+        # agent names and placement draw from generators of their own, the global generators are left alone
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+
+        self.headless = headless
+        self.use_gui = False if headless else use_gui
+        self.use_database = False if headless else use_database
+        self.use_holdings = use_holdings
+
+        if turn_workers < 1:
+            raise ValueError(f"turn_workers must be at least 1, got {turn_workers}")
+        self.turn_workers = turn_workers
+        # decides the order in which concurrently collected actions are applied
+        self.turn_rng = random.Random(seed)
+        # agents whose actions are queued instead of executed, see step_in_phases
+        self._deferred_agents = set()
 
         self._start_time = None
 
@@ -136,6 +168,8 @@ class Environment:
         self.agent_queue = deque()
         
         self.item_handler = ItemHandler(self)
+        self.ledger = Ledger()
+        self.holdings: Holdings = None
 
         self._current_time = time.perf_counter()
         self._past_time = time.perf_counter()
@@ -145,16 +179,22 @@ class Environment:
 
         # other variables
         self.STATUS = 0
+        # notified whenever STATUS changes, so a paused simulation waits without polling
+        self._status_changed = threading.Condition()
 
         self.database: CxDatabase = None
 
         if self.use_database:
-            self.database = CxDatabase()
+            self.database = self.use_database if isinstance(self.use_database, CxDatabase) else CxDatabase()
             self.database.connect()
             self.database.reset()
 
-        if self.use_gui:
+        # the socket also writes the simulation state to the database, so it is needed even without the GUI
+        self.cx_socket: Union[CxSocket, NullSocket] = NullSocket()
+        if self.use_gui or self.database:
             self.cx_socket = CxSocket(self, db=self.database)
+
+        if self.use_gui:
             self.cx_socket.run()
 
     def add_agent(self, agent: Agent):
@@ -165,9 +205,13 @@ class Environment:
         """
         agent.id = self.agent_idx
         self.agent_idx += 1
-        agent.name = get_first_name()
-        while agent.name in self.agent_names or agent.name == "" or len(agent.name) >= 5:
-            agent.name = get_first_name()
+        for _ in range(MAX_NAME_ATTEMPTS):
+            agent.name = get_first_name(rng=self.rng)
+            if agent.name not in self.agent_name_lookup and agent.name != "" and len(agent.name) < 5:
+                break
+        else:
+            # there are only a few hundred short first names, larger environments number their agents
+            agent.name = f"Agent_{agent.id}"
         self.agent_names.append(agent.name)
         self.agents.append(agent)
         self.agent_name_lookup[agent.name] = agent
@@ -259,6 +303,10 @@ class Environment:
             agent.action_space = self.action_space.copy()
             agent.environment = self
             agent.compile()
+            self.action_handler.compile_dispatch_table(agent)
+
+        if self.use_holdings:
+            self.holdings = Holdings(self.agents)
 
         self.n_artifacts = len(self.action_handler.artifacts)
 
@@ -279,13 +327,21 @@ class Environment:
         if not self._is_compiled:
             self.compile()
 
+        if self.database:
+            # the previous episode is fully written before the next one starts
+            self.database.flush()
+
         self.current_step = 0
         self.current_episode += 1
+        self.ledger.clear()
+        if self.holdings is not None:
+            self.holdings.reset()
 
         if reset_agents:
             # reset each agent
             for agent in self.agents:
                 agent.reset()
+                agent.mark_dirty()
 
         if create_new_agent_queue:
             # add agent to the agent queue
@@ -314,22 +370,19 @@ class Environment:
         if self.use_database:
             self.cx_socket.sync_environment()
 
-    def _match_action_arguments(self, valid_actions, action):
+    def _match_action_arguments(self, dispatch_table, action):
         action_name, action_params = list(action.items())[0]
         action_name = action_name.lower()
 
-        # Get the dataclass for the action
-        action_class = valid_actions.get(action_name)
+        # Get the compiled entry for the action
+        dispatch = dispatch_table.get(action_name)
 
-        if not action_class:
+        if not dispatch:
             return None, None
 
-        # Get the fields (parameters) of the action dataclass
-        dataclass_fields = [field.name for field in fields(action_class)]
-
         # Map generic parameters to specific dataclass fields
         mapped_params = {}
-        for i, field_name in enumerate(dataclass_fields):
+        for i, field_name in enumerate(dispatch.fields):
             param_key = f"param{i + 1}"
             if param_key in action_params:
                 mapped_params[field_name] = action_params[param_key]
@@ -341,40 +394,41 @@ class Environment:
         return action_name, mapped_params
 
     def execute(self, agent, action: Union[dict, Any]) -> Any:
-        self.log("INFO", f"{agent.name} is executing action: {action}")
-        # Generate a mapping of action names from the agent's action space
-        action_names = {(item.__name__.lower()): item for value in agent.action_space.values() for item in value}
+        """
+        Executes an action of an agent and adds the resulting observation to the agent.
+        While a concurrent step collects actions, the action is queued in agent.action_queue instead and None
+        is returned, the observation is added once the action is applied.
+        """
+        if agent in self._deferred_agents:
+            agent.action_queue.append(action)
+            return None
+
+        self.log("INFO", "%s is executing action: %s", agent.name, action)
+        # The dispatch table is compiled once per action space
+        dispatch_table = self.action_handler.dispatch_table(agent)
 
         # Initialize the observation to None
         observation = None
 
-        # If action is a dataclass, convert it to dictionary
-        if is_dataclass(action):
-            action_name = action.__class__.__name__.lower()
-            action_params = asdict(action)
-        elif isinstance(action, Action):
-            # Convert the action to its dictionary representation
-            action_dict = action.to_dict()
-            action_name = action_dict['name'].lower()  # Convert class name to lowercase
-            action_params = action_dict['parameters']
-        elif isinstance(action, dict):
-            # Extract the action name and parameters
-            action_name, action_params = self._match_action_arguments(action_names, action)
+        if isinstance(action, dict):
+            # Extract the action name and parameters, then build the action
+            action_name, action_params = self._match_action_arguments(dispatch_table, action)
+            dispatch = dispatch_table.get(action_name)
+            if dispatch is not None:
+                action = dispatch.action(**action_params)
+        elif is_dataclass(action) or isinstance(action, Action):
+            dispatch = dispatch_table.get(action.__class__.__name__.lower())
         else:
             raise TypeError("action must be either a dataclass or a dictionary")
 
         # Check if the action exists in the action space
-        if action_name in action_names:
-            print(action_name, action_params)
-            _action = action_names[action_name](**action_params)
-            print(_action)
-            # Convert the action_params dict to a dataclass instance if it isn't already
+        if dispatch is not None:
             try:
-                observation = self.action_handler.process_action(agent, _action)
+                observation = self.action_handler.process_action(agent, action, dispatch)
             except TypeError:
                 observation = "Action failed because of error in processing the action in the artifact"
         elif self.strict:
-            raise ValueError("")
+            raise ValueError(f"{agent.name} tried to execute an action that is not in its action space: {action}")
 
         agent.add_observation(observation)
 
@@ -387,20 +441,78 @@ class Environment:
 
         agent.step()
 
+        self._finish_turn(agent)
+
+    def _finish_turn(self, agent: Agent):
         # After turn methods
         for func in agent.after_turn_methods:
             func()
 
-        if self.use_database:
-            self.cx_socket.sync_agent(agent=agent)
+    def _decide_turn(self, agent: Agent):
+        for func in agent.before_turn_methods:
+            func()
+
+        if not agent.implements_decide:
+            agent.step()
+            return
+
+        decision = agent.decide(list(agent.turn_observations))
+        if decision is None:
+            return
+        if isinstance(decision, (list, tuple)):
+            agent.action_queue.extend(decision)
+        else:
+            agent.action_queue.append(decision)
+
+    def step_in_phases(self, agents: list):
+        """
+        Runs a step in two phases. First every agent decides, agents that implement decide return their actions
+        and, with more than one turn worker, the actions other agents execute in step are queued and the
+        decisions are made on a thread pool. Then every agent takes its place in one order shuffled with
+        turn_rng, so conflicting actions resolve the same way on every run of a seeded environment. Queued
+        actions are applied there, and with a single turn worker agents that only implement step take their
+        whole turn there, so their execute calls still return observations.
+        """
+        deciding = agents if self.turn_workers > 1 else [agent for agent in agents if agent.implements_decide]
+        for agent in deciding:
+            agent.action_queue.clear()
+        self._deferred_agents = set(deciding)
+        try:
+            if self.turn_workers > 1:
+                with ThreadPoolExecutor(max_workers=self.turn_workers) as executor:
+                    # consuming the results raises the first exception of a turn
+                    list(executor.map(self._decide_turn, deciding))
+            else:
+                for agent in deciding:
+                    self._decide_turn(agent)
+        finally:
+            deferred, self._deferred_agents = self._deferred_agents, set()
+
+        order = list(agents)
+        self.turn_rng.shuffle(order)
+        for agent in order:
+            if agent not in deferred:
+                self.process_turn(agent)
+                continue
+            actions, agent.action_queue = agent.action_queue, []
+            first_observation = len(agent.observations)
+            for action in actions:
+                self.execute(agent, action)
+            agent.turn_observations = agent.observations[first_observation:]
+            self._finish_turn(agent)
 
     def step(self):
         self._current_time = time.perf_counter()
-        self.log("INFO", f"{self.current_episode}: {self.current_step} is executing action:")
+        self.log("INFO", "%s: %s is executing action:", self.current_episode, self.current_step)
 
-        for _ in range(len(self.agent_queue)):
-            agent = self.agent_queue.popleft()
-            self.process_turn(agent)
+        agents = list(self.agent_queue)
+        self.agent_queue.clear()
+        if self.turn_workers > 1 or any(agent.implements_decide for agent in agents):
+            self.step_in_phases(agents)
+        else:
+            # agents that only implement step take their turns in queue order
+            for agent in agents:
+                self.process_turn(agent)
 
         assert len(self.agent_queue) == 0, "Unexpected behavior: Agent queue should be empty"
 
@@ -411,17 +523,25 @@ class Environment:
 
         self.update_simulation_state()
 
+        if self.database:
+            # everything written during the step reaches the database at the step boundary
+            self.database.flush()
+
         if self.use_gui:
             self._backend_while_loop()
 
     def _backend_while_loop(self):
         self.cx_socket.sync_environment()
-        while self.STATUS == 0:
-            time.sleep(0.1)
+        with self._status_changed:
+            self._status_changed.wait_for(lambda: self.STATUS != 0)
+            if self.STATUS == 2:
+                # "next" runs a single step, then the simulation pauses again
+                self.STATUS = 0
 
-        if self.STATUS == 2:
-            print("status is next")
-            self.STATUS = 0
+    def set_status(self, status: int):
+        with self._status_changed:
+            self.STATUS = status
+            self._status_changed.notify_all()
 
     @property
     def get_status(self):
@@ -497,11 +617,11 @@ class Environment:
 
     def handle_button_event(self, action: str):
         if action == "next":
-            self.STATUS = 2
+            self.set_status(2)
         if action == "pause":
-            self.STATUS = 0
+            self.set_status(0)
         if action == "play":
-            self.STATUS = 1
+            self.set_status(1)
         self.cx_socket.sync_environment()
 
     @property
@@ -517,6 +637,9 @@ class Environment:
         :param args: The arguments to merge into msg.
         :param kwargs: Other keyword arguments.
         """
+        if self.headless:
+            return
+
         # Map string levels to their numeric values
         str_to_level = {
             'DEBUG': logging.DEBUG,
@@ -534,14 +657,12 @@ class Environment:
         self.logger.log(level, msg, *args, **kwargs)
 
         if self.use_database:
-            CxLogs().add(
+            self.database["cxlogs"].add(
                 timestamp=datetime.datetime.utcnow(),
                 level=level,
-                msg=msg
+                msg=msg % args if args else msg
             )
 
-            CxLogs().emit(self.cx_socket.socketio)
-
     def __repr__(self):
         newline = '\n'
         return \
@@ -0,0 +1,167 @@
+from collections.abc import MutableMapping
+from typing import Dict, List
+
+import numpy as np
+
+
+class HoldingsRow(MutableMapping):
+    """
+    Dict-like view of one agent's row in a Holdings matrix. An attached Inventory uses it in place of its
+    quantity dict, so every existing inventory operation reads and writes the matrix directly. Like that dict it
+    only lists the goods that were set and not deleted, other goods raise KeyError.
+    """
+    __slots__ = ("holdings", "row")
+
+    def __init__(self, holdings, row: int):
+        self.holdings = holdings
+        self.row = row
+
+    def _column(self, good) -> int:
+        column = self.holdings.good_index.get(good)
+        if column is None or not self.holdings.listed[self.row, column]:
+            raise KeyError(good)
+        return column
+
+    def __getitem__(self, good):
+        return int(self.holdings.matrix[self.row, self._column(good)])
+
+    def __setitem__(self, good, quantity):
+        # good_id can grow the matrix, so look up the column before indexing it
+        column = self.holdings.good_id(good)
+        self.holdings.matrix[self.row, column] = quantity
+        self.holdings.listed[self.row, column] = True
+
+    def __delitem__(self, good):
+        column = self._column(good)
+        self.holdings.matrix[self.row, column] = 0
+        self.holdings.listed[self.row, column] = False
+
+    def __contains__(self, good):
+        column = self.holdings.good_index.get(good)
+        return column is not None and bool(self.holdings.listed[self.row, column])
+
+    def __iter__(self):
+        listed = self.holdings.listed[self.row]
+        return iter([good for good, column in self.holdings.good_index.items() if listed[column]])
+
+    def __len__(self):
+        return int(self.holdings.listed[self.row].sum())
+
+    def __repr__(self):
+        return str(dict(self))
+
+
+class Holdings:
+    """
+    Dense (agents x goods) matrix of the quantities every agent holds.
+
+    Each agent's Inventory is attached to its row, so trades update the matrix in place and environment-wide
+    questions become single NumPy operations. The matrix only holds counts, so attached inventories become
+    fungible.
+
+    Attributes:
+    agents: Agents in row order.
+    goods: Goods in column order.
+    matrix: Current holdings, one row per agent.
+    starting: Starting holdings that reset() copies back into matrix.
+    listed: Which goods each agent's inventory lists, the keys of its quantity dict.
+    starting_listed: The goods listed after a reset.
+    """
+    def __init__(self, agents):
+        self.agents = list(agents)
+        self.agent_index = {agent: row for row, agent in enumerate(self.agents)}
+        self.goods: List[str] = []
+        self.good_index: Dict[str, int] = {}
+        for agent in self.agents:
+            for good in list(agent.inventory.starting_inventory) + list(agent.inventory.keys()):
+                if good not in self.good_index:
+                    self.good_index[good] = len(self.goods)
+                    self.goods.append(good)
+
+        self.matrix = np.zeros((len(self.agents), len(self.goods)), dtype=np.int64)
+        self.starting = np.zeros_like(self.matrix)
+        self.listed = np.zeros(self.matrix.shape, dtype=bool)
+        self.starting_listed = np.zeros(self.matrix.shape, dtype=bool)
+        for row, agent in enumerate(self.agents):
+            for good, quantity in agent.inventory.items():
+                self.matrix[row, self.good_index[good]] = quantity
+                self.listed[row, self.good_index[good]] = True
+            for good, quantity in agent.inventory.starting_inventory.items():
+                self.starting[row, self.good_index[good]] = quantity
+                self.starting_listed[row, self.good_index[good]] = True
+            agent.inventory.attach(self, row)
+
+    def good_id(self, good: str) -> int:
+        """
+        Returns the column of a good, adding an empty column if the good is new.
+        """
+        if good not in self.good_index:
+            self.good_index[good] = len(self.goods)
+            self.goods.append(good)
+            empty = np.zeros((len(self.agents), 1), dtype=np.int64)
+            self.matrix = np.hstack((self.matrix, empty))
+            self.starting = np.hstack((self.starting, empty))
+            unlisted = np.zeros((len(self.agents), 1), dtype=bool)
+            self.listed = np.hstack((self.listed, unlisted))
+            self.starting_listed = np.hstack((self.starting_listed, unlisted))
+        return self.good_index[good]
+
+    def row_view(self, row: int) -> HoldingsRow:
+        return HoldingsRow(self, row)
+
+    def row(self, agent) -> np.ndarray:
+        return self.matrix[self.agent_index[agent]]
+
+    def column(self, good: str) -> np.ndarray:
+        if good not in self.good_index:
+            raise KeyError(f"Good {good} is not in {self.goods}")
+        return self.matrix[:, self.good_index[good]]
+
+    def total(self, good: str) -> int:
+        return int(self.column(good).sum())
+
+    def totals(self) -> Dict[str, int]:
+        return dict(zip(self.goods, self.matrix.sum(axis=0).tolist()))
+
+    def holders(self, good: str) -> list:
+        return [self.agents[row] for row in np.flatnonzero(self.column(good) > 0)]
+
+    def gini(self, good: str) -> float:
+        """
+        Gini coefficient of a good across all agents, 0 for a perfectly equal distribution.
+        """
+        values = np.sort(self.column(good)).astype(np.float64)
+        n = len(values)
+        if n == 0 or values.sum() == 0:
+            return 0.0
+        ranks = np.arange(1, n + 1)
+        return float((2 * np.sum(ranks * values)) / (n * values.sum()) - (n + 1) / n)
+
+    def is_conserved(self) -> bool:
+        """
+        Whether every good has the same total as in the starting holdings, which holds as long as goods only
+        change hands.
+        """
+        return bool(np.array_equal(self.matrix.sum(axis=0), self.starting.sum(axis=0)))
+
+    def snapshot(self) -> np.ndarray:
+        return self.matrix.copy()
+
+    def set_starting_row(self, row: int, starting_inventory: dict):
+        self.starting[row] = 0
+        self.starting_listed[row] = False
+        for good, quantity in starting_inventory.items():
+            column = self.good_id(good)
+            self.starting[row, column] = quantity
+            self.starting_listed[row, column] = True
+
+    def reset_row(self, row: int):
+        self.matrix[row] = self.starting[row]
+        self.listed[row] = self.starting_listed[row]
+
+    def reset(self):
+        np.copyto(self.matrix, self.starting)
+        np.copyto(self.listed, self.starting_listed)
+
+    def __repr__(self):
+        return f"Holdings(agents={len(self.agents)}, goods={self.goods})"
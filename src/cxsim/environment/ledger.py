@@ -0,0 +1,146 @@
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class Ledger:
+    """
+    Append-only journal of every transfer of goods between agents.
+
+    A posting is a set of legs (from_agent, to_agent, good, quantity) that is validated once and then applied
+    as a whole, so a trade either happens completely or not at all. Each leg is journaled as one row of int64
+    NumPy columns that double in capacity when full. Agents and goods are stored as integer ids, see
+    accounts and goods.
+
+    Postings must be made in non-decreasing step order, which lets rollback undo a whole step by walking the
+    tail of the journal backwards.
+
+    Attributes:
+    COLUMNS: Names of the journal columns.
+    accounts: Agents in the order they first appeared in the journal, indexed by from_account/to_account.
+    goods: Names of the goods in the order they first appeared in the journal, indexed by good.
+    """
+    COLUMNS = ("entry_id", "step", "from_account", "to_account", "good", "quantity")
+
+    def __init__(self, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self._capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self.accounts = []
+        self.goods: List[str] = []
+        self._account_ids = {}
+        self._good_ids: Dict[str, int] = {}
+        self._size = 0
+        self.n_entries = 0
+        self._columns: Dict[str, np.ndarray] = {name: np.empty(self._capacity, dtype=np.int64) for name in self.COLUMNS}
+
+    def account_id(self, agent) -> int:
+        if agent not in self._account_ids:
+            self._account_ids[agent] = len(self.accounts)
+            self.accounts.append(agent)
+        return self._account_ids[agent]
+
+    def good_id(self, good: str) -> int:
+        if good not in self._good_ids:
+            self._good_ids[good] = len(self.goods)
+            self.goods.append(good)
+        return self._good_ids[good]
+
+    def _reserve(self, n: int):
+        required = self._size + n
+        capacity = len(self._columns["entry_id"])
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def post(self, legs, step: int = 0) -> Optional[int]:
+        """
+        Validates and applies a set of legs as one entry.
+
+        :param legs: Iterable of (from_agent, to_agent, good, quantity) tuples. Legs with a quantity of zero are ignored.
+        :param step: The simulation step the entry belongs to.
+        :return: The id of the entry, or None if an agent does not hold enough of a good to cover its legs,
+            in which case nothing is moved.
+        """
+        legs = [leg for leg in legs if leg[3] != 0]
+        if self._size and step < self._columns["step"][self._size - 1]:
+            raise ValueError(f"postings must be made in step order, got step {step} after step {self._columns['step'][self._size - 1]}")
+
+        required = defaultdict(int)
+        for from_agent, to_agent, good, quantity in legs:
+            if quantity < 0:
+                raise ValueError(f"leg quantities must not be negative, got {quantity} of {good}")
+            required[(from_agent, good)] += quantity
+        for (agent, good), quantity in required.items():
+            if agent.inventory.get_quantity(good) < quantity:
+                return None
+
+        entry_id = self.n_entries
+        self.n_entries += 1
+        self._reserve(len(legs))
+        for from_agent, to_agent, good, quantity in legs:
+            from_agent.inventory.move(to_agent.inventory, good, quantity)
+            i = self._size
+            self._columns["entry_id"][i] = entry_id
+            self._columns["step"][i] = step
+            self._columns["from_account"][i] = self.account_id(from_agent)
+            self._columns["to_account"][i] = self.account_id(to_agent)
+            self._columns["good"][i] = self.good_id(good)
+            self._columns["quantity"][i] = quantity
+            self._size += 1
+        return entry_id
+
+    def rollback(self, step: int) -> int:
+        """
+        Undoes every posting made at or after a step, newest first, and drops them from the journal.
+        Returns the number of legs that were undone.
+        """
+        start = int(np.searchsorted(self["step"], step, side="left"))
+        for i in range(self._size - 1, start - 1, -1):
+            from_agent = self.accounts[self._columns["from_account"][i]]
+            to_agent = self.accounts[self._columns["to_account"][i]]
+            good = self.goods[self._columns["good"][i]]
+            to_agent.inventory.move(from_agent.inventory, good, int(self._columns["quantity"][i]), reverse=True)
+
+        undone = self._size - start
+        self._size = start
+        if start:
+            self.n_entries = int(self._columns["entry_id"][start - 1]) + 1
+        else:
+            self.n_entries = 0
+        return undone
+
+    def query(self, agent=None, good: str = None, step: int = None) -> Dict[str, np.ndarray]:
+        """
+        Returns the journal rows matching every given filter as a dict of columns.
+        An agent matches the legs it sent or received.
+        """
+        mask = np.ones(self._size, dtype=bool)
+        if agent is not None:
+            account = self._account_ids.get(agent, -1)
+            mask &= (self["from_account"] == account) | (self["to_account"] == account)
+        if good is not None:
+            mask &= self["good"] == self._good_ids.get(good, -1)
+        if step is not None:
+            mask &= self["step"] == step
+        return {name: self[name][mask] for name in self.COLUMNS}
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if column not in self._columns:
+            raise KeyError(f"Column {column} is not in {list(self.COLUMNS)}")
+        return self._columns[column][:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"Ledger(entries={self.n_entries}, legs={self._size})"
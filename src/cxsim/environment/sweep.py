@@ -0,0 +1,162 @@
+import itertools
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+import numpy as np
+
+
+class SweepResults:
+    """
+    Columnar results of a parameter sweep, one row per run and one list per column.
+
+    Attributes:
+    columns: Column name to the values of every run, in the order the runs finished.
+    """
+    def __init__(self):
+        self.columns: Dict[str, List[Any]] = {}
+        self._size = 0
+
+    def append(self, row: Dict[str, Any]):
+        for name in row:
+            if name not in self.columns:
+                # runs that finished before a column first appeared don't have a value for it
+                self.columns[name] = [None] * self._size
+        for name, values in self.columns.items():
+            values.append(row.get(name))
+        self._size += 1
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        return {name: np.asarray(values) for name, values in self.columns.items()}
+
+    def to_pandas(self):
+        import pandas as pd
+        return pd.DataFrame(self.columns).sort_values("run_id", ignore_index=True)
+
+    def __getitem__(self, column: str) -> list:
+        if column not in self.columns:
+            raise KeyError(f"Column {column} is not in {list(self.columns)}")
+        return self.columns[column]
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"SweepResults(runs={self._size}, columns={list(self.columns)})"
+
+
+def default_metrics(environment) -> Dict[str, Any]:
+    return {"episode": environment.current_episode, "step": environment.current_step}
+
+
+def run_replication(make_environment: Callable, metrics: Callable, run: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds, runs and measures one environment in a worker process. Runs have to be headless, a worker has no
+    GUI to talk to and would otherwise write every run into the same database.
+    """
+    # scripted agents draw from the global generators, which belong to this worker process
+    random.seed(run["seed"])
+    np.random.seed(run["seed"])
+    environment = make_environment(seed=run["seed"], **run["parameters"])
+    if not environment.headless:
+        raise ValueError("make_environment must build the environment with headless=True to run it in a sweep")
+
+    start = time.perf_counter()
+    environment.reset()
+    environment.run()
+    elapsed = time.perf_counter() - start
+
+    row = {"run_id": run["run_id"], "replication": run["replication"], "seed": run["seed"]}
+    row.update(run["parameters"])
+    row.update(metrics(environment))
+    row["elapsed"] = elapsed
+    return row
+
+
+class SweepRunner:
+    """
+    Runs replications of an environment for every combination of a parameter grid on a pool of worker
+    processes.
+
+    Each run calls make_environment(seed=seed, **parameters), resets the environment and runs it for max_steps,
+    then calls metrics(environment) for a dict of values to record. Seeds are spawned from base_seed, so a sweep
+    gives the same results however its runs are spread over the workers. Workers are reused across runs, so
+    imports and other start up costs are paid once per worker. make_environment and metrics are sent to the
+    workers, so they must be functions defined at module level.
+
+    Attributes:
+    runs: One dict per run with its run_id, replication, seed and parameters.
+    """
+    def __init__(
+            self,
+            make_environment: Callable,
+            grid: Dict[str, Sequence],
+            metrics: Callable = default_metrics,
+            replications: int = 1,
+            base_seed: int = 0,
+            max_workers: int = None,
+            mp_context=None
+    ):
+        """
+        :param make_environment: Builds a headless Environment from a seed and one value of every grid parameter.
+        :param grid: Parameter name to the values to sweep.
+        :param metrics: Returns the values to record for a finished environment.
+        :param replications: Number of runs for every combination of parameters.
+        :param base_seed: Seed the seeds of the runs are spawned from.
+        :param max_workers: Number of worker processes, the number of CPUs by default.
+        :param mp_context: Optional multiprocessing context the workers are started with.
+        """
+        if replications < 1:
+            raise ValueError(f"replications must be at least 1, got {replications}")
+        self.make_environment = make_environment
+        self.grid = {name: list(values) for name, values in grid.items()}
+        self.metrics = metrics
+        self.replications = replications
+        self.base_seed = base_seed
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.runs = self._plan_runs()
+
+    def _plan_runs(self) -> List[Dict[str, Any]]:
+        names = list(self.grid)
+        combinations = list(itertools.product(*self.grid.values()))
+        n_runs = len(combinations) * self.replications
+        seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(self.base_seed).spawn(n_runs)]
+
+        runs = []
+        for values in combinations:
+            for replication in range(self.replications):
+                runs.append({
+                    "run_id": len(runs),
+                    "replication": replication,
+                    "seed": seeds[len(runs)],
+                    "parameters": dict(zip(names, values))
+                })
+        return runs
+
+    def iter_results(self) -> Iterator[Dict[str, Any]]:
+        """Yields the row of every run as soon as it finishes."""
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context) as executor:
+            futures = [executor.submit(run_replication, self.make_environment, self.metrics, run) for run in self.runs]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def run(self, callback: Callable = None) -> SweepResults:
+        """
+        Runs the whole sweep.
+
+        :param callback: Optional; called with the row of every run as soon as it finishes.
+        """
+        results = SweepResults()
+        for row in self.iter_results():
+            results.append(row)
+            if callback is not None:
+                callback(row)
+        return results
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __repr__(self):
+        return f"SweepRunner(runs={len(self.runs)}, grid={self.grid}, replications={self.replications})"
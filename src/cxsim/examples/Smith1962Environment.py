@@ -1,6 +1,7 @@
 from cxsim import Environment, Population, PromptTemplate
 from cxsim.artifacts import Marketplace
 from cxsim.agents import Agent
+from cxsim.agents.traits.inventory import Inventory
 from cxsim.actions.action_restrictions import ActionRestriction
 from cxsim.artifacts.marketplace import BuyOrder, SellOrder, MarketPlaceQuery
 from cxsim.prompts.default_prompts import DEFAULT_DECISION_PROMPT, DEFAULT_SYSTEM_PROMPT
@@ -14,6 +15,8 @@ MODEL_ID = ""
 class SmithAgent(Agent):
     def __init__(self, model_id):
         super().__init__()
+        # capital and shirts are interchangeable units, so store counts instead of one Item per unit
+        self.inventory = Inventory(fungible=True)
         self.system_prompt = DEFAULT_SYSTEM_PROMPT
         self.decision_prompt = DEFAULT_DECISION_PROMPT
         self.functions = None
@@ -213,7 +216,7 @@ class Smith1962Environment:
                 for agent in env.iter_agent_turns():
                     env.process_turn(agent)
 
-                price_history = market["shirts"].history["price"].values
+                price_history = market["shirts"].history.prices
 
                 if len(price_history) != 0:
                     alpha = calculate_alpha(equilibrium_price, price_history)
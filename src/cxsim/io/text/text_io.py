@@ -19,7 +19,10 @@ class TextIO:
         self.prompts[name] = prompt
 
     def add_message(self, role: str, content: Union[str, PromptTemplate], function_name: str = None, override: bool = False):
-        return self.format.add_message(role=role, content=content, function_name=function_name, override=override)
+        result = self.format.add_message(role=role, content=content, function_name=function_name, override=override)
+        # the messages are synced with the agent
+        self.agent.mark_dirty()
+        return result
 
     def process_text_input(self, text: str, delimiter: str = " ", strict: bool = True) -> dict:
         """
@@ -4,6 +4,8 @@
 #  male first names : 1,000
 
 from __future__ import unicode_literals
+from bisect import bisect_right
+from functools import lru_cache
 from os.path import abspath, join, dirname
 import random
 
@@ -16,25 +18,37 @@ FILES = {
 }
 
 
-def get_name(filename):
-    selected = random.random() * 90
+@lru_cache(maxsize=None)
+def load_names(filename):
+    """Reads a name file once, returning its names and their cumulative frequencies."""
+    names, cummulatives = [], []
     with open(filename) as name_file:
         for line in name_file:
             name, _, cummulative, _ = line.split()
-            if float(cummulative) > selected:
-                return name
+            names.append(name)
+            cummulatives.append(float(cummulative))
+    return names, cummulatives
+
+
+def get_name(filename, rng: random.Random = None):
+    selected = (rng or random).random() * 90
+    names, cummulatives = load_names(filename)
+    # the first name whose cumulative frequency is above selected
+    index = bisect_right(cummulatives, selected)
+    if index < len(names):
+        return names[index]
     return ""  # Return empty string if file is empty
 
 
-def get_first_name(gender=None):
+def get_first_name(gender=None, rng: random.Random = None):
     if gender not in ('male', 'female'):
-        gender = random.choice(('male', 'female'))
-    return get_name(FILES['first:%s' % gender]).capitalize()
+        gender = (rng or random).choice(('male', 'female'))
+    return get_name(FILES['first:%s' % gender], rng).capitalize()
 
 
-def get_last_name():
-    return get_name(FILES['last']).capitalize()
+def get_last_name(rng: random.Random = None):
+    return get_name(FILES['last'], rng).capitalize()
 
 
-def get_full_name(gender=None):
-    return "{0} {1}".format(get_first_name(gender), get_last_name())
+def get_full_name(gender=None, rng: random.Random = None):
+    return "{0} {1}".format(get_first_name(gender, rng), get_last_name(rng))
@@ -0,0 +1,219 @@
+import gc
+import sqlite3
+import tempfile
+import threading
+import unittest
+import weakref
+from cxsim.environment.database.cx_database import CxDatabase
+
+
+class TestWriteBehind(unittest.TestCase):
+    database_kwargs = {}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = CxDatabase(directory=self.directory.name, buffer_size=10, **self.database_kwargs)
+        self.db.connect()
+        self.db.reset()
+
+    def tearDown(self):
+        self.db.close()
+        self.directory.cleanup()
+
+    def count_rows(self, table_name):
+        return self.db.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
+    def test_rows_are_buffered_until_flush(self):
+        for step in range(3):
+            self.db["cxactions"].add(step=step, agent_name="a", action_name="Move", action_parameters={})
+        self.db["cxmetadata"].upsert(key="current_step", value=1)
+        self.db["cxmetadata"].upsert(key="current_step", value=2)
+
+        self.assertEqual(self.db.buffered_rows, 5)
+        self.assertEqual(self.count_rows("cxactions"), 0)
+
+        self.db.flush()
+        self.assertEqual(self.db.buffered_rows, 0)
+        self.assertEqual(self.count_rows("cxactions"), 3)
+        self.assertEqual(self.db["cxmetadata"].get(), [{"key": "current_step", "value": "2"}])
+
+    def test_read_flushes_its_table(self):
+        self.db["cxactions"].add(step=0, agent_name="a", action_name="Move", action_parameters={})
+        self.db["cxmetadata"].upsert(key="name", value="test")
+
+        self.assertEqual(len(self.db["cxactions"].get()), 1)
+        self.assertEqual(self.db.buffered_rows, 1)
+
+    def test_size_threshold_and_close(self):
+        for step in range(12):
+            self.db["cxactions"].add(step=step, agent_name="a", action_name="Move", action_parameters={})
+        self.assertEqual(self.db.buffered_rows, 2)
+        self.assertEqual(self.count_rows("cxactions"), 10)
+
+        self.db.close()
+        self.db.connect()
+        self.assertEqual(self.count_rows("cxactions"), 12)
+
+    def test_unbuffered_writes(self):
+        self.db.write_behind = False
+        self.db["cxmetadata"].upsert(key="name", value="test")
+        self.assertEqual(self.db.buffered_rows, 0)
+        self.assertEqual(self.count_rows("cxmetadata"), 1)
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, payload, to=None):
+        self.events.append((event, [row["key"] for row in payload["content"]], to))
+
+
+class TestIncrementalEmit(unittest.TestCase):
+    setUp = TestWriteBehind.setUp
+    tearDown = TestWriteBehind.tearDown
+    database_kwargs = {}
+
+    def test_rows_since(self):
+        table = self.db["cxmetadata"]
+        table.upsert(key="name", value="test")
+        table.upsert(key="current_step", value=0)
+        rows, version = table.rows_since(0)
+        self.assertEqual([row["key"] for row in rows], ["name", "current_step"])
+        self.assertNotIn("cx_version", rows[0])
+
+        table.upsert(key="current_step", value=1)
+        rows, latest = table.rows_since(version)
+        self.assertEqual(rows, [{"key": "current_step", "value": "1"}])
+        self.assertGreater(latest, version)
+        self.assertEqual(table.rows_since(latest), ([], latest))
+
+    def test_concurrent_writes_are_never_skipped(self):
+        table = self.db["cxmetadata"]
+        keys = [f"key_{thread}_{i}" for thread in range(4) for i in range(200)]
+
+        def write(thread):
+            for i in range(200):
+                table.upsert(key=f"key_{thread}_{i}", value=i)
+
+        writers = [threading.Thread(target=write, args=(thread,)) for thread in range(4)]
+        for writer in writers:
+            writer.start()
+        seen, version = set(), 0
+        while any(writer.is_alive() for writer in writers):
+            rows, version = table.rows_since(version)
+            seen.update(row["key"] for row in rows)
+        for writer in writers:
+            writer.join()
+        rows, version = table.rows_since(version)
+        seen.update(row["key"] for row in rows)
+
+        self.assertEqual(seen, set(keys))
+
+    def test_emit_sends_full_then_deltas(self):
+        socket = RecordingSocket()
+        table = self.db["cxmetadata"]
+        table.upsert(key="name", value="test")
+
+        version = table.emit(socket, to="a")
+        table.upsert(key="current_step", value=1)
+        version = table.emit(socket, since=version, to=["a", "b"])
+        table.emit(socket, since=version, to="a")
+
+        self.assertEqual(socket.events, [
+            ("data_update", ["name"], "a"),
+            ("data_delta", ["current_step"], "a"),
+            ("data_delta", ["current_step"], "b"),
+        ])
+
+
+class TestThreadedWriter(TestWriteBehind):
+    database_kwargs = {"threaded": True, "max_pending_batches": 2}
+
+    def count_rows(self, table_name):
+        # the writer thread owns the connection, so reads go through it
+        return self.db.run(lambda conn: conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0])
+
+    def test_wait_until_durable(self):
+        for step in range(25):
+            self.db["cxactions"].add(step=step, agent_name="a", action_name="Move", action_parameters={})
+        self.db.wait_until_durable()
+
+        # a second connection sees every committed row
+        other = sqlite3.connect(self.db.file_path)
+        self.assertEqual(other.execute("SELECT COUNT(*) FROM cxactions").fetchone()[0], 25)
+        other.close()
+
+    def test_writer_errors_are_raised(self):
+        self.db.queue("cxactions", "INSERT INTO missing_table (step) VALUES (?)", [(1,)])
+        with self.assertRaises(sqlite3.OperationalError):
+            self.db.wait_until_durable()
+
+    def test_full_writer_queue_blocks_only_the_flush(self):
+        # a busy writer thread with a full queue
+        release = threading.Event()
+        for _ in range(3):
+            self.db.run(lambda conn: release.wait(), wait=False)
+        self.db["cxactions"].add(step=0, agent_name="a", action_name="Move", action_parameters={})
+        flusher = threading.Thread(target=self.db.flush)
+        flusher.start()
+        flusher.join(timeout=0.2)
+        self.assertTrue(flusher.is_alive())
+
+        writer = threading.Thread(
+            target=lambda: self.db["cxactions"].add(step=1, agent_name="a", action_name="Move", action_parameters={})
+        )
+        writer.start()
+        writer.join(timeout=5)
+        blocked = writer.is_alive()
+        release.set()
+        flusher.join()
+        writer.join()
+        self.assertFalse(blocked)
+
+        self.db.wait_until_durable()
+        self.assertEqual([row["step"] for row in self.db["cxactions"].rows_since()[0]], [0, 1])
+
+    def test_closed_databases_are_not_kept_alive(self):
+        reference = weakref.ref(self.db)
+        self.db.close()
+        self.db = CxDatabase(directory=self.directory.name)
+        gc.collect()
+        self.assertIsNone(reference())
+
+
+class TestFastProfile(TestWriteBehind):
+    database_kwargs = {"profile": "fast"}
+
+    def test_pragmas(self):
+        self.assertEqual(self.db.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(self.db.conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+
+
+class TestMemoryProfile(TestWriteBehind):
+    database_kwargs = {"profile": "memory"}
+
+    def test_backup_to_file(self):
+        self.db["cxmetadata"].upsert(key="name", value="test")
+        self.db.flush()
+        self.assertEqual(self.count_file_rows("cxmetadata"), 0)
+
+        self.db.backup()
+        self.assertEqual(self.count_file_rows("cxmetadata"), 1)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            CxDatabase(directory=self.directory.name, profile="turbo")
+
+    def count_file_rows(self, table_name):
+        conn = sqlite3.connect(self.db.file_path)
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+        except sqlite3.OperationalError:
+            return 0
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
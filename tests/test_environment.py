@@ -1,9 +1,18 @@
+import random
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
+import numpy as np
 from cxsim import Environment, Agent
 from cxsim.agents import Population
 from cxsim.artifacts import Marketplace
 from cxsim.environment.environment import UnsupportedItemType, Artifact
+from cxsim.artifacts.standard.marketplace import BuyOrder, SellOrder
+from cxsim.artifacts.standard.gridworld import Gridworld, Move
+from cxsim.environment.cx_socketio import CxSocket, NullSocket
+from cxsim.environment.database.cx_database import CxDatabase
 
 
 class TestEnvironment(unittest.TestCase):
@@ -25,5 +34,353 @@ class TestEnvironment(unittest.TestCase):
             self.env.add(123)  # Assuming int is not supported
 
 
+class DummyAgent(Agent):
+    def __init__(self, name):
+        super(DummyAgent, self).__init__(name)
+        self.inventory.set_starting_inventory({"capital": 1000, "socks": 100})
+
+    def execute_action(self):
+        pass
+
+    def step(self):
+        pass
+
+    def reset(self):
+        pass
+
+
+class TestActionDispatch(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment(use_gui=False, use_database=False)
+        self.agents = [DummyAgent(f"Agent_{i}") for i in range(2)]
+        for agent in self.agents:
+            self.env.add(agent)
+        self.env.add(Marketplace())
+        self.env.compile()
+
+    def test_agents_share_compiled_table(self):
+        table = self.env.action_handler.dispatch_table(self.agents[0])
+        self.assertIs(table, self.env.action_handler.dispatch_table(self.agents[1]))
+        self.assertEqual(len(self.env.action_handler.dispatch_tables), 1)
+
+        entry = table["buyorder"]
+        self.assertIs(entry.action, BuyOrder)
+        self.assertIs(entry.artifact, self.env["Marketplace"])
+        self.assertEqual(entry.fields, ("good", "price", "quantity"))
+        self.assertEqual(table["move"].fields, ("direction",))
+
+    def test_execute_dataclass_and_dict_actions(self):
+        self.env.execute(self.agents[0], SellOrder(good="socks", price=10, quantity=2))
+        observation = self.env.execute(self.agents[1], {"buyorder": {"param1": "socks", "param2": 10, "param3": 2}})
+
+        self.assertTrue(observation.startswith("Action processed successfully"))
+        self.assertEqual(self.agents[1].get_inventory("socks"), 102)
+        self.assertEqual(
+            self.agents[1].action_history[-1]["action"],
+            {"name": "BuyOrder", "parameters": {"good": "socks", "price": 10, "quantity": 2}}
+        )
+
+    def test_action_to_dict_uses_field_names(self):
+        self.assertEqual(Move(direction="up").to_dict(), {"name": "Move", "parameters": {"direction": "up"}})
+
+
+class TestDirtyTracking(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment(use_gui=False, use_database=False)
+        self.agents = [DummyAgent(f"Agent_{i}") for i in range(3)]
+        for agent in self.agents:
+            self.env.add(agent)
+        self.env.add(Marketplace())
+        self.env.compile()
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = CxDatabase(directory=self.directory.name)
+        self.database.connect()
+        self.database.reset()
+        self.socket = CxSocket(self.env, db=self.database)
+        self.socket.sync_environment()
+
+    def tearDown(self):
+        self.database.close()
+        self.directory.cleanup()
+
+    def test_everything_is_clean_after_a_sync(self):
+        self.assertFalse(any(agent.is_dirty for agent in self.agents))
+        self.assertEqual(self.env.gridworld.pop_dirty_blocks(), [])
+        self.assertEqual(len(self.database["cxgridworld"].get()), 15 * 15)
+
+    def test_trades_mark_both_agents(self):
+        self.env.execute(self.agents[0], SellOrder(good="socks", price=10, quantity=2))
+        self.env.execute(self.agents[1], BuyOrder(good="socks", price=10, quantity=2))
+        self.assertEqual([agent.is_dirty for agent in self.agents], [True, True, False])
+
+    def test_sync_writes_only_what_changed(self):
+        version = max(self.database.table_versions.values())
+        agent = self.agents[0]
+        x_pos, y_pos = agent.x_pos, agent.y_pos
+        self.env.gridworld.replace_block(x_pos, y_pos + 1 if y_pos < 14 else y_pos - 1, self.env.gridworld.grid[0][0].copy())
+        self.socket.sync_environment()
+
+        blocks, _ = self.database["cxgridworld"].rows_since(version)
+        agents, _ = self.database["cxagents"].rows_since(version)
+        metadata, _ = self.database["cxmetadata"].rows_since(version)
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual(agents, [])
+        self.assertEqual(metadata, [])
+
+        self.env.current_step = 1
+        agent.params["risk"] = 1
+        agent.mark_dirty()
+        self.socket.sync_environment()
+        self.assertEqual([row["name"] for row in self.database["cxagents"].rows_since(version)[0]], [agent.name])
+        self.assertEqual([row["key"] for row in self.database["cxmetadata"].rows_since(version)[0]], ["current_step"])
+
+    def test_idle_agents_are_not_rewritten(self):
+        self.env.reset()
+        self.socket.sync_environment()
+        version = max(self.database.table_versions.values())
+        walker = self.agents[0]
+        walker.step = lambda: self.env.execute(walker, Move(direction="up" if walker.y_pos < 14 else "down"))
+        self.env.step()
+        self.socket.sync_environment()
+
+        rows, _ = self.database["cxagents"].rows_since(version)
+        self.assertEqual([row["name"] for row in rows], [walker.name])
+
+
+class TestSimultaneousMoveSync(unittest.TestCase):
+    def test_database_positions_follow_resolved_moves(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = CxDatabase(directory=directory.name)
+        self.addCleanup(database.close)
+        env = Environment(use_gui=False, use_database=database, seed=2)
+        env.add(Gridworld(x_size=10, y_size=10, moves="simultaneous"))
+        agents = [SteppingAgent("agent") for _ in range(3)]
+        for agent in agents:
+            env.add(agent)
+        env.reset()
+        start = dict(env.gridworld.agent_position_map)
+        env.step()
+
+        rows = {row["name"]: (row["x_pos"], row["y_pos"]) for row in database["cxagents"].get()}
+        self.assertEqual(rows, env.gridworld.agent_position_map)
+        self.assertNotEqual(rows, start)
+
+        # a sync between queueing and resolving the moves, such as one after a GUI button event
+        for agent in agents:
+            env.execute(agent, Move(direction="down"))
+        env.cx_socket.sync_environment()
+        env.gridworld.step()
+        env.cx_socket.sync_environment()
+
+        rows = {row["name"]: (row["x_pos"], row["y_pos"]) for row in database["cxagents"].get()}
+        self.assertEqual(rows, env.gridworld.agent_position_map)
+
+
+class TestLogging(unittest.TestCase):
+    def test_log_lines_are_written_at_the_step_sync(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = CxDatabase(directory=directory.name)
+        self.addCleanup(database.close)
+        env = Environment(use_gui=False, use_database=database)
+        env.add(DummyAgent("agent"))
+        env.reset()
+        env.cx_socket.client_versions["client"] = {}
+        env.cx_socket.socketio = MagicMock()
+
+        with patch.object(database, "flush", wraps=database.flush) as flush:
+            for i in range(5):
+                env.log("INFO", "line %d", i)
+            flush.assert_not_called()
+        env.cx_socket.socketio.emit.assert_not_called()
+
+        env.cx_socket.sync_environment()
+        self.assertEqual([row["msg"] for row in database["cxlogs"].get()][-5:], [f"line {i}" for i in range(5)])
+
+
+class TestHeadless(unittest.TestCase):
+    def test_headless_skips_gui_and_database(self):
+        env = Environment(use_gui=True, use_database=True, headless=True)
+        self.assertIsNone(env.database)
+        self.assertIsInstance(env.cx_socket, NullSocket)
+
+        for _ in range(2):
+            env.add(DummyAgent("agent"))
+        env.reset()
+        env.step()
+        self.assertEqual(env.current_step, 1)
+
+    def test_database_without_gui(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = CxDatabase(directory=directory)
+            env = Environment(use_gui=False, use_database=database)
+            for _ in range(2):
+                env.add(DummyAgent("agent"))
+            env.reset()
+            env.step()
+
+            self.assertIn({"key": "current_step", "value": "1"}, database["cxmetadata"].get())
+            self.assertEqual(len(database["cxagents"].get()), 2)
+            database.close()
+
+    def test_many_agents_get_unique_names(self):
+        env = Environment(headless=True)
+        for _ in range(600):
+            env.add(Agent())
+        self.assertEqual(len(set(env.agent_names)), 600)
+
+
+class TestSeeding(unittest.TestCase):
+    def build(self, seed):
+        env = Environment(headless=True, seed=seed)
+        for _ in range(5):
+            env.add(Agent())
+        env.compile()
+        return [(agent.name, env.gridworld.agent_position_map[agent.name]) for agent in env.agents]
+
+    def test_seed_leaves_the_global_generators_alone(self):
+        random_state, numpy_state = random.getstate(), np.random.get_state()[1].copy()
+        placements = self.build(seed=5)
+
+        self.assertEqual(random.getstate(), random_state)
+        self.assertEqual(np.random.get_state()[1].tolist(), numpy_state.tolist())
+        # names and positions are drawn from the environment's own generators
+        random.seed(0)
+        np.random.seed(0)
+        self.assertEqual(self.build(seed=5), placements)
+
+
+class TestStepControl(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment(headless=True)
+        self.waiter = threading.Thread(target=self.env._backend_while_loop)
+        self.waiter.start()
+
+    def tearDown(self):
+        self.env.handle_button_event("play")
+        self.waiter.join(timeout=5)
+
+    def test_paused_until_next(self):
+        self.waiter.join(timeout=0.2)
+        self.assertTrue(self.waiter.is_alive())
+
+        self.env.handle_button_event("next")
+        self.waiter.join(timeout=5)
+        self.assertFalse(self.waiter.is_alive())
+        # next runs a single step
+        self.assertEqual(self.env.STATUS, 0)
+
+    def test_play_keeps_running(self):
+        self.env.handle_button_event("play")
+        self.waiter.join(timeout=5)
+        self.assertFalse(self.waiter.is_alive())
+        self.assertEqual(self.env.get_status, "Running")
+
+
+class SlowAgent(DummyAgent):
+    def step(self):
+        # stands in for a language model call
+        time.sleep(0.2)
+        observation = self.environment.execute(self, Move(direction="up"))
+        assert observation is None
+
+
+class TestConcurrentTurns(unittest.TestCase):
+    def run_step(self, seed):
+        env = Environment(headless=True, seed=seed, turn_workers=8)
+        agents = [SlowAgent("agent") for _ in range(8)]
+        for agent in agents:
+            env.add(agent)
+        env.reset()
+
+        start = time.perf_counter()
+        env.step()
+        elapsed = time.perf_counter() - start
+
+        for agent in agents:
+            self.assertEqual(len(agent.action_history), 1)
+            self.assertIsNotNone(agent.observations[-1])
+            self.assertEqual(agent.action_queue, [])
+        ids = {agent.name: agent.id for agent in agents}
+        return elapsed, [ids[name] for name, *_ in env.action_handler.action_logs]
+
+    def test_turns_overlap_and_apply_in_seeded_order(self):
+        elapsed, order = self.run_step(seed=7)
+        self.assertLess(elapsed, 8 * 0.2 / 2)
+        self.assertEqual(sorted(order), list(range(8)))
+        self.assertEqual(self.run_step(seed=7)[1], order)
+
+    def test_invalid_worker_count(self):
+        with self.assertRaises(ValueError):
+            Environment(headless=True, turn_workers=0)
+
+
+class DecidingAgent(DummyAgent):
+    def __init__(self, name):
+        super(DecidingAgent, self).__init__(name)
+        self.seen = []
+
+    def step(self):
+        raise AssertionError("agents that implement decide are not stepped")
+
+    def decide(self, observations):
+        self.seen.append((observations, len(self.environment.action_handler.action_logs)))
+        return [SellOrder(good="socks", price=10, quantity=1), Move(direction="up")]
+
+
+class SteppingAgent(DummyAgent):
+    def step(self):
+        self.observation = self.environment.execute(self, Move(direction="up"))
+
+
+class TestDecideApply(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment(headless=True, seed=3)
+        self.deciding = [DecidingAgent("agent") for _ in range(3)]
+        self.stepping = SteppingAgent("agent")
+        for agent in self.deciding + [self.stepping]:
+            self.env.add(agent)
+        self.env.add(Marketplace())
+        self.env.reset()
+
+    def test_decisions_are_applied_after_every_agent_decided(self):
+        self.env.step()
+
+        # every deciding agent decided before anything was applied
+        self.assertEqual([seen for agent in self.deciding for seen in agent.seen], [([], 0)] * 3)
+        for agent in self.deciding:
+            self.assertEqual(len(agent.action_history), 2)
+            self.assertEqual(agent.action_queue, [])
+
+        # the next decision sees the observations of both actions applied in the previous turn
+        observations = {agent: list(agent.observations) for agent in self.deciding}
+        self.env.step()
+        for agent in self.deciding:
+            self.assertEqual(agent.seen[1][0], observations[agent])
+            self.assertEqual(len(agent.seen[1][0]), 2)
+
+    def test_stepping_agents_share_the_seeded_order(self):
+        def first_actors(seed):
+            env = Environment(headless=True, seed=seed)
+            agents = [DecidingAgent("agent") for _ in range(3)] + [SteppingAgent("agent")]
+            for agent in agents:
+                env.add(agent)
+            env.add(Marketplace())
+            env.reset()
+            env.step()
+            return env.action_handler.action_logs[0][0], agents[-1].name
+
+        # the stepping agent is not always first, and a seed always gives the same order
+        results = [first_actors(seed) for seed in range(10)]
+        self.assertTrue(any(first != stepping for first, stepping in results))
+        self.assertEqual([first_actors(seed) for seed in range(10)], results)
+
+    def test_stepping_agents_still_execute_directly(self):
+        self.env.step()
+        self.assertIsNotNone(self.stepping.observation)
+
+
 if __name__ == "__main__":
     unittest.main()
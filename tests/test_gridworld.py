@@ -0,0 +1,281 @@
+import unittest
+import numpy as np
+from cxsim.artifacts.standard.gridworld import Gridworld, Block, Move
+
+
+class Walker:
+    def __init__(self, id):
+        self.id = id
+        self.name = f"walker_{id}"
+        self.inventory = None
+
+    def mark_dirty(self):
+        pass
+
+
+class GoalBlock(Block):
+    def __init__(self):
+        super(GoalBlock, self).__init__(name="Goal", color="gold", is_goal=True)
+        self.visits = 0
+
+    def interact(self, agent):
+        self.visits += 1
+
+
+class TestGridArrays(unittest.TestCase):
+    def setUp(self):
+        self.gridworld = Gridworld(x_size=6, y_size=4)
+        self.gridworld.pop_dirty_blocks()
+
+    def test_blocks_are_views_of_the_arrays(self):
+        block = self.gridworld.grid[1][2]
+        block.color = (1, 2, 3)
+        block.can_occupy = False
+
+        self.assertEqual(self.gridworld.colors[1, 2].tolist(), [1, 2, 3])
+        self.assertFalse(self.gridworld.passable[1, 2])
+        self.assertEqual(self.gridworld.grid[1][-2].to_item["color"], "#010203")
+        self.assertEqual(self.gridworld.pop_dirty_blocks(), [self.gridworld.grid[1][2].to_item])
+
+    def test_walls_and_contents(self):
+        self.gridworld.add_wall((0, 1), (3, 1))
+        self.assertEqual(int((~self.gridworld.passable).sum()), 4)
+        self.assertEqual(self.gridworld[2, 1], "Wall")
+        self.assertEqual(self.gridworld.grid[2][1].name, "Wall")
+        self.assertEqual(len(self.gridworld.pop_dirty_blocks()), 4)
+        self.assertIn("| Wall| Wall| Wall| Wall|_____|_____|", self.gridworld.display())
+
+    def test_block_subclasses_are_kept(self):
+        goal = GoalBlock()
+        self.gridworld.replace_block(4, 3, goal)
+
+        self.assertIs(self.gridworld.grid[4][3], goal)
+        self.assertTrue(self.gridworld.goals[4, 3])
+        self.assertEqual(self.gridworld.grid[4][3].to_item["color"], "gold")
+
+        self.gridworld.replace_block(4, 3, Block(name="Empty", color=(255, 255, 255)))
+        self.assertFalse(self.gridworld.goals[4, 3])
+        # the replaced block keeps the values it had in the grid
+        self.assertTrue(goal.is_goal)
+        self.assertEqual(goal.color, "gold")
+
+    def test_get_blocks_matches_to_item(self):
+        self.gridworld.grid[5][0].is_goal = True
+        blocks = self.gridworld.get_blocks()
+        self.assertEqual(len(blocks), 24)
+        self.assertEqual(blocks[5 * 4], self.gridworld.grid[5][0].to_item)
+
+
+class TestPlacement(unittest.TestCase):
+    def assert_spaced(self, gridworld, spacing):
+        xs, ys = np.nonzero(gridworld.occupied)
+        distances = np.maximum(abs(xs[:, None] - xs[None, :]), abs(ys[:, None] - ys[None, :]))
+        np.fill_diagonal(distances, spacing + 1)
+        self.assertGreater(distances.min(), spacing)
+
+    def test_free_index_follows_the_grid(self):
+        gridworld = Gridworld(x_size=8, y_size=8)
+        gridworld.place_agent(Walker(0))
+        gridworld.add_wall((0, 0), (0, 7))
+        gridworld[5, 5] = None
+        gridworld[3, 3] = "rock"
+
+        free = set(gridworld.free_cells[:gridworld.n_free].tolist())
+        self.assertEqual(free, set(np.flatnonzero(gridworld.passable & ~gridworld.occupied).tolist()))
+
+    def test_place_agents_keeps_spacing(self):
+        gridworld = Gridworld(x_size=40, y_size=30)
+        gridworld.place_agents([Walker(i) for i in range(100)], spacing=2)
+        self.assertEqual(int(gridworld.occupied.sum()), 100)
+        self.assert_spaced(gridworld, 2)
+
+    def test_crowded_grid_uses_the_lattice(self):
+        gridworld = Gridworld(x_size=15, y_size=15)
+        gridworld.place_agents([Walker(i) for i in range(64)])
+        self.assert_spaced(gridworld, 1)
+
+        with self.assertRaises(ValueError):
+            Gridworld(x_size=15, y_size=15).place_agents([Walker(i) for i in range(65)])
+
+    def test_place_agent_searches_a_crowded_grid(self):
+        gridworld = Gridworld(x_size=2, y_size=30)
+        gridworld.add_wall((0, 0), (1, 0))
+        for x in range(2):
+            for y in range(1, 28):
+                gridworld[x, y] = "rock"
+        gridworld.place_agent(Walker(0))
+        self.assertIn(gridworld.agent_position_map["walker_0"], [(0, 28), (0, 29), (1, 28), (1, 29)])
+
+        with self.assertRaises(ValueError):
+            gridworld.place_agent(Walker(1))
+
+
+class TestSpatialQueries(unittest.TestCase):
+    def setUp(self):
+        self.gridworld = Gridworld(x_size=50, y_size=40)
+        self.walkers = [Walker(i) for i in range(200)]
+        self.gridworld.place_agents(self.walkers)
+
+    def brute_force(self, position, radius):
+        x, y = position
+        found = []
+        for walker in self.walkers:
+            other_x, other_y = self.gridworld.agent_position_map[walker.name]
+            distance = ((other_x - x) ** 2 + (other_y - y) ** 2) ** 0.5
+            if distance <= radius:
+                found.append((distance, walker.id))
+        return [walker_id for _, walker_id in sorted(found)]
+
+    def test_radius_and_nearest_match_brute_force(self):
+        for position, radius in [((0, 0), 5), ((25, 20), 7.5), ((49, 39), 30)]:
+            found = self.gridworld.agents_in_radius(position, radius)
+            self.assertEqual([walker.id for walker in found], self.brute_force(position, radius))
+
+            nearest = self.gridworld.nearest_agents(position, k=10)
+            self.assertEqual([walker.id for walker in nearest], self.brute_force(position, 100)[:10])
+
+    def test_index_follows_moves(self):
+        walker = self.walkers[0]
+        x, y = self.gridworld.agent_position_map[walker.name]
+        new_position = self.gridworld.random_free_cell()
+        self.gridworld.set_cell(x, y, "content", None)
+        self.gridworld._put_agent(walker, *new_position)
+
+        self.assertEqual(self.gridworld.spatial_index.positions[walker.id], new_position)
+        self.assertEqual(self.gridworld.agents_in_rect(new_position, new_position), [walker])
+        self.assertNotIn(walker, self.gridworld.agents_in_radius((x, y), 0))
+        self.assertEqual(len(self.gridworld.spatial_index), 200)
+
+        nearest = self.gridworld.nearest_agents(new_position, k=3, exclude=walker)
+        self.assertEqual([other.id for other in nearest], self.brute_force(new_position, 100)[1:4])
+
+    def test_line_of_sight(self):
+        gridworld = Gridworld(x_size=10, y_size=10)
+        gridworld.add_wall((5, 0), (5, 4))
+        self.assertFalse(gridworld.line_of_sight((0, 0), (9, 2)))
+        self.assertTrue(gridworld.line_of_sight((0, 9), (9, 6)))
+        self.assertTrue(gridworld.line_of_sight((4, 0), (5, 0)))
+
+
+class TestSimultaneousMoves(unittest.TestCase):
+    def make_gridworld(self, positions, seed=0):
+        gridworld = Gridworld(x_size=6, y_size=6, moves="simultaneous", seed=seed)
+        walkers = [Walker(i) for i in range(len(positions))]
+        for walker, (x, y) in zip(walkers, positions):
+            gridworld._put_agent(walker, x, y)
+        return gridworld, walkers
+
+    def move(self, gridworld, walkers, directions):
+        for walker, direction in zip(walkers, directions):
+            self.assertEqual(gridworld.process_action(walker, Move(direction=direction)), "Move queued, it is applied at the end of the step.")
+        gridworld.step()
+        return [gridworld.agent_position_map[walker.name] for walker in walkers]
+
+    def test_chains_move_together(self):
+        gridworld, walkers = self.make_gridworld([(0, 0), (1, 0), (2, 0)])
+        self.assertEqual(self.move(gridworld, walkers, ["right", "right", "right"]), [(1, 0), (2, 0), (3, 0)])
+        self.assertEqual(gridworld.agents_in_rect((0, 0), (5, 0)), walkers)
+        self.assertEqual(gridworld.pending_moves, {})
+
+    def test_blocked_agents_block_the_chain(self):
+        gridworld, walkers = self.make_gridworld([(0, 0), (1, 0), (2, 0)])
+        gridworld.add_wall((3, 0), (3, 1))
+        self.assertEqual(self.move(gridworld, walkers, ["right", "right", "right"]), [(0, 0), (1, 0), (2, 0)])
+        self.assertEqual(self.move(gridworld, walkers, ["left", "left", "left"]), [(0, 0), (1, 0), (2, 0)])
+
+    def test_swaps_fail_and_cycles_rotate(self):
+        gridworld, walkers = self.make_gridworld([(0, 0), (1, 0)])
+        self.assertEqual(self.move(gridworld, walkers, ["right", "left"]), [(0, 0), (1, 0)])
+
+        gridworld, walkers = self.make_gridworld([(0, 0), (1, 0), (1, 1), (0, 1)])
+        self.assertEqual(self.move(gridworld, walkers, ["right", "up", "left", "down"]), [(1, 0), (1, 1), (0, 1), (0, 0)])
+
+    def test_collisions_have_one_seeded_winner(self):
+        winners = set()
+        for seed in range(20):
+            gridworld, walkers = self.make_gridworld([(1, 2), (3, 2), (2, 1), (2, 3)], seed=seed)
+            positions = self.move(gridworld, walkers, ["right", "left", "up", "down"])
+            moved = [i for i, position in enumerate(positions) if position == (2, 2)]
+            self.assertEqual(len(moved), 1)
+            self.assertEqual(int(gridworld.occupied.sum()), 4)
+            winners.add(moved[0])
+
+            gridworld, walkers = self.make_gridworld([(1, 2), (3, 2), (2, 1), (2, 3)], seed=seed)
+            self.assertEqual(self.move(gridworld, walkers, ["right", "left", "up", "down"]), positions)
+        self.assertGreater(len(winners), 1)
+
+    def test_random_moves_keep_the_grid_consistent(self):
+        gridworld = Gridworld(x_size=30, y_size=30, moves="simultaneous", seed=1)
+        gridworld.add_wall((15, 0), (15, 20))
+        walkers = [Walker(i) for i in range(400)]
+        gridworld.place_agents(walkers, spacing=0)
+        # build the free cell index, so the moves have to keep it up to date
+        gridworld.random_free_cell()
+        rng = np.random.default_rng(2)
+        for _ in range(20):
+            for walker in walkers:
+                gridworld.process_action(walker, Move(direction=rng.choice(["up", "down", "left", "right"])))
+            gridworld.step()
+
+        positions = {gridworld.agent_position_map[walker.name] for walker in walkers}
+        self.assertEqual(len(positions), 400)
+        self.assertEqual(set(zip(*np.nonzero(gridworld.agent_ids >= 0))), positions)
+        self.assertEqual(set(gridworld.spatial_index.positions.values()), positions)
+        free = set(gridworld.free_cells[:gridworld.n_free].tolist())
+        self.assertEqual(free, set(np.flatnonzero(gridworld.passable & ~gridworld.occupied).tolist()))
+
+
+class TestPathfinding(unittest.TestCase):
+    def setUp(self):
+        self.gridworld = Gridworld(x_size=10, y_size=8)
+        # a wall across the grid with a gap at the top
+        self.gridworld.add_wall((5, 0), (5, 6))
+
+    def test_paths_go_around_walls(self):
+        path = self.gridworld.find_path((0, 0), (9, 0))
+        self.assertEqual(path[0], (0, 0))
+        self.assertEqual(path[-1], (9, 0))
+        self.assertEqual(len(path) - 1, 5 + 7 + 7 + 4)
+        self.assertTrue(all(self.gridworld.passable[cell] for cell in path))
+        self.assertTrue(all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:])))
+
+        self.gridworld.add_wall((5, 7), (5, 7))
+        self.assertIsNone(self.gridworld.find_path((0, 0), (9, 0)))
+
+    def test_distance_field_matches_a_star(self):
+        self.gridworld.replace_block(9, 0, Block(name="Goal", is_goal=True))
+        field = self.gridworld.distance_field()
+        self.assertIs(self.gridworld.distance_field(), field)
+        for start in [(0, 0), (4, 7), (6, 3)]:
+            self.assertEqual(field[start], len(self.gridworld.pathfinder._a_star(start, (9, 0))) - 1)
+        self.assertEqual(field[5, 3], -1)
+
+    def test_caches_follow_the_terrain(self):
+        path = self.gridworld.find_path((0, 0), (9, 0))
+        field = self.gridworld.distance_field([(9, 0)])
+
+        walker = Walker(0)
+        self.gridworld._put_agent(walker, 4, 7)
+        self.assertIs(self.gridworld.find_path((0, 0), (9, 0)), path)
+        self.assertIs(self.gridworld.distance_field([(9, 0)]), field)
+
+        self.gridworld.replace_block(5, 3, Block(name="Empty", color=(255, 255, 255)))
+        self.assertIsNot(self.gridworld.distance_field([(9, 0)]), field)
+        self.assertEqual(len(self.gridworld.find_path((0, 0), (9, 0))) - 1, 9 + 3 + 3)
+
+    def test_agents_follow_next_move(self):
+        self.gridworld.replace_block(9, 0, Block(name="Goal", is_goal=True))
+        walkers = [Walker(0), Walker(1)]
+        self.gridworld._put_agent(walkers[0], 0, 0)
+        self.gridworld._put_agent(walkers[1], 2, 5)
+        for _ in range(30):
+            for walker in walkers:
+                move = self.gridworld.next_move(walker)
+                if move is not None:
+                    self.gridworld.process_action(walker, move)
+        self.assertEqual({self.gridworld.agent_position_map[walker.name] for walker in walkers} & {(9, 0)}, {(9, 0)})
+        self.assertEqual(self.gridworld.pathfinder._fields.keys(), {("goal cells",)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import numpy as np
+from cxsim import Environment
+from cxsim.agents import Agent
+from cxsim.artifacts.standard.marketplace import Marketplace, BuyOrder, SellOrder
+
+
+class DummyAgent(Agent):
+    def __init__(self, name, capital):
+        super(DummyAgent, self).__init__(name)
+        self.inventory.set_starting_inventory({"capital": capital, "socks": 10})
+
+    def execute_action(self):
+        pass
+
+
+class TestHoldings(unittest.TestCase):
+
+    def setUp(self):
+        self.environment = Environment(use_gui=False, use_database=False, use_holdings=True)
+        self.agents = [DummyAgent(f"Agent_{i}", capital) for i, capital in enumerate([0, 100, 300])]
+        for agent in self.agents:
+            self.environment.add(agent)
+        self.marketplace = Marketplace()
+        self.environment.add(self.marketplace)
+        self.environment.compile()
+        self.holdings = self.environment.holdings
+
+    def test_inventories_are_row_views(self):
+        self.assertEqual(self.holdings.matrix.shape, (3, 2))
+        self.assertEqual(self.holdings.totals(), {"capital": 400, "socks": 30})
+
+        self.marketplace.process_action(self.agents[0], SellOrder(good="socks", price=20, quantity=4))
+        self.marketplace.process_action(self.agents[2], BuyOrder(good="socks", price=20, quantity=4))
+
+        self.assertEqual(self.agents[0].get_inventory("capital"), 80)
+        self.assertEqual(self.holdings.row(self.agents[0]).tolist(), [80, 6])
+        self.assertEqual(self.holdings.column("socks").tolist(), [6, 10, 14])
+        self.assertTrue(self.holdings.is_conserved())
+
+    def test_aggregates(self):
+        self.assertEqual(self.holdings.holders("capital"), self.agents[1:])
+        self.assertAlmostEqual(self.holdings.gini("socks"), 0.0)
+        values = np.array([0, 100, 300])
+        expected = np.abs(values[:, None] - values[None, :]).sum() / (2 * len(values) ** 2 * values.mean())
+        self.assertAlmostEqual(self.holdings.gini("capital"), expected)
+
+        self.agents[1].inventory.add_item(self.agents[2].inventory.remove_item("capital"))
+        self.assertTrue(self.holdings.is_conserved())
+        self.agents[1].inventory.remove_item("capital")
+        self.assertFalse(self.holdings.is_conserved())
+
+    def test_reset(self):
+        self.environment.item_handler.transfer(self.agents[2], self.agents[0], "capital", 50)
+        self.agents[0].inventory.reset()
+        self.assertEqual(self.agents[0].get_inventory("capital"), 0)
+
+        self.holdings.reset()
+        self.assertEqual(self.holdings.snapshot().tolist(), [[0, 10], [100, 10], [300, 10]])
+
+    def test_new_good_adds_a_column(self):
+        self.agents[1].inventory.set_starting_inventory({"capital": 100, "socks": 10, "shirts": 2})
+        self.assertEqual(self.holdings.goods, ["capital", "socks", "shirts"])
+        self.assertEqual(self.agents[1].get_inventory("shirts"), 2)
+        self.assertEqual(self.agents[0].get_inventory("shirts"), 0)
+
+    def test_rows_behave_like_the_quantity_dict(self):
+        self.agents[1].inventory.set_starting_inventory({"capital": 100, "socks": 10, "shirts": 2})
+        inventory = self.agents[0].inventory.inventory
+        self.assertEqual(dict(inventory), {"capital": 0, "socks": 10})
+        self.assertNotIn("shirts", inventory)
+        with self.assertRaises(KeyError):
+            inventory["shirts"]
+        self.assertEqual(inventory.get("shirts", 0), 0)
+
+        del inventory["socks"]
+        self.assertNotIn("socks", inventory)
+        self.assertEqual(list(inventory), ["capital"])
+        self.assertEqual(len(inventory), 1)
+        with self.assertRaises(KeyError):
+            del inventory["socks"]
+
+        inventory["shirts"] = 1
+        self.assertEqual(dict(inventory), {"capital": 0, "shirts": 1})
+        self.agents[0].inventory.reset()
+        self.assertEqual(dict(inventory), {"capital": 0, "socks": 10})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -44,5 +44,70 @@ class TestInventory(unittest.TestCase):
         self.assertEqual(recent_deltas, [("add", "apple", self.apple.id), ("remove", "apple", self.apple.id)])
 
 
+class TestFungibleInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.inv = Inventory(fungible=True, non_fungible=["painting"])
+        self.inv.set_starting_inventory({"capital": 1255, "painting": 2})
+
+    def test_fungible_goods_store_counts(self):
+        self.assertEqual(self.inv.get_quantity("capital"), 1255)
+        self.assertNotIn("capital", self.inv.internal_inventory)
+        self.assertEqual(len(self.inv.internal_inventory["painting"]), 2)
+
+    def test_add_and_remove_item(self):
+        self.inv.add_item(self.inv.remove_item("capital"))
+        self.inv.add_item(Item("capital"))
+        self.assertEqual(self.inv.get_quantity("capital"), 1256)
+        self.assertEqual([delta[:2] for delta in self.inv.get_recent_deltas(3)],
+                         [("remove", "capital"), ("add", "capital"), ("add", "capital")])
+
+        self.assertEqual(Inventory(fungible=True).remove_item("capital"), None)
+
+        painting = self.inv.internal_inventory["painting"][0]
+        self.assertIs(self.inv.remove_item("painting"), painting)
+        self.assertEqual(self.inv.get_quantity("painting"), 1)
+
+    def test_reset(self):
+        for _ in range(5):
+            self.inv.remove_item("capital")
+        self.inv.remove_item("painting")
+        self.inv.reset()
+        self.assertEqual(self.inv.get_quantity("capital"), 1255)
+        self.assertEqual(self.inv.get_quantity("painting"), 2)
+        self.assertEqual(self.inv.deltas, [])
+        self.assertEqual(self.inv.reconstruct_past_state(), {"capital": 1255, "painting": 2})
+
+
+class TestInventoryTransfer(unittest.TestCase):
+
+    def setUp(self):
+        self.seller = Inventory()
+        self.buyer = Inventory(fungible=True)
+        self.seller.set_starting_inventory({"capital": 0, "shirts": 3})
+        self.buyer.set_starting_inventory({"capital": 5000, "shirts": 0})
+
+    def test_transfer_records_one_delta(self):
+        self.assertTrue(self.buyer.transfer(self.seller, "capital", 5000))
+        self.assertEqual(self.buyer.get_quantity("capital"), 0)
+        self.assertEqual(self.seller.get_quantity("capital"), 5000)
+        self.assertEqual(len(self.seller.internal_inventory["capital"]), 5000)
+        self.assertEqual(self.buyer.deltas, [("transfer_out", "capital", 5000)])
+        self.assertEqual(self.seller.deltas, [("transfer_in", "capital", 5000)])
+        self.assertEqual(self.seller.reconstruct_past_state()["capital"], 0)
+
+    def test_transfer_keeps_item_identity(self):
+        shirts = list(self.seller.internal_inventory["shirts"])
+        other = Inventory()
+        self.assertTrue(self.seller.transfer(other, "shirts", 2))
+        self.assertEqual(list(other.internal_inventory["shirts"]), shirts[:2])
+        self.assertEqual(self.seller.get_quantity("shirts"), 1)
+
+    def test_insufficient_transfer_moves_nothing(self):
+        self.assertFalse(self.seller.transfer(self.buyer, "shirts", 4))
+        self.assertEqual(self.seller.get_quantity("shirts"), 3)
+        self.assertEqual(self.seller.deltas, [])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from cxsim.agents import Agent
+from cxsim.agents.traits.inventory import Inventory
+from cxsim.environment.ledger import Ledger
+
+
+class DummyAgent(Agent):
+    def __init__(self, name, fungible=False):
+        super(DummyAgent, self).__init__(name)
+        self.inventory = Inventory(fungible=fungible)
+        self.inventory.set_starting_inventory({"capital": 100, "socks": 5})
+
+    def execute_action(self):
+        pass
+
+
+class TestLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.ledger = Ledger(capacity=1)
+        self.buyer = DummyAgent("Buyer", fungible=True)
+        self.seller = DummyAgent("Seller")
+
+    def trade(self, price, quantity, step):
+        return self.ledger.post(
+            [(self.buyer, self.seller, "capital", price * quantity), (self.seller, self.buyer, "socks", quantity)],
+            step=step
+        )
+
+    def test_post_applies_every_leg(self):
+        self.assertEqual(self.trade(10, 2, step=0), 0)
+        self.assertEqual(self.buyer.get_inventory("capital"), 80)
+        self.assertEqual(self.seller.get_inventory("capital"), 120)
+        self.assertEqual(self.buyer.get_inventory("socks"), 7)
+        self.assertEqual(len(self.ledger), 2)
+        self.assertEqual(self.ledger["entry_id"].tolist(), [0, 0])
+        # journaled postings do not write per-inventory deltas
+        self.assertEqual(self.buyer.inventory.deltas, [])
+
+    def test_rejected_post_moves_nothing(self):
+        self.assertIsNone(self.trade(30, 4, step=0))
+        self.assertEqual(self.buyer.get_inventory("capital"), 100)
+        self.assertEqual(self.seller.get_inventory("socks"), 5)
+        self.assertEqual(len(self.ledger), 0)
+
+    def test_rollback_step(self):
+        # both sides keep Item objects, so rollback must restore the seller's original socks
+        self.buyer = DummyAgent("Buyer")
+        socks = list(self.seller.inventory.internal_inventory["socks"])
+        self.trade(10, 1, step=0)
+        self.trade(10, 2, step=1)
+        self.trade(5, 1, step=1)
+
+        self.assertEqual(self.ledger.rollback(1), 4)
+        self.assertEqual(self.ledger.n_entries, 1)
+        self.assertEqual(self.buyer.get_inventory("capital"), 90)
+        self.assertEqual(self.seller.get_inventory("socks"), 4)
+        self.assertEqual(list(self.seller.inventory.internal_inventory["socks"]), socks[1:])
+
+    def test_query(self):
+        self.trade(10, 1, step=0)
+        self.trade(10, 2, step=1)
+
+        socks = self.ledger.query(good="socks")
+        self.assertEqual(socks["quantity"].tolist(), [1, 2])
+        self.assertEqual(self.ledger.query(agent=self.buyer, step=1)["quantity"].tolist(), [20, 2])
+        self.assertEqual(len(self.ledger.query(good="shirts")["quantity"]), 0)
+
+        with self.assertRaises(ValueError):
+            self.ledger.post([(self.buyer, self.seller, "capital", 1)], step=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
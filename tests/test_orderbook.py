@@ -1,7 +1,7 @@
 import unittest
 from cxsim import Environment
 from cxsim.agents import Agent
-from cxsim.artifacts.marketplace import Marketplace, BuyOrder, SellOrder
+from cxsim.artifacts.standard.marketplace import Marketplace, BuyOrder, SellOrder
 import random
 
 
@@ -26,6 +26,8 @@ class DummyAgent(Agent):
 
 
 class TestOrderBookIntegration(unittest.TestCase):
+    order_book_type = "list"
+
     def setUp(self):
         # Setup the environment
         self.environment = Environment()
@@ -36,7 +38,7 @@ class TestOrderBookIntegration(unittest.TestCase):
             self.environment.add(agent)
 
         # Add a Marketplace to the environment
-        self.marketplace = Marketplace()
+        self.marketplace = Marketplace(order_book_type=self.order_book_type)
         self.marketplace.create_market("socks")
         self.environment.add(self.marketplace)
 
@@ -44,13 +46,21 @@ class TestOrderBookIntegration(unittest.TestCase):
 
     def test_buy_order_exceeds_capital(self):
         agent = self.agents[0]
-        agent.execute_action()  # Agent creates a buy order for 10 socks at $5 each ($50 total)
+        # execute_action only appends a BuyOrder for 5 socks at $10 to the agent's action queue, nothing reaches
+        # the marketplace
+        agent.execute_action()
 
-        # Now, we manually create a buy order which would exceed the agent's capital when combined with the existing order
+        # 5 socks at $1000 each cost $5000, more than the agent's $1000 of capital, so the order is rejected
         expensive_order = BuyOrder(good="socks", price=1000, quantity=5)
         self.marketplace.process_action(agent, expensive_order)
+        self.assertEqual(len(self.marketplace["socks"].buy_orders), 0)
+
+        # 5 socks at $200 each cost exactly the agent's capital, so the order rests in the book
+        self.marketplace.process_action(agent, BuyOrder(good="socks", price=200, quantity=5))
+        self.assertEqual(len(self.marketplace["socks"].buy_orders), 1)
 
-        # Only the initial buy order should exist, the expensive order should be ignored
+        # the resting order commits all of the agent's capital, so even a $1 order is rejected
+        self.marketplace.process_action(agent, BuyOrder(good="socks", price=1, quantity=1))
         self.assertEqual(len(self.marketplace["socks"].buy_orders), 1)
 
     def test_sell_order_exceeds_goods(self):
@@ -78,6 +88,7 @@ class TestOrderBookIntegration(unittest.TestCase):
 
 
 class TestAgentInteractions(unittest.TestCase):
+    order_book_type = "list"
 
     def setUp(self):
         # Setup the environment
@@ -90,7 +101,7 @@ class TestAgentInteractions(unittest.TestCase):
         self.environment.add(self.seller)
 
         # Add a Marketplace to the environment
-        self.marketplace = Marketplace()
+        self.marketplace = Marketplace(order_book_type=self.order_book_type)
         self.marketplace.create_market("socks")
         self.environment.add(self.marketplace)
 
@@ -136,6 +147,130 @@ class TestAgentInteractions(unittest.TestCase):
         self.assertEqual(self.marketplace["socks"].buy_orders[0].quantity, 5)  # Remaining 5 from the initial 10
 
 
+class TestSweepMatching(unittest.TestCase):
+    order_book_type = "list"
+
+    def setUp(self):
+        self.environment = Environment(use_gui=False, use_database=False)
+        self.sellers = [DummyAgent(f"Seller_{i}") for i in range(3)]
+        self.buyer = DummyAgent("Buyer")
+        for agent in self.sellers + [self.buyer]:
+            self.environment.add(agent)
+
+        self.marketplace = Marketplace(order_book_type=self.order_book_type)
+        self.marketplace.create_market("socks")
+        self.environment.add(self.marketplace)
+        self.environment.compile()
+
+        for seller, (price, quantity) in zip(self.sellers, [(10, 2), (11, 3), (13, 5)]):
+            self.marketplace.process_action(seller, SellOrder(good="socks", price=price, quantity=quantity))
+
+    def test_order_sweeps_crossing_levels(self):
+        self.marketplace.process_action(self.buyer, BuyOrder(good="socks", price=12, quantity=6))
+        book = self.marketplace["socks"]
+
+        fills = [(t.seller_agent, t.price, t.quantity) for t in book.event_history]
+        self.assertEqual(fills, [(self.sellers[0], 10, 2), (self.sellers[1], 11, 3)])
+        self.assertEqual(book.history.prices.tolist(), [10, 11])
+        self.assertEqual(book.history["seller_id"].tolist(), [self.sellers[0].id, self.sellers[1].id])
+        self.assertEqual(self.buyer.get_inventory("socks"), 105)
+        self.assertEqual(self.buyer.get_inventory("capital"), 1000 - 2 * 10 - 3 * 11)
+
+        # the unfilled unit rests in the book at the order's limit price
+        self.assertEqual([(o.price, o.quantity) for o in book.buy_orders], [(12, 1)])
+        self.assertEqual([(o.price, o.quantity) for o in book.sell_orders], [(13, -5)])
+        self.assertEqual(book.highest_bid_order.price, 12)
+        self.assertEqual(book.lowest_offer_order.price, 13)
+
+    def test_uncovered_book_order_is_skipped(self):
+        # the cheapest seller gives away its socks after its order rested
+        self.environment.item_handler.transfer(self.sellers[0], self.buyer, "socks", 100)
+        self.marketplace.process_action(self.buyer, BuyOrder(good="socks", price=12, quantity=3))
+        book = self.marketplace["socks"]
+
+        fills = [(t.seller_agent, t.price, t.quantity) for t in book.event_history]
+        self.assertEqual(fills, [(self.sellers[1], 11, 3)])
+        self.assertEqual([(o.price, o.quantity) for o in book.sell_orders], [(13, -5)])
+        self.assertEqual(self.sellers[0].get_inventory("capital"), 1000)
+
+    def test_order_filled_within_first_level(self):
+        self.marketplace.process_action(self.buyer, BuyOrder(good="socks", price=15, quantity=1))
+        book = self.marketplace["socks"]
+
+        self.assertEqual(len(book.event_history), 1)
+        self.assertEqual(len(book.buy_orders), 0)
+        self.assertEqual([(o.price, o.quantity) for o in book.sell_orders], [(10, -1), (11, -3), (13, -5)])
+
+
+class TestPriceLevelSweepMatching(TestSweepMatching):
+    order_book_type = "price_level"
+
+
+class TestCallAuction(unittest.TestCase):
+    order_book_type = "list"
+
+    def setUp(self):
+        self.environment = Environment(use_gui=False, use_database=False)
+        self.buyers = [DummyAgent(f"Buyer_{i}") for i in range(2)]
+        self.sellers = [DummyAgent(f"Seller_{i}") for i in range(2)]
+        for agent in self.buyers + self.sellers:
+            self.environment.add(agent)
+
+        self.marketplace = Marketplace(order_book_type=self.order_book_type, clearing="call")
+        self.marketplace.create_market("socks")
+        self.environment.add(self.marketplace)
+        self.environment.compile()
+
+    def submit_orders(self):
+        self.marketplace.process_action(self.buyers[0], BuyOrder(good="socks", price=12, quantity=3))
+        self.marketplace.process_action(self.buyers[1], BuyOrder(good="socks", price=10, quantity=2))
+        self.marketplace.process_action(self.sellers[0], SellOrder(good="socks", price=8, quantity=2))
+        self.marketplace.process_action(self.sellers[1], SellOrder(good="socks", price=11, quantity=4))
+
+    def test_orders_wait_for_step(self):
+        self.submit_orders()
+        book = self.marketplace["socks"]
+        self.assertEqual(len(book.pending_orders), 4)
+        self.assertEqual(len(book.event_history), 0)
+        self.assertEqual(len(book.buy_orders) + len(book.sell_orders), 0)
+
+    def test_uniform_price_clearing(self):
+        self.submit_orders()
+        self.marketplace.step()
+        book = self.marketplace["socks"]
+
+        # volume is maximal (3) at 11 and 12 with equal imbalance, so the midpoint 11 is chosen
+        self.assertEqual(book.clearing_price_history, [11])
+        fills = [(t.buyer_agent, t.seller_agent, t.price, t.quantity) for t in book.event_history]
+        self.assertEqual(fills, [(self.buyers[0], self.sellers[0], 11, 2), (self.buyers[0], self.sellers[1], 11, 1)])
+        self.assertEqual(self.buyers[0].get_inventory("capital"), 1000 - 3 * 11)
+        self.assertEqual(self.buyers[1].get_inventory("socks"), 100)
+        self.assertEqual(self.sellers[1].get_inventory("socks"), 99)
+
+        # unfilled orders expire with the auction
+        self.assertEqual(len(book.pending_orders), 0)
+        self.marketplace.step()
+        self.assertEqual(len(book.event_history), 2)
+
+    def test_new_order_replaces_queued_order(self):
+        self.marketplace.process_action(self.buyers[0], BuyOrder(good="socks", price=12, quantity=3))
+        self.marketplace.process_action(self.buyers[0], BuyOrder(good="socks", price=7, quantity=1))
+        self.marketplace.process_action(self.sellers[0], SellOrder(good="socks", price=8, quantity=2))
+        self.marketplace.step()
+
+        book = self.marketplace["socks"]
+        self.assertEqual(len(book.event_history), 0)
+        self.assertEqual(book.clearing_price_history, [])
+
+    def test_unknown_clearing_mode(self):
+        with self.assertRaises(ValueError):
+            Marketplace(clearing="batch")
+
+
+class TestPriceLevelCallAuction(TestCallAuction):
+    order_book_type = "price_level"
+
+
 class TestRandomizedMarketplaceTransactions(unittest.TestCase):
 
     def test_randomized_trades(self):
@@ -185,7 +320,7 @@ class TestRandomizedMarketplaceTransactions(unittest.TestCase):
 class TestMarketplaceStressTest(unittest.TestCase):
 
     def setUp(self):
-        self.environment = Environment(gui=False)
+        self.environment = Environment(use_gui=False, use_database=False)
         self.agents = [Agent(f"Agent_{i}") for i in range(50)]  # Use a larger number of agents to stress test
         for agent in self.agents:
             starting_capital = random.randint(500, 1500)
@@ -241,5 +376,75 @@ class TestMarketplaceStressTest(unittest.TestCase):
         self.assertEqual(sum(agent.get_inventory("socks") for agent in self.agents), self.total_initial_socks)
 
 
+class TestPriceLevelOrderBookIntegration(TestOrderBookIntegration):
+    order_book_type = "price_level"
+
+
+class TestPriceLevelAgentInteractions(TestAgentInteractions):
+    order_book_type = "price_level"
+
+
+class TestOrderBookTypesParity(unittest.TestCase):
+
+    def run_orders(self, order_book_type, orders):
+        environment = Environment(use_gui=False, use_database=False)
+        agents = [Agent(f"Agent_{i}") for i in range(20)]
+        for agent in agents:
+            agent.inventory.set_starting_inventory({"capital": 2000, "socks": 100})
+            environment.add(agent)
+
+        marketplace = Marketplace(order_book_type=order_book_type)
+        marketplace.create_market("socks")
+        environment.add(marketplace)
+        environment.compile()
+
+        for agent_idx, order in orders:
+            marketplace.process_action(agents[agent_idx], order)
+
+        book = marketplace["socks"]
+        self.check_agent_index(book)
+        fills = [(t.buyer_agent.id, t.seller_agent.id, t.price, t.quantity) for t in book.event_history]
+        resting = [(o.agent.id, o.price, o.quantity) for o in book.buy_orders + book.sell_orders]
+        return fills, resting
+
+    def check_agent_index(self, book):
+        resting = book.buy_orders + book.sell_orders
+        self.assertEqual(sum(len(orders) for orders in book.agent_orders.values()), len(resting))
+        for order in resting:
+            self.assertIn(order, book.agent_orders[order.agent])
+
+        for agent, orders in book.agent_orders.items():
+            capital = sum(o.price * o.quantity for o in orders if o.quantity > 0)
+            quantity = sum(abs(o.quantity) for o in orders if o.quantity < 0)
+            self.assertEqual(book.committed_capital.get(agent, 0), capital)
+            self.assertEqual(book.committed_quantity.get(agent, 0), quantity)
+
+    @staticmethod
+    def random_orders(seed, n_orders=1000):
+        rng = random.Random(seed)
+        orders = []
+        for _ in range(n_orders):
+            price = rng.randint(5, 15)
+            quantity = rng.randint(1, 10)
+            order = BuyOrder(good="socks", price=price, quantity=quantity) if rng.random() < 0.5 \
+                else SellOrder(good="socks", price=price, quantity=quantity)
+            orders.append((rng.randrange(20), order))
+        return orders
+
+    def test_identical_fills(self):
+        orders = self.random_orders(1962)
+
+        list_fills, list_resting = self.run_orders("list", orders)
+        level_fills, level_resting = self.run_orders("price_level", orders)
+
+        self.assertGreater(len(list_fills), 0)
+        self.assertEqual(list_fills, level_fills)
+        self.assertEqual(list_resting, level_resting)
+
+    def test_unknown_order_book_type(self):
+        with self.assertRaises(ValueError):
+            Marketplace(order_book_type="unknown")
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import importlib.util
+import multiprocessing
+import random
+import unittest
+from cxsim import Environment, Agent
+from cxsim.environment.sweep import SweepRunner, SweepResults, run_replication
+
+
+class RandomWalker(Agent):
+    def __init__(self, bias):
+        super(RandomWalker, self).__init__()
+        self.bias = bias
+        self.distance = 0
+
+    def step(self):
+        self.distance += self.bias + random.random()
+
+    def reset(self):
+        self.distance = 0
+
+
+def make_environment(seed, n_agents, bias):
+    env = Environment(headless=True, seed=seed, max_steps=5)
+    for _ in range(n_agents):
+        env.add(RandomWalker(bias))
+    return env
+
+
+def distance(environment):
+    return {"distance": sum(agent.distance for agent in environment.agents)}
+
+
+class TestSweepRunner(unittest.TestCase):
+    def setUp(self):
+        self.sweep = SweepRunner(
+            make_environment, grid={"n_agents": [1, 2], "bias": [0, 10]}, metrics=distance, replications=2,
+            base_seed=1, max_workers=2, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def test_runs_cover_the_grid(self):
+        self.assertEqual(len(self.sweep), 8)
+        self.assertEqual(len({run["seed"] for run in self.sweep.runs}), 8)
+        self.assertEqual(self.sweep.runs[2]["parameters"], {"n_agents": 1, "bias": 10})
+
+    def test_results_are_reproducible(self):
+        rows = []
+        results = self.sweep.run(callback=rows.append)
+        self.assertEqual(len(results), 8)
+        self.assertEqual(len(rows), 8)
+
+        by_run = dict(zip(results["run_id"], results["distance"]))
+        self.assertGreater(by_run[3], 50)
+        self.assertEqual(by_run, {row["run_id"]: row["distance"] for row in map(self.run_locally, self.sweep.runs)})
+
+    def run_locally(self, run):
+        return run_replication(make_environment, distance, run)
+
+
+class TestSweepResults(unittest.TestCase):
+    def test_columns_added_later_are_padded(self):
+        results = SweepResults()
+        results.append({"run_id": 1, "a": 1})
+        results.append({"run_id": 0, "b": 2})
+        self.assertEqual(results.columns, {"run_id": [1, 0], "a": [1, None], "b": [None, 2]})
+        self.assertEqual(results.to_numpy()["run_id"].tolist(), [1, 0])
+
+    @unittest.skipUnless(importlib.util.find_spec("pandas"), "pandas is not installed")
+    def test_pandas_rows_are_ordered_by_run_id(self):
+        results = SweepResults()
+        results.append({"run_id": 1, "a": 1})
+        results.append({"run_id": 0, "a": 2})
+        self.assertEqual(results.to_pandas()["a"].tolist(), [2, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
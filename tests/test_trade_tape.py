@@ -0,0 +1,56 @@
+import importlib.util
+import unittest
+import numpy as np
+from cxsim.artifacts.standard.trade_tape import TradeTape
+
+
+class TestTradeTape(unittest.TestCase):
+    def setUp(self):
+        self.tape = TradeTape(capacity=2)
+
+    def test_append_grows_geometrically(self):
+        for i in range(5):
+            self.tape.append(transaction_id=i, step=0, price=10 + i, quantity=1, buyer_id=0, seller_id=1)
+
+        self.assertEqual(len(self.tape), 5)
+        self.assertEqual(self.tape.capacity, 8)
+        self.assertEqual(self.tape.prices.tolist(), [10, 11, 12, 13, 14])
+        self.assertEqual(self.tape["transaction_id"].tolist(), [0, 1, 2, 3, 4])
+
+    def test_views_share_memory(self):
+        self.tape.append(transaction_id=0, step=0, price=10, quantity=3, buyer_id=0, seller_id=1)
+        self.assertFalse(self.tape.prices.flags.owndata)
+        self.assertFalse(self.tape.quantities.flags.owndata)
+
+    def test_extend(self):
+        n = 100
+        self.tape.extend(
+            transaction_id=np.arange(n), step=np.zeros(n), price=np.full(n, 7),
+            quantity=np.ones(n), buyer_id=np.zeros(n), seller_id=np.ones(n)
+        )
+        self.assertEqual(len(self.tape), n)
+        self.assertEqual(int(self.tape.prices.sum()), 7 * n)
+
+        with self.assertRaises(ValueError):
+            self.tape.extend(price=[1])
+
+    def test_clear(self):
+        self.tape.append(transaction_id=0, step=2, price=10, quantity=3, buyer_id=4, seller_id=5)
+        self.tape.clear()
+        self.assertEqual(len(self.tape), 0)
+        self.assertEqual(len(self.tape.prices), 0)
+
+    @unittest.skipUnless(importlib.util.find_spec("pandas"), "pandas is not installed")
+    def test_export(self):
+        self.tape.append(transaction_id=0, step=2, price=10, quantity=3, buyer_id=4, seller_id=5)
+        df = self.tape.to_pandas()
+        self.assertEqual(list(df.columns), list(TradeTape.COLUMNS))
+        self.assertEqual(df["buyer_id"].tolist(), [4])
+
+    def test_unknown_column(self):
+        with self.assertRaises(KeyError):
+            self.tape["buyer"]
+
+
+if __name__ == '__main__':
+    unittest.main()